@@ -1,16 +1,38 @@
+from trend_watcher.dedup import cluster_near_duplicates
+from trend_watcher.prompt_compaction import compact_posts_prompt
+from trend_watcher.reddit_index import IncrementalRedditPoller
+from trend_watcher.ticker_mentions import MentionIndex
+from trend_watcher.trend_sources import DEFAULT_TREND_SOURCES, default_trend_sources, gather_trends
 from trend_watcher.trend_watcher import TrendWatcher
 from morning_stock_research.gemini import (
+    GeminiBatchBackend,
+    build_gemini_batch_lines,
+    parse_gemini_batch_output,
+    gemini_deep_research_future,
     send_prompts_to_gemini,
-    send_prompts_to_gemini_deep_research_agent,
 )
-from morning_stock_research.chatgpt import AskChatGPT
-from morning_stock_research.email_sender import send_email
-from sheet_reader.sheet_reader import GoogleSheetReader
+from morning_stock_research.chatgpt import DEEP_RESEARCH_MODEL, AskChatGPT, OpenAIBatchBackend, parse_batch_output
+from morning_stock_research.email_sender import flush_outbox, send_email
+from pipeline.batch import collect_durable_batches, submit_durable_batch
+from pipeline.checkpoint import RunCheckpoint, event_time, make_run_key
+from pipeline.clients import client_stats, get_gemini_client
+from pipeline.concurrency import ProviderLimiter, map_bounded
+from pipeline.dag import Pipeline
+from pipeline.env import configure_environment
+from pipeline.hedging import get_hedged_router, is_good_response
+from pipeline.job_registry import DELIVERED, get_job_registry
+from pipeline.llm_cache import get_llm_cache
+from pipeline.markdown_render import get_markdown_renderer
+from pipeline.resilience import resilience_stats
+from pipeline.state import PIPELINE_STATE_DIR
+from pipeline.tracing import Tracer, get_tracer, span, traced, use_tracer
+from pipeline.report import SECTION_END, ReportBuilder
+import html
 import logging
-import markdown
 import os
+from concurrent.futures import Future, wait
+from contextlib import contextmanager
 from datetime import datetime
-from dotenv import load_dotenv
 
 # For GCP Cloud Run Functions.
 from cloudevents.http import CloudEvent
@@ -22,11 +44,41 @@ from trend_watcher.prompts import trend_watcher_prompts
 from sheet_reader.prompts import sheet_reader_prompts
 from web_dashboards.prompts import url_resources
 
-load_dotenv()
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(filename)s:%(lineno)d - %(message)s')
+configure_environment()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 LLM_PROVIDER = "chatgpt"
+# Single-turn prompts still unanswered after the primary's p95 latency are also sent here.
+# None disables hedging and failover.
+LLM_HEDGE_PROVIDER = "gemini"
+# Max concurrent single-turn requests per provider, and threads per research batch.
+PROVIDER_CONCURRENCY = {"chatgpt": 4, "gemini": 2}
+RESEARCH_MAX_WORKERS = 8
+PIPELINE_MAX_WORKERS = 8
+# Friday holdings research: tickers per deep-research job (0 = one job for all
+# holdings), and max deep-research jobs in flight.
+HOLDINGS_BATCH_SIZE = 3
+HOLDINGS_MAX_CONCURRENCY = 4
+# Send the holdings prompts as one offline batch job (batch-tier price and limits, answers
+# within 24h) instead of interactive deep research. The Friday run only submits it; the
+# first daily run after it completes emails the analysis.
+HOLDINGS_USE_BATCH = os.getenv("HOLDINGS_USE_BATCH", "false").lower() in {"1", "true", "yes"}
+# Max prompt tokens for the Reddit trend analysis; lowest-engagement posts are trimmed first.
+TREND_WATCHER_TOKEN_BUDGET = 1500
+# Posts already seen on an earlier run are re-sent only when rising at least this fast (score/hour).
+TREND_WATCHER_MIN_SCORE_VELOCITY = 50.0
+# Trend sources fetched concurrently (also available: "youtube", "x", "google_trends",
+# "tiktok"). YouTube's trending chart is not finance-specific, so it is off by default.
+TREND_SOURCES = DEFAULT_TREND_SOURCES
+# Most-mentioned tickers listed ahead of the posts in the trend prompt.
+TREND_WATCHER_TOP_TICKERS = 10
+# Where each run's metrics are exported, <PIPELINE_STATE_DIR>/metrics by default. Point
+# either at persistent storage (e.g. a bucket mount): an instance's temp dir is gone
+# once it shuts down.
+METRICS_DIR = os.getenv("METRICS_DIR") or os.path.join(PIPELINE_STATE_DIR, "metrics")
+# Job registry key prefix of the offline holdings batches; the run date follows it.
+HOLDINGS_BATCH_KEY_PREFIX = "holdings-batch-"
 _ask_chatgpt = None
+_provider_limiter = ProviderLimiter(PROVIDER_CONCURRENCY)
 
 
 def get_ask_chatgpt() -> AskChatGPT:
@@ -36,126 +88,377 @@ def get_ask_chatgpt() -> AskChatGPT:
     return _ask_chatgpt
 
 
-def send_single_turn_prompt(prompt_text: str, url_grounding: bool = False) -> str:
-    if LLM_PROVIDER.lower() == "chatgpt":
+@contextmanager
+def _request_slot(provider: str, on_start):
+    """Holds a concurrency slot for `provider` and reports the request start to the hedging router."""
+    with _provider_limiter.slot(provider):
+        on_start()
+        yield
+
+
+def _single_turn_call(provider: str, prompt_text: str, url_grounding: bool):
+    """
+    Call for the hedging router, sending `prompt_text` to `provider`.
+
+    Cache hits return without taking a concurrency slot; a miss takes the slot
+    and only then starts the router's hedge timer.
+    """
+    def call_chatgpt(on_start) -> str:
         logging.info(f"Sending single-turn prompt to ChatGPT: {prompt_text[:100]}...")
         ask_chatgpt = get_ask_chatgpt()
-        return ask_chatgpt.single_turn_query(prompt_text=prompt_text)
-
-    logging.info(f"Sending single-turn prompt to Gemini: {prompt_text[:100]}...")
-    return send_prompts_to_gemini(
-        None,
-        None,
-        None,
-        prompt_text=prompt_text,
-        url_grounding=url_grounding,
-    )
+        return ask_chatgpt.single_turn_query(
+            prompt_text=prompt_text, request_slot=lambda: _request_slot("chatgpt", on_start))
 
+    def call_gemini(on_start) -> str:
+        logging.info(f"Sending single-turn prompt to Gemini: {prompt_text[:100]}...")
+        return send_prompts_to_gemini(
+            None,
+            None,
+            None,
+            prompt_text=prompt_text,
+            url_grounding=url_grounding,
+            request_slot=lambda: _request_slot("gemini", on_start),
+        )
 
-def send_deep_research_prompt(prompt_text: str) -> str:
-    if LLM_PROVIDER.lower() == "chatgpt":
-        logging.info(f"Sending deep research prompt to ChatGPT: {prompt_text[:100]}...")
-        ask_chatgpt = get_ask_chatgpt()
-        return ask_chatgpt.deep_research_query(prompt_text=prompt_text)
+    return call_chatgpt if provider == "chatgpt" else call_gemini
 
-    logging.info(f"Sending deep research prompt to Gemini: {prompt_text[:100]}...")
-    return send_prompts_to_gemini_deep_research_agent(prompt_text=prompt_text)
 
+def send_single_turn_prompt(prompt_text: str, url_grounding: bool = False) -> str:
+    """
+    Sends a prompt to LLM_PROVIDER, hedged with LLM_HEDGE_PROVIDER.
 
-def run_morning_stock_research() -> str:
-    """Sends predefined prompts to a LLM, and emails the compiled research report.
+    The hedge only fires when the primary is slower than its recent p95 latency or
+    returns an error, and the first good answer is used; see pipeline.hedging.
     """
+    primary = LLM_PROVIDER.lower()
+    secondary = LLM_HEDGE_PROVIDER.lower() if LLM_HEDGE_PROVIDER else None
+    calls = {
+        provider: _single_turn_call(provider, prompt_text, url_grounding)
+        for provider in {primary, secondary} - {None}
+    }
+    with span("send_single_turn_prompt", provider=primary) as prompt_span:
+        prompt_span.record_size("out", prompt_text)
+        response = get_hedged_router().call(primary, secondary, calls)
+        prompt_span.record_size("in", response)
+    return response
+
+
+def submit_deep_research_prompt(prompt_text: str) -> Future:
+    """Submits a deep-research job to the shared job manager and returns its Future without waiting."""
+    provider = LLM_PROVIDER.lower()
+    with span("submit_deep_research_prompt", provider=provider) as prompt_span:
+        prompt_span.record_size("out", prompt_text)
+        logging.info(f"Submitting deep research prompt to {provider}: {prompt_text[:100]}...")
+        if provider == "chatgpt":
+            return get_ask_chatgpt().deep_research_future(prompt_text)
+        return gemini_deep_research_future(prompt_text)
+
+
+def batch_backend(provider: str) -> tuple:
+    """(backend, parse_output) of `provider`'s Batch API, for the durable batch jobs."""
+    if provider == "chatgpt":
+        return OpenAIBatchBackend(get_ask_chatgpt().client), parse_batch_output
+    return GeminiBatchBackend(get_gemini_client(GEMINI_API_KEY)), parse_gemini_batch_output
+
+
+def prefetch_markdown(response_text: str) -> str:
+    """Starts rendering an LLM response in the background and passes it through unchanged."""
+    get_markdown_renderer().prefetch(response_text)
+    return response_text
+
+
+@traced()
+def gather_morning_stock_research() -> list:
+    """Sends every predefined research prompt to the LLM and returns the responses in prompt order."""
     logging.info(f"Starting the morning stock market research agent...")
-    
-    # 1. Gather research from the configured LLM for each prompt
-    report_html = "<h1>Morning Stock Market Research</h1>"
-    for item in research_prompts:
-        topic = item["topic"]
-        prompt = item["prompt"]
-        
-        response_text = send_single_turn_prompt(prompt_text=prompt)
 
+    # Gather research from the configured LLM for all prompts concurrently.
+    # Results keep prompt order, and a failed prompt only affects its own section.
+    return map_bounded(
+        lambda item: prefetch_markdown(send_single_turn_prompt(prompt_text=item["prompt"])),
+        research_prompts,
+        max_workers=RESEARCH_MAX_WORKERS,
+        on_error=lambda item, e: f"Error generating response for prompt: {item['prompt']}",
+    )
+
+
+@traced()
+def render_morning_stock_research(response_texts: list) -> ReportBuilder:
+    """Renders the research responses into the HTML report section."""
+    report = ReportBuilder("Morning Stock Market Research")
+    for item, response_text in zip(research_prompts, response_texts):
         # Convert Markdown to HTML for better formatting
-        formatted_response = markdown.markdown(response_text, extensions=["tables"])
-        
-        # Append to the HTML report
-        report_html += f"<h2>{topic}</h2>"
-        report_html += f"<p><strong>Prompt:</strong> {prompt}</p>"
-        # Using <pre> tag to preserve formatting from the model's response
-        report_html += (
-            '<div style="background:#f5f5f5;padding:15px;border-radius:8px;'
-            'font-family:monospace;white-space:pre-wrap;word-break:break-word;">'
-            f"{formatted_response}</div>"
-        )
-        report_html += "<hr>"
+        formatted_response = get_markdown_renderer().render(response_text)
+        report.section(item["topic"], formatted_response, prompt_text=item["prompt"])
 
     logging.info("run_morning_stock_research agent has finished its work.")
-    return report_html
+    return report
 
-def run_trend_watcher() -> str:
-    """Fetches trending posts from Reddit and sends them to specified LLM for analysis.
+
+def run_morning_stock_research() -> str:
+    """Sends predefined prompts to a LLM, and emails the compiled research report.
+    """
+    return render_morning_stock_research(gather_morning_stock_research()).render()
+
+
+@traced()
+def fetch_trend_watcher_posts() -> list:
+    """
+    Gathers trends from every enabled source concurrently, then collapses near-duplicate
+    stories. Reddit keeps only new or fast-rising r/wallstreetbets posts.
+
+    Returns:
+        list: Post dicts (`TrendItem.to_dict()`), all sources together.
     """
     logging.info("Starting TrendWatcher and ChatGPT integration...")
     watcher = TrendWatcher()
+    poller = IncrementalRedditPoller(watcher, min_score_velocity=TREND_WATCHER_MIN_SCORE_VELOCITY)
+    trends = gather_trends(default_trend_sources(watcher, enabled=TREND_SOURCES, reddit_poller=poller))
+    items = cluster_near_duplicates([item for items in trends.values() for item in items])
+    return [item.to_dict() for item in items]
 
-    # Get top 50 posts from r/wallstreetbets.
-    top_reddit_posts = watcher.get_trendy_reddit_posts(subreddit="wallstreetbets", count=50)
-    
-    # Format the posts into a single prompt.
-    formatted_posts = "\n".join(
-        [f"{i+1}. {post['title']} (Scores: {post['score']}) (URL: {post['url']}) \n\n" for i, post in enumerate(top_reddit_posts)]
-    )
-    prompt = (trend_watcher_prompts["reddit"] + f"{formatted_posts}")
+
+@traced()
+def build_trend_watcher_prompt(posts: list, token_budget: int = TREND_WATCHER_TOKEN_BUDGET) -> dict:
+    """
+    Compacts the posts into a single prompt that fits `token_budget`, led by a
+    ticker-mention table counted over all posts (including those trimmed).
+
+    Returns:
+        dict: "prompt" (str), "posts" (the posts kept, referenced as [1], [2]...),
+            "mentions" (the mention table) and "stats" (bytes and tokens before/after compaction).
+    """
+    mentions = MentionIndex().add_posts(posts).format_table(TREND_WATCHER_TOP_TICKERS)
+    instructions = f"{trend_watcher_prompts['trends']}\n{mentions}" if mentions else trend_watcher_prompts["trends"]
+    compact = compact_posts_prompt(instructions, posts, token_budget=token_budget)
+    return {"prompt": compact.text, "posts": compact.posts, "mentions": mentions, "stats": compact.stats}
+
+
+@traced()
+def ask_trend_watcher(trend_prompt: dict) -> str:
+    prompt = trend_prompt["prompt"]
     logging.info(f"Sending trend watcher prompt to {LLM_PROVIDER}: {prompt[:100]}...")
+    return prefetch_markdown(send_single_turn_prompt(prompt_text=prompt))
 
-    llm_response = send_single_turn_prompt(prompt_text=prompt)
-    formatted_response = markdown.markdown(llm_response, extensions=["tables"])
-    report_html = "<h1>TrendWatcher Analysis</h1>"
-    report_html += f"<h2>Reddit Top 50 Trending Posts</h2>"
-    report_html += f"<p><strong>Prompt:</strong> {prompt}</p>"
-    report_html += (
-            '<div style="background:#f5f5f5;padding:15px;border-radius:8px;'
-            'font-family:monospace;white-space:pre-wrap;word-break:break-word;">'
-            f"{formatted_response}</div>"
-        )
-    report_html += "<hr>"
+
+def _post_link(post: dict) -> str:
+    title = html.escape(post["title"].strip())
+    return f'<a href="{html.escape(post["url"])}">{title}</a>' if post.get("url") else title
+
+
+@traced()
+def render_trend_watcher(trend_prompt: dict, llm_response: str) -> ReportBuilder:
+    formatted_response = get_markdown_renderer().render(llm_response)
+    stats = trend_prompt["stats"]
+    report = ReportBuilder("TrendWatcher Analysis")
+    report.title(f"Top {stats['posts_in']} Trending Posts", level=2)
+    # Echo only the instructions; the posts are listed once below as links.
+    report.prompt(trend_watcher_prompts["trends"])
+    if trend_prompt.get("mentions"):
+        report.html(f"<p>{html.escape(trend_prompt['mentions'])}</p>")
+    report.response(formatted_response)
+    report.html(
+        f"<p><strong>Posts sent ({stats['posts_kept']} of {stats['posts_in']}, "
+        f"{stats['tokens_after']} of {stats['tokens_before']} tokens):</strong></p><ol>"
+    )
+    report.html("".join(
+        f'<li>{_post_link(post)} ({post.get("source") or "reddit"}, {post["score"]})</li>'
+        for post in trend_prompt["posts"]
+    ))
+    report.html("</ol>").html(SECTION_END)
     logging.info("run_trend_watcher agent has finished its work.")
-    return report_html
+    return report
 
-def run_sheet_reader() -> str: 
-    """Reads my portfolio data from Google sheet and process.
+
+def run_trend_watcher() -> str:
+    """Fetches trending posts from all enabled sources and sends them to specified LLM for analysis.
+    """
+    trend_prompt = build_trend_watcher_prompt(fetch_trend_watcher_posts())
+    return render_trend_watcher(trend_prompt, ask_trend_watcher(trend_prompt)).render()
+
+
+@traced()
+def fetch_my_holdings() -> dict:
+    """
+    Reads my current holdings from the Google sheet, with per-ticker position analytics.
+
+    Returns:
+        dict: "tickers" (list), "summary_header" (str) and "summary" ({ticker: fixed-width row}).
+            The header is None and the summary empty when the sheet lacks the needed columns.
     """
     logging.info("Starting Google Sheets reader...")
+    # Imported here: gspread, google-auth and pandas are only needed on Fridays.
+    from sheet_reader.portfolio_analytics import compute_position_analytics, format_summary_table
+    from sheet_reader.sheet_reader import GoogleSheetReader
+
     # Get my holdings from sheet.
     sheet_be_richer = 'be_richer'
     creds_path = os.path.abspath(os.path.join(
         os.path.dirname(__file__), 
         "./wordpress-hosting-302807-2a5d57c336dd.json"))
     reader = GoogleSheetReader(creds_path, sheet_be_richer)
-    my_holdings = reader.read_my_current_holdings()
-    holdings_text = my_holdings.to_string(index=False)
+    ledger = reader.read_trade_ledger()
+    tickers = ledger.current_holdings(broker="IBKR").tolist()
 
-    # Title.
-    report_html = "<h1>My Holdings Analysis</h1>"
-    # Report 1, short-term holdings analysis.
-    prompt = (
+    try:
+        analytics = compute_position_analytics(ledger.frame, is_open=ledger.is_open)
+    except ValueError as e:
+        # Better no table than numbers computed from the wrong columns.
+        logging.warning(f"Leaving the position summary out: {e}")
+        return {"tickers": tickers, "summary_header": None, "summary": {}}
+    table_lines = format_summary_table(analytics, tickers).split("\n")
+    return {
+        "tickers": tickers,
+        "summary_header": table_lines[0],
+        "summary": dict(zip(tickers, table_lines[1:])),
+    }
+
+
+def build_holdings_prompt(holdings_text: str) -> str:
+    return (
         sheet_reader_prompts["my_holdings_analysis"]
         + f"\nHere is my current holdings data:\n{holdings_text}"
     )
-    logging.info(f"Sending holdings prompt to {LLM_PROVIDER} deep research: {prompt[:100]}...")
-    llm_response = send_deep_research_prompt(prompt_text=prompt)
-    formatted_response = markdown.markdown(llm_response, extensions=["tables"])
-    report_html += f"<h2>Short-Term Holdings Analysis</h2>"
-    report_html += f"<p><strong>Prompt:</strong> {prompt}</p>"
-    report_html += (
-            '<div style="background:#f5f5f5;padding:15px;border-radius:8px;'
-            'font-family:monospace;white-space:pre-wrap;word-break:break-word;">'
-            f"{formatted_response}</div>"
-        )
-    report_html += "<hr>"
+
+
+def format_holdings_context(holdings: dict, tickers: list) -> str:
+    """Position summary table for `tickers`, so the agent doesn't have to research my own positions."""
+    from sheet_reader.portfolio_analytics import SUMMARY_LEGEND
+
+    if not holdings.get("summary_header"):
+        return "\n".join(tickers)
+    lines = [holdings["summary_header"]] + [holdings["summary"][ticker] for ticker in tickers]
+    return "\n".join(lines) + f"\n({SUMMARY_LEGEND})"
+
+
+def split_holdings(tickers: list, batch_size: int = HOLDINGS_BATCH_SIZE) -> list:
+    """Groups tickers into lists of `batch_size`; 0 keeps all holdings in one group."""
+    if batch_size and batch_size > 0:
+        return [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
+    return [tickers] if tickers else []
+
+
+@traced()
+def research_holdings(
+    holdings: dict,
+    batch_size: int = HOLDINGS_BATCH_SIZE,
+    max_concurrency: int = HOLDINGS_MAX_CONCURRENCY,
+) -> list:
+    """
+    Runs deep research over my holdings, split into small batches of tickers.
+
+    Every batch is submitted as a background job and all of them are awaited
+    together: the job manager polls them from its one poller thread, so waiting
+    costs no thread per job. One slow or failing ticker only affects its own
+    batch. Each prompt carries the position summary rows of its own tickers only.
+
+    Args:
+        holdings (dict): Output of `fetch_my_holdings`.
+        batch_size (int): Tickers per deep-research job. 0 sends all holdings in one job.
+        max_concurrency (int): Max submission requests sent at once; the submitted jobs
+            all run concurrently.
+
+    Returns:
+        list: One dict per batch with "tickers", "prompt" and "response", in ticker order.
+    """
+    batches = split_holdings(holdings["tickers"], batch_size)
+    prompts = [build_holdings_prompt(format_holdings_context(holdings, batch)) for batch in batches]
+    futures = map_bounded(submit_deep_research_prompt, prompts, max_workers=max_concurrency)
+    wait([future for future in futures if future is not None])
+
+    responses = []
+    for future in futures:
+        try:
+            if future is None:
+                raise RuntimeError("the job could not be submitted")
+            response = future.result()
+        except Exception as e:
+            logging.error(f"Holdings deep research failed: {e}")
+            response = f"Error generating deep research response: {e}"
+        responses.append(prefetch_markdown(response))
+    return [
+        {"tickers": batch, "prompt": prompt, "response": response}
+        for batch, prompt, response in zip(batches, prompts, responses)
+    ]
+
+
+@traced()
+def submit_holdings_batch(holdings: dict, run_date: str, batch_size: int = HOLDINGS_BATCH_SIZE) -> str:
+    """
+    Submits the holdings prompts as one offline batch job and returns without waiting.
+
+    The job is recorded in the job registry under a key for `run_date`, so a retried
+    run does not submit it twice; `email_holdings_batches` picks up the answers.
+    Each request id is its comma-joined tickers, so answers map back to positions.
+
+    Returns:
+        str: The provider's batch id, or "" when there are no holdings.
+    """
+    registry = get_job_registry()
+    if registry is None:
+        raise RuntimeError("HOLDINGS_USE_BATCH needs the job registry (DEEP_RESEARCH_REGISTRY_ENABLED).")
+    batches = split_holdings(holdings["tickers"], batch_size)
+    if not batches:
+        logging.info("No current holdings found; no holdings batch to submit.")
+        return ""
+    prompts = [build_holdings_prompt(format_holdings_context(holdings, batch)) for batch in batches]
+    ids = [",".join(batch) for batch in batches]
+    provider = LLM_PROVIDER.lower()
+    if provider == "chatgpt":
+        lines = AskChatGPT.batch_lines(prompts, ids, model=DEEP_RESEARCH_MODEL)
+    else:
+        lines = build_gemini_batch_lines(prompts, ids)
+    backend, _ = batch_backend(provider)
+    return submit_durable_batch(registry, f"{HOLDINGS_BATCH_KEY_PREFIX}{run_date}", provider, lines, backend)
+
+
+@traced()
+def email_holdings_batches() -> int:
+    """
+    Emails the holdings analysis of every finished holdings batch not yet sent.
+
+    Batches still running stay in the job registry for the next run. Returns how
+    many analyses were spooled.
+    """
+    registry = get_job_registry()
+    if registry is None:
+        return 0
+    sent = 0
+    for job_key, texts in collect_durable_batches(registry, HOLDINGS_BATCH_KEY_PREFIX, batch_backend):
+        results = [
+            {"tickers": request_id.split(","), "response": prefetch_markdown(text)}
+            for request_id, text in texts.items()
+        ]
+        run_date = job_key[len(HOLDINGS_BATCH_KEY_PREFIX):]
+        send_email(f"My Holdings Analysis ({run_date})", render_holdings_analysis(results))
+        registry.record_finished(job_key, DELIVERED)
+        sent += 1
+    return sent
+
+
+@traced()
+def render_holdings_analysis(results: list) -> ReportBuilder:
+    # Title.
+    report = ReportBuilder("My Holdings Analysis")
+    # Report 1, short-term holdings analysis, merged from every batch.
+    report.title("Short-Term Holdings Analysis", level=2)
+    report.prompt(sheet_reader_prompts["my_holdings_analysis"])
+    if not results:
+        report.html("<p>No current holdings found.</p>")
+    for result in results:
+        formatted_response = get_markdown_renderer().render(result["response"])
+        report.title(", ".join(result["tickers"]), level=3)
+        report.response(formatted_response)
+    report.html(SECTION_END)
 
     logging.info("Google Sheets reader has finished its work.")
-    return report_html
+    return report
+
+
+def run_sheet_reader() -> str: 
+    """Reads my portfolio data from Google sheet and process.
+    """
+    return render_holdings_analysis(research_holdings(fetch_my_holdings())).render()
 
 def test_run_sheet_reader() -> None:
     """Run only the sheet reader workflow for local testing."""
@@ -170,46 +473,146 @@ def run_politician_trades() -> str:
     prompt = url_resources["prompts"] + ", ".join(url_resources["well_known_politicians"])
     logging.info(f"Sending politician trades prompt to {LLM_PROVIDER}: {prompt[:100]}...")
     llm_response = send_single_turn_prompt(prompt_text=prompt, url_grounding=True)
-    formatted_response = markdown.markdown(llm_response, extensions=["tables"])
-    report_html = "<h1>Politician Trades Analysis</h1>"
-    report_html += f"<p><strong>Prompt:</strong> {prompt}</p>"
-    report_html += (
-            '<div style="background:#f5f5f5;padding:15px;border-radius:8px;'
-            'font-family:monospace;white-space:pre-wrap;word-break:break-word;">'
-            f"{formatted_response}</div>"
-        )
-    report_html += "<hr>"
+    formatted_response = get_markdown_renderer().render(llm_response)
+    report = ReportBuilder("Politician Trades Analysis")
+    report.prompt(prompt).response(formatted_response).html(SECTION_END)
     logging.info("Politician Trades Analysis has finished its work.")
-    return report_html
+    return report.render()
+
+
+def all_responses_good(responses: list) -> bool:
+    """Checkpoint predicate for LLM stages: a retry should redo prompts that failed."""
+    return all(is_good_response(response) for response in responses)
+
+
+def build_daily_pipeline(include_holdings: bool, run_date: str = None,
+                         use_batch: bool = HOLDINGS_USE_BATCH) -> Pipeline:
+    """
+    Declares the daily run as a DAG of stages.
+
+    Independent branches (stock research, Reddit trends and, on Fridays, the
+    holdings deep research) run in parallel. The deep-research branch gets the
+    highest priority so the slowest job starts first. LLM stages with a failed
+    response are not checkpointed, so a retried run asks again (answers that did
+    succeed come back from the LLM cache).
+
+    With `use_batch`, the holdings prompts go out as an offline batch job instead:
+    Friday's run only submits it, and every run emails batches that have finished.
+    """
+    pipeline = Pipeline(max_workers=PIPELINE_MAX_WORKERS)
+    run_date = run_date or datetime.now().strftime("%Y-%m-%d")
+
+    if use_batch:
+        if include_holdings:
+            pipeline.add_stage("fetch_holdings", lambda _: fetch_my_holdings(), priority=100)
+            pipeline.add_stage(
+                "submit_holdings_batch", lambda r: submit_holdings_batch(r["fetch_holdings"], run_date),
+                depends_on=["fetch_holdings"], priority=100)
+        # Never checkpointed: a retry must look for batches that finished since.
+        pipeline.add_stage("email_holdings_batches", lambda _: email_holdings_batches(), checkpoint=False)
+    elif include_holdings:
+        pipeline.add_stage("fetch_holdings", lambda _: fetch_my_holdings(), priority=100)
+        pipeline.add_stage(
+            "holdings_research", lambda r: research_holdings(r["fetch_holdings"]),
+            depends_on=["fetch_holdings"], priority=100,
+            checkpoint=lambda results: all_responses_good([result["response"] for result in results]))
+        pipeline.add_stage(
+            "render_holdings", lambda r: render_holdings_analysis(r["holdings_research"]),
+            depends_on=["holdings_research"])
+        pipeline.add_stage(
+            "email_holdings", lambda r: send_email("My Holdings Analysis", r["render_holdings"]),
+            depends_on=["render_holdings"], run_once=True)
+
+    pipeline.add_stage(
+        "stock_research", lambda _: gather_morning_stock_research(), priority=50, checkpoint=all_responses_good)
+    pipeline.add_stage(
+        "render_stock_research", lambda r: render_morning_stock_research(r["stock_research"]),
+        depends_on=["stock_research"])
+
+    pipeline.add_stage("fetch_trends", lambda _: build_trend_watcher_prompt(fetch_trend_watcher_posts()))
+    pipeline.add_stage(
+        "trend_watcher", lambda r: ask_trend_watcher(r["fetch_trends"]), depends_on=["fetch_trends"],
+        checkpoint=is_good_response)
+    pipeline.add_stage(
+        "render_trend_watcher", lambda r: render_trend_watcher(r["fetch_trends"], r["trend_watcher"]),
+        depends_on=["fetch_trends", "trend_watcher"])
+
+    # Don't think politician trades are very useful, so they are not part of the DAG.
+    # Email stages are run_once: a redelivered run never sends the same report twice.
+    pipeline.add_stage(
+        "email_daily",
+        lambda r: send_email(
+            "My Daily Market Research Briefing + Reddit Trends",
+            ReportBuilder.merge(r["render_stock_research"], r["render_trend_watcher"]),
+        ),
+        depends_on=["render_stock_research", "render_trend_watcher"], run_once=True)
+    return pipeline
+
 
 @functions_framework.cloud_event
 def main(cloud_event: CloudEvent):
+    # Spans, latency histograms and retry counts are collected per run and exported at the
+    # end. Each invocation gets its own tracer: concurrent requests share this process.
+    with use_tracer(Tracer()):
+        run_daily(cloud_event)
+
+
+def run_daily(cloud_event: CloudEvent) -> None:
+    """Runs the daily pipeline for one scheduler event and exports the run's metrics."""
+    # The run is dated by the event, not the clock: a retry delivered after midnight (or
+    # after a Friday) must redo the same run and resume from its checkpoints.
+    scheduled_at = event_time(cloud_event.get("time"))
+    include_holdings = scheduled_at.weekday() == 4
+    if not include_holdings:
+        logging.info("Skipping sheet reader because today is not Friday.")
 
+    # A redelivered event has the same id, so its retry resumes from the stages already done.
+    run_date = scheduled_at.strftime("%Y-%m-%d")
+    run_key = make_run_key(run_date, cloud_event["id"])
     try:
-        # Run stock_report, trend_watcher_report.
-        stock_report_html = run_morning_stock_research()
-        trend_watcher_report = run_trend_watcher()
-
-        # Don't think it's very useful.
-        # politician_trades_report = run_politician_trades()
-
-        # Concatenate all reports and send via email.
-        full_report_html = (stock_report_html 
-                            + trend_watcher_report 
-                            # + politician_trades_report
-                            )
-        send_email("My Daily Market Research Briefing + Reddit Trends", full_report_html)
+        checkpoint = RunCheckpoint(run_key)
+        checkpoint.prune()
     except Exception as e:
-        logging.error(f"An error occurred while running the morning stock & trend watcher: {e}")
+        logging.error(f"Pipeline checkpoints are unavailable, running every stage: {e}")
+        checkpoint = None
 
-    if datetime.now().weekday() == 4:
-        try:
-            # Run sheet_reader_report and do a deep research for each holding, then send email.
-            holdings_analysis_report = run_sheet_reader()
-            send_email("My Holdings Analysis", holdings_analysis_report)
-        except Exception as e:
-            logging.error(f"An error occurred while running the sheet reader: {e}")
-    else:
-        logging.info("Skipping sheet reader because today is not Friday.")
+    run_error = None
+    try:
+        result = build_daily_pipeline(include_holdings, run_date).run(checkpoint=checkpoint)
+        if result.restored:
+            logging.info(f"Resumed pipeline stages from checkpoint: {result.restored}")
+        for stage_name, error in result.errors.items():
+            logging.error(f"An error occurred in pipeline stage {stage_name}: {error}")
+        if not result.ok:
+            run_error = RuntimeError(
+                f"Pipeline stages did not finish: failed {sorted(result.errors)}, skipped {sorted(result.skipped)}")
+    except Exception as e:
+        logging.error(f"An error occurred while running the daily pipeline: {e}")
+        run_error = e
 
+    try:
+        # Each email stage delivers as soon as its report is ready, so the daily briefing
+        # never waits for the Friday deep research. This retries whatever failed to send.
+        flush_outbox()
+    except Exception as e:
+        logging.error(f"An error occurred while flushing the email outbox: {e}")
+
+    llm_cache = get_llm_cache()
+    if llm_cache is not None:
+        logging.info(f"LLM cache stats: {llm_cache.stats()}")
+    logging.info(f"API client and connection stats: {client_stats()}")
+    logging.info(f"Outbound API resilience stats: {resilience_stats()}")
+    logging.info(f"Hedged LLM routing stats: {get_hedged_router().stats()}")
+    job_registry = get_job_registry()
+    if job_registry is not None:
+        logging.info(f"Deep research job registry: {job_registry.stats()}")
+    logging.info(f"Per-stage timings: {get_tracer().summary()}")
+    try:
+        get_tracer().export(f"{run_key}-{datetime.now():%H%M%S}", METRICS_DIR)
+    except Exception as e:
+        logging.error(f"An error occurred while exporting run metrics: {e}")
+    if run_error is not None:
+        # Failing the invocation makes Eventarc redeliver the event; the retry resumes
+        # from this run's checkpoints and skips the emails already sent.
+        raise run_error
     logging.info("Main function execution completed.")
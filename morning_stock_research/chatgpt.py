@@ -1,108 +1,312 @@
 import logging
 import os
-import time
+from concurrent.futures import Future
+from contextlib import nullcontext
 
-from dotenv import load_dotenv
-from openai import OpenAI
-
-
-# Configure the logger
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(filename)s:%(lineno)d - %(message)s",
+from pipeline.batch import DEFAULT_BATCH_TIMEOUT_SECONDS, LocalBatchBackend, read_jsonl, submit_prompt_batch
+from pipeline.clients import get_openai_client
+from pipeline.deep_research_jobs import (
+    DEFAULT_MAX_POLL_SECONDS,
+    DeepResearchJobManager,
+    get_deep_research_manager,
 )
+from pipeline.env import configure_environment
+from pipeline.llm_cache import get_llm_cache, make_cache_key
+from pipeline.resilience import get_resilience, was_rejected
+
 
-# Load environment variables from a .env file
-load_dotenv()
+# Load environment variables from a .env file and configure the logger.
+configure_environment()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 SINGLE_TURN_MODEL = "gpt-5-mini"
 DEEP_RESEARCH_MODEL = "o3-deep-research"
+BATCH_ENDPOINT = "/v1/responses"
+
+
+class OpenAIBatchBackend:
+    """Runs a JSONL file of /v1/responses requests through the OpenAI Batch API."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def submit(self, path: str) -> str:
+        with open(path, "rb") as f:
+            input_file = get_resilience("chatgpt").call(self.client.files.create, file=f, purpose="batch")
+        batch = get_resilience("chatgpt").call(
+            self.client.batches.create,
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+            retry_on=was_rejected,
+        )
+        return batch.id
+
+    def poll(self, batch_id: str) -> tuple:
+        """Returns (finished, output lines), or (True, error message) when the batch did not complete."""
+        batch = self.client.batches.retrieve(batch_id)
+        logging.info(f"OpenAI batch {batch_id} status: {batch.status}")
+        if batch.status in {"failed", "expired", "cancelled"}:
+            return True, f"Error generating ChatGPT batch response: batch {batch.status}: {batch.errors}"
+        if batch.status != "completed":
+            return False, None
+
+        lines = []
+        # Requests that failed individually are written to a separate error file.
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                lines.extend(read_jsonl(self.client.files.content(file_id).text))
+        return True, lines
+
+
+def parse_batch_output(line: dict) -> tuple:
+    """Maps one OpenAI batch output line to (custom_id, text)."""
+    response = line.get("response") or {}
+    if line.get("error") or response.get("status_code") != 200:
+        error = line.get("error") or response.get("body", {}).get("error")
+        return line.get("custom_id"), f"Error generating ChatGPT batch response: {error}"
+    texts = [
+        content.get("text", "")
+        for item in response["body"].get("output", [])
+        if item.get("type") == "message"
+        for content in item.get("content", [])
+        if content.get("type") == "output_text"
+    ]
+    return line.get("custom_id"), "".join(texts)
+
+
+def local_batch_backend(answer, delay_seconds: float = 0.0) -> LocalBatchBackend:
+    """Stand-in for the OpenAI Batch API that answers each prompt with `answer(prompt_text)`."""
+    def respond(line: dict) -> dict:
+        text = answer(line["body"]["input"])
+        return {
+            "custom_id": line["custom_id"],
+            "response": {
+                "status_code": 200,
+                "body": {"output": [{"type": "message", "content": [{"type": "output_text", "text": text}]}]},
+            },
+            "error": None,
+        }
+
+    return LocalBatchBackend(respond, delay_seconds=delay_seconds)
+
 
 class AskChatGPT:
-    def __init__(self, client=None, api_key: str = OPENAI_API_KEY):
-        self.client = client or OpenAI(api_key=api_key)
+    def __init__(self, client=None, api_key: str = OPENAI_API_KEY, cache=None, use_cache: bool = True):
+        self.client = client or get_openai_client(api_key)
+        # Single-turn answers are cached until the next market open; see pipeline.llm_cache.
+        self.cache = (cache or get_llm_cache()) if use_cache else None
 
     def single_turn_query(
         self,
         prompt_text: str,
         model: str = SINGLE_TURN_MODEL,
         tools: list = None,
+        request_slot=None,
     ) -> str:
-        """Send one prompt to ChatGPT and return the text response."""
+        """Send one prompt to ChatGPT and return the text response.
+
+        `request_slot` is an optional zero-argument callable returning a context
+        manager entered around the API request only, not around cache hits.
+        """
         logging.info(f"Sending ChatGPT prompt for: {prompt_text[:50]}...")
 
         if tools is None:
             tools = [{"type": "web_search_preview"}]
 
-        try:
-            response = self.client.responses.create(
-                model=model,
-                tools=tools,
-                input=prompt_text,
-            )
+        def call_chatgpt() -> str:
+            # Rate-limited, and retried on 429/5xx/connection errors before giving up.
+            with request_slot() if request_slot else nullcontext():
+                response = get_resilience("chatgpt").call(
+                    self.client.responses.create,
+                    model=model,
+                    tools=tools,
+                    input=prompt_text,
+                )
             logging.info("...ChatGPT response received.")
             return response.output_text
+
+        try:
+            if self.cache is None:
+                return call_chatgpt()
+            cache_key = make_cache_key("chatgpt", model, tools, None, prompt_text)
+            return self.cache.get_or_call(cache_key, call_chatgpt, provider="chatgpt", model=model)
         except Exception as e:
             logging.error(f"An error occurred while calling ChatGPT: {e}")
             return f"Error generating ChatGPT response for prompt: {prompt_text}"
 
-    def deep_research_query(
+    def submit_deep_research(
         self,
         prompt_text: str,
         model: str = DEEP_RESEARCH_MODEL,
         tools: list = None,
-        background: bool = True,
-        poll_interval_seconds: int = 300,
-        timeout_seconds: int = 900,
     ) -> str:
-        """Send one prompt to OpenAI Deep Research and return the final report."""
+        """Start a background OpenAI Deep Research response and return its id."""
         logging.info(f"Sending ChatGPT deep research prompt for: {prompt_text[:50]}...")
 
         if tools is None:
             tools = [{"type": "web_search_preview"}]
 
+        # Only a rejected request is retried: after a timeout the job may already be running.
+        response = get_resilience("chatgpt").call(
+            self.client.responses.create,
+            model=model,
+            tools=tools,
+            input=prompt_text,
+            background=True,
+            retry_on=was_rejected,
+        )
+        logging.info(f"Deep research response started: {response.id}")
+        return response.id
+
+    def poll_deep_research(self, response_id: str) -> tuple:
+        """Check a background Deep Research response once.
+
+        Returns:
+            tuple: (finished, text). `text` is the report, or an error message when
+                the response failed, was cancelled or is incomplete.
+        """
+        response = self.client.responses.retrieve(response_id)
+        status = getattr(response, "status", None)
+        logging.info(f"Deep research response {response_id} status: {status}")
+
+        if status == "completed":
+            logging.info("...ChatGPT deep research response received.")
+            return True, response.output_text
+
+        if status in {"failed", "cancelled", "incomplete"}:
+            error = getattr(response, "error", None)
+            incomplete_details = getattr(response, "incomplete_details", None)
+            error_message = error or incomplete_details or "Unknown Deep Research error"
+            logging.error(f"Deep research response ended with status {status}: {error_message}")
+            return True, f"Error generating ChatGPT deep research response: {error_message}"
+
+        return False, None
+
+    def deep_research_future(
+        self,
+        prompt_text: str,
+        model: str = DEEP_RESEARCH_MODEL,
+        tools: list = None,
+        poll_interval_seconds: int = DEFAULT_MAX_POLL_SECONDS,
+        timeout_seconds: int = 900,
+        manager: DeepResearchJobManager = None,
+    ) -> Future:
+        """Submit a Deep Research prompt and return a Future for the final report.
+
+        The job is polled by the shared DeepResearchJobManager, so many concurrent
+        reports cost a single polling thread. `poll_interval_seconds` caps the
+        adaptive poll interval.
+        """
+        manager = manager or get_deep_research_manager()
+        return manager.submit(
+            "chatgpt",
+            lambda: self.submit_deep_research(prompt_text, model=model, tools=tools),
+            self.poll_deep_research,
+            timeout_seconds=timeout_seconds,
+            max_poll_seconds=poll_interval_seconds,
+            job_key=make_cache_key("chatgpt-deep-research", model, tools, None, prompt_text),
+        )
+
+    @staticmethod
+    def batch_lines(prompts: list, ids: list, model: str = SINGLE_TURN_MODEL, tools: list = None) -> list:
+        """OpenAI Batch API request lines for `prompts`, with `ids` as their custom_id."""
+        if tools is None:
+            tools = [{"type": "web_search_preview"}]
+        return [
+            {
+                "custom_id": request_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {"model": model, "tools": tools, "input": prompt_text},
+            }
+            for request_id, prompt_text in zip(ids, prompts)
+        ]
+
+    def batch_futures(
+        self,
+        prompts: list,
+        model: str = SINGLE_TURN_MODEL,
+        tools: list = None,
+        backend=None,
+        timeout_seconds: float = DEFAULT_BATCH_TIMEOUT_SECONDS,
+    ) -> list:
+        """Submit many prompts as one OpenAI batch job and return one Future per prompt.
+
+        For prompts that don't need an interactive answer: the batch tier costs
+        less and has its own, higher rate limits. `backend` defaults to the OpenAI
+        Batch API; pass `local_batch_backend(...)` to run without network access.
+        """
+        ids = [f"prompt-{index}" for index in range(len(prompts))]
+        return submit_prompt_batch(
+            "chatgpt",
+            self.batch_lines(prompts, ids, model=model, tools=tools),
+            backend or OpenAIBatchBackend(self.client),
+            parse_batch_output,
+            ids,
+            timeout_seconds=timeout_seconds,
+        )
+
+    def batch_query(
+        self,
+        prompts: list,
+        model: str = SINGLE_TURN_MODEL,
+        tools: list = None,
+        backend=None,
+        timeout_seconds: float = DEFAULT_BATCH_TIMEOUT_SECONDS,
+    ) -> list:
+        """Send many prompts as one OpenAI batch job and wait for all answers, in prompt order."""
         try:
-            response = self.client.responses.create(
-                model=model,
-                tools=tools,
-                input=prompt_text,
-                background=background,
+            futures = self.batch_futures(
+                prompts, model=model, tools=tools, backend=backend, timeout_seconds=timeout_seconds,
             )
+        except Exception as e:
+            logging.error(f"An error occurred while submitting the ChatGPT batch: {e}")
+            return [f"Error generating ChatGPT batch response for prompt: {prompt_text}" for prompt_text in prompts]
 
+        results = []
+        for prompt_text, future in zip(prompts, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logging.error(f"An error occurred while waiting for the ChatGPT batch: {e}")
+                results.append(f"Error generating ChatGPT batch response for prompt: {prompt_text}")
+        return results
+
+    def deep_research_query(
+        self,
+        prompt_text: str,
+        model: str = DEEP_RESEARCH_MODEL,
+        tools: list = None,
+        background: bool = True,
+        poll_interval_seconds: int = DEFAULT_MAX_POLL_SECONDS,
+        timeout_seconds: int = 900,
+    ) -> str:
+        """Send one prompt to OpenAI Deep Research and return the final report."""
+        try:
             if not background:
+                logging.info(f"Sending ChatGPT deep research prompt for: {prompt_text[:50]}...")
+                response = self.client.responses.create(
+                    model=model,
+                    tools=tools if tools is not None else [{"type": "web_search_preview"}],
+                    input=prompt_text,
+                    background=False,
+                )
                 logging.info("...ChatGPT deep research response received.")
                 return response.output_text
 
-            logging.info(f"Deep research response started: {response.id}")
-            started_at = time.time()
-
-            while True:
-                response = self.client.responses.retrieve(response.id)
-                status = getattr(response, "status", None)
-                logging.info(f"Deep research response {response.id} status: {status}")
-
-                if status == "completed":
-                    logging.info("...ChatGPT deep research response received.")
-                    return response.output_text
-
-                if status in {"failed", "cancelled", "incomplete"}:
-                    error = getattr(response, "error", None)
-                    incomplete_details = getattr(response, "incomplete_details", None)
-                    error_message = error or incomplete_details or "Unknown Deep Research error"
-                    logging.error(f"Deep research response ended with status {status}: {error_message}")
-                    return f"Error generating ChatGPT deep research response: {error_message}"
-
-                if time.time() - started_at > timeout_seconds:
-                    logging.error(
-                        f"Deep research response timed out after {timeout_seconds} seconds: {response.id}"
-                    )
-                    return (
-                        "Error generating ChatGPT deep research response: "
-                        f"timed out after {timeout_seconds} seconds."
-                    )
-
-                time.sleep(poll_interval_seconds)
+            return self.deep_research_future(
+                prompt_text,
+                model=model,
+                tools=tools,
+                poll_interval_seconds=poll_interval_seconds,
+                timeout_seconds=timeout_seconds,
+            ).result()
+        except TimeoutError:
+            return (
+                "Error generating ChatGPT deep research response: "
+                f"timed out after {timeout_seconds} seconds."
+            )
         except Exception as e:
             logging.error(f"An error occurred while calling ChatGPT Deep Research: {e}")
             return f"Error generating ChatGPT deep research response for prompt: {prompt_text}"
@@ -1,26 +1,34 @@
 import logging
 import os
-import smtplib
+import threading
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
-from dotenv import load_dotenv
+from morning_stock_research.outbox import EmailOutbox
+from pipeline.env import configure_environment
+from pipeline.report import ReportBuilder
+from pipeline.tracing import span
 
 
-load_dotenv()
+configure_environment()
 
 SENDER_EMAIL = os.getenv("SENDER_EMAIL")
 SENDER_APP_PASSWORD = os.getenv("SENDER_APP_PASSWORD")
 RECIPIENT_EMAIL = os.getenv("RECIPIENT_EMAIL")
 
+_outbox = None
+_outbox_lock = threading.Lock()
 
-def send_email(subject: str, body: str) -> None:
+
+def send_email(subject: str, body, deliver: bool = True) -> None:
     """
     Sends an email using Gmail's SMTP server.
 
     Args:
         subject (str): The subject of the email.
-        body (str): The HTML body of the email.
+        body (str | ReportBuilder): The HTML body of the email, or a report to render into it.
+        deliver (bool): Deliver right away. Pass False to only spool the message and
+            send everything with one `flush_outbox()` call (one SMTP session) later.
     """
     if not all([SENDER_EMAIL, SENDER_APP_PASSWORD, RECIPIENT_EMAIL]):
         logging.info("Email credentials are not fully configured in the .env file. Skipping email.")
@@ -33,30 +41,41 @@ def send_email(subject: str, body: str) -> None:
     msg["To"] = RECIPIENT_EMAIL
     msg["Subject"] = subject
 
-    html_body = f"""
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            h1 {{ color: #1a73e8; }}
-            h2 {{ color: #4CAF50; border-bottom: 2px solid #f0f0f0; padding-bottom: 5px;}}
-            p {{ margin-bottom: 15px; }}
-            pre {{ background-color: #f5f5f5; padding: 15px; border-radius: 8px; white-space: pre-wrap; word-wrap: break-word; }}
-        </style>
-    </head>
-    <body>
-        {body}
-    </body>
-    </html>
-    """
+    # The report chunks are joined once, directly into the email document.
+    report = body if isinstance(body, ReportBuilder) else ReportBuilder().html(body)
+    html_body = report.render_email()
     msg.attach(MIMEText(html_body, "html"))
 
-    try:
-        server = smtplib.SMTP("smtp.gmail.com", 587)
-        server.starttls()
-        server.login(SENDER_EMAIL, SENDER_APP_PASSWORD)
-        server.sendmail(SENDER_EMAIL, RECIPIENT_EMAIL, msg.as_string())
-        server.quit()
-        logging.info("Email sent successfully!")
-    except Exception as e:
-        logging.error(f"Failed to send email: {e}")
+    # Spool first, so a failed send keeps the report on disk for the next flush
+    # instead of requiring all the LLM work to be redone.
+    with span("send_email") as email_span:
+        email_span.record_size("out", html_body)
+        get_outbox().enqueue(msg)
+    if deliver:
+        flush_outbox()
+
+
+def get_outbox() -> EmailOutbox:
+    """Returns the process-wide Gmail outbox."""
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = EmailOutbox(
+                host="smtp.gmail.com",
+                port=587,
+                username=SENDER_EMAIL,
+                password=SENDER_APP_PASSWORD,
+            )
+        return _outbox
+
+
+def flush_outbox() -> int:
+    """Delivers every spooled message, including those left by earlier runs, over one SMTP session."""
+    if not all([SENDER_EMAIL, SENDER_APP_PASSWORD, RECIPIENT_EMAIL]):
+        return 0
+    outbox = get_outbox()
+    if not outbox.pending():
+        return 0
+    logging.info(f"Delivering {len(outbox.pending())} email(s) from the outbox...")
+    with span("flush_outbox"):
+        return outbox.flush()
@@ -1,38 +1,65 @@
 import logging
 import os
-import time
-from google import genai
-from google.genai import types
-from dotenv import load_dotenv
+from concurrent.futures import Future
+from contextlib import nullcontext
 
+from pipeline.batch import DEFAULT_BATCH_TIMEOUT_SECONDS, LocalBatchBackend, read_jsonl, submit_prompt_batch
+from pipeline.clients import get_gemini_client
+from pipeline.deep_research_jobs import (
+    DEFAULT_MAX_POLL_SECONDS,
+    DeepResearchJobManager,
+    get_deep_research_manager,
+)
+from pipeline.env import configure_environment
+from pipeline.llm_cache import get_llm_cache, make_cache_key
+from pipeline.resilience import get_resilience, was_rejected
 
-# Configure the logger
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(filename)s:%(lineno)d - %(message)s')
 
-# Load environment variables from a .env file
-load_dotenv()
+# Load environment variables from a .env file and configure the logger.
+# The google-genai SDK is imported on first use to keep it off the cold-start path.
+configure_environment()
 
 # --- Configuration ---
 # From my corp account, intercom-connector-prod project.
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+DEFAULT_MODEL = "gemini-3-pro-preview"  # Latest pro preview model as of Nov 2025.
 
 
-def send_prompts_to_gemini(client, model_to_use, config, prompt_text, url_grounding = False) -> str:
+def build_metaprompt(prompt_text: str) -> str:
+    """Wraps the request in the metaprompt that instructs the model on how to behave."""
+    return (
+        "Respond in markdown format and include source links and dates. "
+        "Structure your response clearly. Where possible, outline your reasoning step-by-step. Avoid speculative language and focus on publicly known information and logical inferences.\n\n"
+        f"Request: {prompt_text}"
+    )
+
+
+def send_prompts_to_gemini(client, model_to_use, config, prompt_text, url_grounding = False, use_cache = True,
+                           request_slot = None) -> str:
     """
     Sends a single prompt to the Gemini API using a model configured for deep research.
 
     Args:
         prompt_text (str): The detailed prompt to send.
+        use_cache (bool): Reuse a cached answer for the same model, config and prompt
+            until the next market open.
+        request_slot: Optional zero-argument callable returning a context manager entered
+            around the API request only, not around cache hits (e.g. a concurrency slot).
 
     Returns:
         str: The text response from Gemini.
     """
     logging.info(f"Sending prompt for: {prompt_text[:50]}...")
     if not client:
-        client = genai.Client(api_key=GEMINI_API_KEY)
+        client = get_gemini_client(GEMINI_API_KEY)
     if not model_to_use:
-        model_to_use = "gemini-3-pro-preview"  # Latest pro preview model as of Nov 2025.
+        model_to_use = DEFAULT_MODEL
+    # A caller-supplied config is keyed by its repr, otherwise by the grounding mode.
+    cache_tools = repr(config) if config else None
+    grounding_mode = "url_context" if url_grounding else "google_search"
     if not config:
+        from google.genai import types
+
         # If url is in prompts, use grounding_tool, else use google search tool.
         if url_grounding:
             grounding_tool = {"url_context": {}}
@@ -42,59 +69,182 @@ def send_prompts_to_gemini(client, model_to_use, config, prompt_text, url_ground
             tools=[grounding_tool]
         )
     try:
-        # The metaprompt instructs the model on how to behave.
-        metaprompt = (
-            "Respond in markdown format and include source links and dates. "
-            "Structure your response clearly. Where possible, outline your reasoning step-by-step. Avoid speculative language and focus on publicly known information and logical inferences.\n\n"
-            f"Request: {prompt_text}"
-        )
+        metaprompt = build_metaprompt(prompt_text)
         
-        response = client.models.generate_content(
-            model = model_to_use,
-            contents = metaprompt,
-            config=config)
-        logging.info("...Response received.")
-        return response.text
+        def call_gemini() -> str:
+            # Rate-limited, and retried on 429/5xx/connection errors before giving up.
+            with request_slot() if request_slot else nullcontext():
+                response = get_resilience("gemini").call(
+                    client.models.generate_content,
+                    model = model_to_use,
+                    contents = metaprompt,
+                    config=config)
+            logging.info("...Response received.")
+            return response.text
+
+        cache = get_llm_cache() if use_cache else None
+        if cache is None:
+            return call_gemini()
+        cache_key = make_cache_key("gemini", model_to_use, cache_tools, grounding_mode, metaprompt)
+        return cache.get_or_call(cache_key, call_gemini, provider="gemini", model=model_to_use)
     except Exception as e:
         logging.error(f"An error occurred while calling the Gemini API: {e}")
         return f"Error generating response for prompt: {prompt_text}"
 
 
-def send_prompts_to_gemini_deep_research_agent(
+class GeminiBatchBackend:
+    """Runs a JSONL file of generateContent requests through the Gemini Batch API."""
+
+    def __init__(self, client, model: str = DEFAULT_MODEL):
+        self.client = client
+        self.model = model
+
+    def submit(self, path: str) -> str:
+        from google.genai import types
+
+        uploaded = get_resilience("gemini").call(
+            self.client.files.upload,
+            file=path,
+            config=types.UploadFileConfig(display_name=os.path.basename(path), mime_type="jsonl"),
+        )
+        job = get_resilience("gemini").call(
+            self.client.batches.create,
+            model=self.model,
+            src=uploaded.name,
+            config={"display_name": os.path.basename(path)},
+            retry_on=was_rejected,
+        )
+        return job.name
+
+    def poll(self, job_name: str) -> tuple:
+        """Returns (finished, output lines), or (True, error message) when the job did not succeed."""
+        job = self.client.batches.get(name=job_name)
+        state = getattr(job.state, "name", job.state)
+        logging.info(f"Gemini batch {job_name} state: {state}")
+        if state in {"JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"}:
+            return True, f"Error generating Gemini batch response: batch {state}: {getattr(job, 'error', None)}"
+        if state != "JOB_STATE_SUCCEEDED":
+            return False, None
+        content = self.client.files.download(file=job.dest.file_name)
+        return True, read_jsonl(content.decode("utf-8"))
+
+
+def parse_gemini_batch_output(line: dict) -> tuple:
+    """Maps one Gemini batch output line to (key, text)."""
+    if line.get("error") or not line.get("response"):
+        return line.get("key"), f"Error generating Gemini batch response: {line.get('error')}"
+    texts = [
+        part.get("text", "")
+        for candidate in line["response"].get("candidates", [])[:1]
+        for part in candidate.get("content", {}).get("parts", [])
+    ]
+    return line.get("key"), "".join(texts)
+
+
+def local_gemini_batch_backend(answer, delay_seconds: float = 0.0) -> LocalBatchBackend:
+    """Stand-in for the Gemini Batch API that answers each metaprompt with `answer(metaprompt)`."""
+    def respond(line: dict) -> dict:
+        text = answer(line["request"]["contents"][0]["parts"][0]["text"])
+        return {"key": line["key"], "response": {"candidates": [{"content": {"parts": [{"text": text}]}}]}}
+
+    return LocalBatchBackend(respond, delay_seconds=delay_seconds)
+
+
+def build_gemini_batch_lines(prompts: list, ids: list, url_grounding: bool = False) -> list:
+    """Gemini Batch API request lines for `prompts`, with `ids` as their key."""
+    grounding_tool = {"url_context": {}} if url_grounding else {"google_search": {}}
+    return [
+        {
+            "key": key,
+            "request": {
+                "contents": [{"role": "user", "parts": [{"text": build_metaprompt(prompt_text)}]}],
+                "tools": [grounding_tool],
+            },
+        }
+        for key, prompt_text in zip(ids, prompts)
+    ]
+
+
+def gemini_batch_futures(
+    prompts: list,
+    client=None,
+    model_to_use: str = None,
+    url_grounding: bool = False,
+    backend=None,
+    timeout_seconds: float = DEFAULT_BATCH_TIMEOUT_SECONDS,
+) -> list:
+    """
+    Submits many prompts as one Gemini batch job and returns one Future per prompt.
+
+    For prompts that don't need an interactive answer: the batch tier costs less
+    and has its own, higher rate limits. `backend` defaults to the Gemini Batch
+    API; pass `local_gemini_batch_backend(...)` to run without network access.
+    """
+    model_to_use = model_to_use or DEFAULT_MODEL
+    ids = [f"prompt-{index}" for index in range(len(prompts))]
+    lines = build_gemini_batch_lines(prompts, ids, url_grounding=url_grounding)
+    if backend is None:
+        backend = GeminiBatchBackend(client or get_gemini_client(GEMINI_API_KEY), model=model_to_use)
+    return submit_prompt_batch(
+        "gemini", lines, backend, parse_gemini_batch_output, ids, timeout_seconds=timeout_seconds,
+    )
+
+
+def send_prompts_to_gemini_batch(
+    prompts: list,
+    client=None,
+    model_to_use: str = None,
+    url_grounding: bool = False,
+    backend=None,
+    timeout_seconds: float = DEFAULT_BATCH_TIMEOUT_SECONDS,
+) -> list:
+    """
+    Sends many prompts as one Gemini batch job and waits for all answers.
+
+    Returns:
+        list: One text response per prompt, in prompt order. A failed prompt gets
+            an error message instead.
+    """
+    try:
+        futures = gemini_batch_futures(
+            prompts,
+            client=client,
+            model_to_use=model_to_use,
+            url_grounding=url_grounding,
+            backend=backend,
+            timeout_seconds=timeout_seconds,
+        )
+    except Exception as e:
+        logging.error(f"An error occurred while submitting the Gemini batch: {e}")
+        return [f"Error generating batch response for prompt: {prompt_text}" for prompt_text in prompts]
+
+    results = []
+    for prompt_text, future in zip(prompts, futures):
+        try:
+            results.append(future.result())
+        except Exception as e:
+            logging.error(f"An error occurred while waiting for the Gemini batch: {e}")
+            results.append(f"Error generating batch response for prompt: {prompt_text}")
+    return results
+
+
+def submit_gemini_deep_research(
     prompt_text: str,
     client=None,
     agent_name: str = None,
     agent_config: dict = None,
     tools: list = None,
     previous_interaction_id: str = None,
-    poll_interval_seconds: int = 50,
-    timeout_seconds: int = 900,
 ) -> str:
     """
-    Sends a prompt to Gemini's Deep Research agent and waits for the final report.
+    Starts a background Gemini Deep Research interaction and returns its id.
 
-    This function follows the Gemini Deep Research guide and intentionally does
-    not use collaborative planning. If the caller passes
-    `collaborative_planning` inside `agent_config`, it will be removed.
-
-    Args:
-        prompt_text (str): The research request to send to the Deep Research agent.
-        client: Optional preconfigured `genai.Client`.
-        agent_name (str): Optional Deep Research agent name. Defaults to the current
-            preview agent.
-        agent_config (dict): Optional Deep Research agent config.
-        tools (list): Optional list of tool definitions for the interaction.
-        previous_interaction_id (str): Optional interaction id for follow-up turns.
-        poll_interval_seconds (int): Poll interval while waiting for completion.
-        timeout_seconds (int): Max time to wait before failing.
-
-    Returns:
-        str: The final text output from the Deep Research agent.
+    Collaborative planning is never used; it is removed from `agent_config`.
     """
     logging.info(f"Sending deep research prompt for: {prompt_text[:50]}...")
 
     if not client:
-        client = genai.Client(api_key=GEMINI_API_KEY)
+        client = get_gemini_client(GEMINI_API_KEY)
 
     if not agent_name:
         agent_name = "deep-research-preview-04-2026"
@@ -117,55 +267,148 @@ def send_prompts_to_gemini_deep_research_agent(
     if previous_interaction_id:
         interaction_kwargs["previous_interaction_id"] = previous_interaction_id
 
+    # Only a rejected request is retried: after a timeout the interaction may already be running.
+    interaction = get_resilience("gemini").call(
+        client.interactions.create, retry_on=was_rejected, **interaction_kwargs)
+    logging.info(f"Deep research interaction started: {interaction.id}")
+    return interaction.id
+
+
+def poll_gemini_deep_research(interaction_id: str, client=None) -> tuple:
+    """
+    Checks a background Gemini Deep Research interaction once.
+
+    Returns:
+        tuple: (finished, text). `text` is the final report, or an error message
+            when the interaction failed.
+    """
+    if not client:
+        client = get_gemini_client(GEMINI_API_KEY)
+
+    interaction = client.interactions.get(interaction_id)
+    status = getattr(interaction, "status", None)
+    logging.info(f"Deep research interaction {interaction_id} status: {status}")
+
+    if status == "completed":
+        outputs = getattr(interaction, "outputs", None) or []
+        if outputs and getattr(outputs[-1], "text", None):
+            logging.info("...Deep research response received.")
+            return True, outputs[-1].text
+
+        text_outputs = [
+            output.text
+            for output in outputs
+            if getattr(output, "type", None) == "text" and getattr(output, "text", None)
+        ]
+        if text_outputs:
+            logging.info("...Deep research response received from text outputs.")
+            return True, "\n\n".join(text_outputs)
+
+        logging.warning("Deep research interaction completed with no text output.")
+        return True, "Deep research completed, but no text output was returned."
+
+    if status == "failed":
+        error_message = getattr(interaction, "error", "Unknown Deep Research error")
+        logging.error(f"Deep research interaction failed: {error_message}")
+        return True, f"Error generating deep research response: {error_message}"
+
+    return False, None
+
+
+def gemini_deep_research_future(
+    prompt_text: str,
+    client=None,
+    agent_name: str = None,
+    agent_config: dict = None,
+    tools: list = None,
+    previous_interaction_id: str = None,
+    poll_interval_seconds: int = DEFAULT_MAX_POLL_SECONDS,
+    timeout_seconds: int = 900,
+    manager: DeepResearchJobManager = None,
+) -> Future:
+    """
+    Submits a Gemini Deep Research prompt and returns a Future for the final report.
+
+    The interaction is polled by the shared DeepResearchJobManager with adaptive
+    backoff capped at `poll_interval_seconds`.
+    """
+    manager = manager or get_deep_research_manager()
+    return manager.submit(
+        "gemini",
+        lambda: submit_gemini_deep_research(
+            prompt_text,
+            client=client,
+            agent_name=agent_name,
+            agent_config=agent_config,
+            tools=tools,
+            previous_interaction_id=previous_interaction_id,
+        ),
+        lambda interaction_id: poll_gemini_deep_research(interaction_id, client=client),
+        timeout_seconds=timeout_seconds,
+        max_poll_seconds=poll_interval_seconds,
+        job_key=make_cache_key(
+            "gemini-deep-research",
+            agent_name,
+            [agent_config, tools, previous_interaction_id],
+            None,
+            prompt_text,
+        ),
+    )
+
+
+def send_prompts_to_gemini_deep_research_agent(
+    prompt_text: str,
+    client=None,
+    agent_name: str = None,
+    agent_config: dict = None,
+    tools: list = None,
+    previous_interaction_id: str = None,
+    poll_interval_seconds: int = DEFAULT_MAX_POLL_SECONDS,
+    timeout_seconds: int = 900,
+) -> str:
+    """
+    Sends a prompt to Gemini's Deep Research agent and waits for the final report.
+
+    This function follows the Gemini Deep Research guide and intentionally does
+    not use collaborative planning. If the caller passes
+    `collaborative_planning` inside `agent_config`, it will be removed.
+
+    Args:
+        prompt_text (str): The research request to send to the Deep Research agent.
+        client: Optional preconfigured `genai.Client`.
+        agent_name (str): Optional Deep Research agent name. Defaults to the current
+            preview agent.
+        agent_config (dict): Optional Deep Research agent config.
+        tools (list): Optional list of tool definitions for the interaction.
+        previous_interaction_id (str): Optional interaction id for follow-up turns.
+        poll_interval_seconds (int): Upper bound of the adaptive poll interval.
+        timeout_seconds (int): Max time to wait before failing.
+
+    Returns:
+        str: The final text output from the Deep Research agent.
+    """
     try:
-        interaction = client.interactions.create(**interaction_kwargs)
-        logging.info(f"Deep research interaction started: {interaction.id}")
-
-        started_at = time.time()
-        while True:
-            interaction = client.interactions.get(interaction.id)
-            status = getattr(interaction, "status", None)
-            logging.info(f"Deep research interaction {interaction.id} status: {status}")
-
-            if status == "completed":
-                outputs = getattr(interaction, "outputs", None) or []
-                if outputs and getattr(outputs[-1], "text", None):
-                    logging.info("...Deep research response received.")
-                    return outputs[-1].text
-
-                text_outputs = [
-                    output.text
-                    for output in outputs
-                    if getattr(output, "type", None) == "text" and getattr(output, "text", None)
-                ]
-                if text_outputs:
-                    logging.info("...Deep research response received from text outputs.")
-                    return "\n\n".join(text_outputs)
-
-                logging.warning("Deep research interaction completed with no text output.")
-                return "Deep research completed, but no text output was returned."
-
-            if status == "failed":
-                error_message = getattr(interaction, "error", "Unknown Deep Research error")
-                logging.error(f"Deep research interaction failed: {error_message}")
-                return f"Error generating deep research response: {error_message}"
-
-            if time.time() - started_at > timeout_seconds:
-                logging.error(
-                    f"Deep research interaction timed out after {timeout_seconds} seconds: {interaction.id}"
-                )
-                return (
-                    "Error generating deep research response: "
-                    f"timed out after {timeout_seconds} seconds."
-                )
-
-            time.sleep(poll_interval_seconds)
+        return gemini_deep_research_future(
+            prompt_text,
+            client=client,
+            agent_name=agent_name,
+            agent_config=agent_config,
+            tools=tools,
+            previous_interaction_id=previous_interaction_id,
+            poll_interval_seconds=poll_interval_seconds,
+            timeout_seconds=timeout_seconds,
+        ).result()
+    except TimeoutError:
+        return (
+            "Error generating deep research response: "
+            f"timed out after {timeout_seconds} seconds."
+        )
     except Exception as e:
         logging.error(f"An error occurred while calling the Gemini Deep Research agent: {e}")
         return f"Error generating deep research response for prompt: {prompt_text}"
 
 if __name__ == "__main__":
-    client = genai.Client(api_key=GEMINI_API_KEY)
+    client = get_gemini_client(GEMINI_API_KEY)
     prompt_text = (
         "From the perspective of a financial analyst, "
         "go through the following stock tickers and tell me if there are any recent news, trends, or social media discussions that could impact their stock price"
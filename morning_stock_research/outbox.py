@@ -0,0 +1,165 @@
+import logging
+import os
+import random
+import smtplib
+import socket
+import time
+import uuid
+from email import message_from_binary_file
+from email.message import Message
+from threading import Lock
+
+from pipeline.state import PIPELINE_STATE_DIR
+
+
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_BASE_DELAY_SECONDS = 2.0
+DEFAULT_TIMEOUT_SECONDS = 30
+
+
+def _is_transient(error: Exception) -> bool:
+    """
+    Dropped connections, timeouts and 4xx replies are worth retrying. 5xx replies
+    and other SMTP errors (e.g. SMTPNotSupportedError) are permanent, even though
+    SMTPException derives from OSError.
+    """
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    return isinstance(error, (ConnectionError, TimeoutError, socket.gaierror))
+
+
+class EmailOutbox:
+    """
+    Disk-spooled outbox delivering rendered messages over one authenticated SMTP session.
+
+    Messages are written to the spool before any network I/O, so a failed send
+    leaves the rendered report on disk for the next `flush()` instead of losing it.
+    """
+
+    def __init__(
+        self,
+        host: str = "smtp.gmail.com",
+        port: int = 587,
+        username: str = None,
+        password: str = None,
+        use_starttls: bool = True,
+        spool_dir: str = None,
+        smtp_factory=smtplib.SMTP,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        base_delay_seconds: float = DEFAULT_BASE_DELAY_SECONDS,
+        timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
+    ):
+        """
+        Args:
+            host (str): SMTP server. Point it at a local stand-in server for testing.
+            port (int): SMTP port.
+            username (str): Login user; login is skipped when empty.
+            password (str): Login password.
+            use_starttls (bool): Upgrade the session with STARTTLS before login.
+            spool_dir (str): Directory holding pending messages. Defaults to the pipeline state dir.
+            smtp_factory: Callable(host, port, timeout=...) returning an `smtplib.SMTP`-like session.
+            max_attempts (int): Delivery attempts per flush before giving up.
+            base_delay_seconds (float): First retry delay; doubles each attempt, with jitter.
+            timeout_seconds (float): Socket timeout for connecting and every SMTP command,
+                so a stuck server fails the attempt instead of hanging the invocation.
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_starttls = use_starttls
+        self.spool_dir = spool_dir or os.path.join(PIPELINE_STATE_DIR, "outbox", "pending")
+        self.failed_dir = os.path.join(self.spool_dir, "failed")
+        os.makedirs(self.failed_dir, exist_ok=True)
+        self.smtp_factory = smtp_factory
+        self.max_attempts = max_attempts
+        self.base_delay_seconds = base_delay_seconds
+        self.timeout_seconds = timeout_seconds
+        self._lock = Lock()
+
+    def enqueue(self, msg: Message) -> str:
+        """Spools one message and returns its path. The write is atomic."""
+        name = f"{time.time():.6f}-{uuid.uuid4().hex}.eml"
+        path = os.path.join(self.spool_dir, name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(msg.as_bytes())
+        os.replace(tmp_path, path)
+        logging.info(f"Spooled email '{msg['Subject']}' to {path}")
+        return path
+
+    def pending(self) -> list:
+        """Paths of spooled messages, oldest first."""
+        return sorted(
+            os.path.join(self.spool_dir, name)
+            for name in os.listdir(self.spool_dir)
+            if name.endswith(".eml")
+        )
+
+    def _connect(self):
+        server = self.smtp_factory(self.host, self.port, timeout=self.timeout_seconds)
+        if self.use_starttls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        return server
+
+    def _deliver_pending(self, delivered: list) -> None:
+        """Sends every spooled message over a single session, appending sent paths to `delivered`."""
+        paths = self.pending()
+        if not paths:
+            return
+
+        server = self._connect()
+        try:
+            for path in paths:
+                with open(path, "rb") as f:
+                    msg = message_from_binary_file(f)
+                recipients = [addr.strip() for addr in (msg["To"] or "").split(",") if addr.strip()]
+                try:
+                    server.sendmail(msg["From"], recipients, msg.as_bytes())
+                except Exception as e:
+                    if _is_transient(e):
+                        raise
+                    logging.error(f"Email '{msg['Subject']}' was rejected permanently, moving to failed/: {e}")
+                    os.replace(path, os.path.join(self.failed_dir, os.path.basename(path)))
+                    continue
+                os.remove(path)
+                delivered.append(path)
+                logging.info(f"Email '{msg['Subject']}' sent successfully!")
+        finally:
+            try:
+                server.quit()
+            except Exception:
+                pass
+
+    def flush(self) -> int:
+        """
+        Delivers all spooled messages, retrying transient failures with jittered backoff.
+
+        Returns:
+            int: Number of messages delivered. Undelivered messages stay spooled.
+        """
+        with self._lock:
+            delivered = []
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    self._deliver_pending(delivered)
+                    return len(delivered)
+                except Exception as e:
+                    if not _is_transient(e) or attempt == self.max_attempts:
+                        logging.error(
+                            f"Failed to send email (attempt {attempt}/{self.max_attempts}), "
+                            f"{len(self.pending())} message(s) left in {self.spool_dir}: {e}"
+                        )
+                        return len(delivered)
+                    delay = self.base_delay_seconds * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+                    logging.warning(f"Transient email error, retrying in {delay:.1f}s: {e}")
+                    time.sleep(delay)
+            return len(delivered)
@@ -0,0 +1,221 @@
+# Offline batch jobs: many prompts written to one JSONL file, submitted once, results mapped back per prompt.
+import hashlib
+import itertools
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from pipeline.deep_research_jobs import DeepResearchJobManager
+from pipeline.job_registry import COMPLETED, DELIVERED, FAILED, PENDING
+from pipeline.state import state_path
+
+
+# Provider batch tiers promise results within 24 hours; most finish well before that.
+DEFAULT_BATCH_TIMEOUT_SECONDS = 24 * 60 * 60
+BATCH_MIN_POLL_SECONDS = 30
+BATCH_MAX_POLL_SECONDS = 300
+# How long a durable batch stays in the job registry: long enough for the
+# following runs to collect it, even over a weekend of failed runs.
+DURABLE_BATCH_RETENTION_SECONDS = 7 * 24 * 60 * 60
+
+
+def write_batch_file(provider: str, lines: list) -> str:
+    """Writes request dicts as JSONL under the state dir and returns the path."""
+    body = "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines)
+    digest = hashlib.sha256(body.encode("utf-8")).hexdigest()[:12]
+    path = state_path("batches", f"{provider}-{int(time.time())}-{digest}.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(body)
+    return path
+
+
+def read_jsonl(text: str) -> list:
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class LocalBatchBackend:
+    """
+    In-process stand-in for a provider batch endpoint, for tests and dry runs.
+
+    `submit` reads the JSONL file and answers every line with `respond(line)` on a
+    background thread; `poll` reports the output lines once all are answered.
+    """
+
+    def __init__(self, respond, delay_seconds: float = 0.0):
+        """
+        Args:
+            respond: Callable taking one request line (dict) and returning its output line (dict),
+                in the format the real provider would write.
+            delay_seconds (float): Simulated queueing time before the job runs.
+        """
+        self.respond = respond
+        self.delay_seconds = delay_seconds
+        self.submitted = []
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, path: str) -> str:
+        with open(path, encoding="utf-8") as f:
+            lines = read_jsonl(f.read())
+        with self._lock:
+            job_id = f"local-batch-{next(self._ids)}"
+            self._jobs[job_id] = None
+            self.submitted.append((job_id, lines))
+        threading.Thread(target=self._run, args=(job_id, lines), daemon=True).start()
+        return job_id
+
+    def _run(self, job_id: str, lines: list) -> None:
+        time.sleep(self.delay_seconds)
+        try:
+            output = [self.respond(line) for line in lines]
+        except Exception as e:
+            output = f"Error generating batch response: {e}"
+        with self._lock:
+            self._jobs[job_id] = output
+
+    def poll(self, job_id: str) -> tuple:
+        with self._lock:
+            output = self._jobs[job_id]
+        return output is not None, output
+
+
+def submit_prompt_batch(provider: str, lines: list, backend, parse_output, ids: list,
+                        timeout_seconds: float = DEFAULT_BATCH_TIMEOUT_SECONDS,
+                        manager: DeepResearchJobManager = None) -> list:
+    """
+    Submits request `lines` as one batch job and returns one Future per line.
+
+    Args:
+        provider (str): Label used in logs and the batch file name.
+        lines (list): Provider-format request dicts, one per prompt.
+        backend: Object with `submit(path) -> job_id` and `poll(job_id) -> (finished, output)`,
+            where `output` is the list of output line dicts, or an error message for a failed job.
+        parse_output: Callable mapping one output line to (request id, text).
+        ids (list): The request id of each line, in order.
+        timeout_seconds (float): The futures fail with TimeoutError after this long.
+        manager (DeepResearchJobManager): Poller for the job; defaults to the shared batch poller.
+
+    Returns:
+        list: Futures in the order of `lines`, each resolving to that prompt's text, or an
+            error message when the job or that one request failed.
+    """
+    futures = [Future() for _ in lines]
+    if not lines:
+        return futures
+    for future in futures:
+        future.set_running_or_notify_cancel()
+
+    path = write_batch_file(provider, lines)
+    logging.info(f"Submitting {len(lines)} prompts to the {provider} batch endpoint: {path}")
+    job = (manager or get_batch_manager()).submit(
+        provider, lambda: backend.submit(path), backend.poll, timeout_seconds=timeout_seconds,
+    )
+    index_by_id = {request_id: index for index, request_id in enumerate(ids)}
+
+    def distribute(job_future: Future) -> None:
+        try:
+            output = job_future.result()
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        if isinstance(output, str):
+            for future in futures:
+                future.set_result(output)
+            return
+        for line in output:
+            request_id, text = parse_output(line)
+            index = index_by_id.get(request_id)
+            if index is not None and not futures[index].done():
+                futures[index].set_result(text)
+        for index, future in enumerate(futures):
+            if not future.done():
+                future.set_result(f"Error generating batch response: no result for request {ids[index]}.")
+
+    job.add_done_callback(distribute)
+    return futures
+
+
+def submit_durable_batch(registry, job_key: str, provider: str, lines: list, backend,
+                         retention_seconds: float = DURABLE_BATCH_RETENTION_SECONDS) -> str:
+    """
+    Submits request `lines` as one batch job recorded in `registry` under `job_key`, without waiting.
+
+    A retried run with the same key finds the job already recorded and does not
+    submit it again. Collect the answers on a later run with `collect_durable_batches`.
+
+    Args:
+        registry (JobRegistry): Where the batch id is stored.
+        job_key (str): Stable key of this batch, e.g. its purpose and run date.
+        provider (str): Label used in logs, the batch file name and the registry.
+        lines (list): Provider-format request dicts, one per prompt.
+        backend: Object with `submit(path) -> job_id`, as for `submit_prompt_batch`.
+        retention_seconds (float): How long the job stays collectable.
+
+    Returns:
+        str: The provider's batch id.
+    """
+    existing = registry.lookup(job_key, statuses=(PENDING, COMPLETED, DELIVERED))
+    if existing is not None:
+        logging.info(f"Batch {job_key} was already submitted as {existing['job_id']} ({existing['status']}).")
+        return existing["job_id"]
+    path = write_batch_file(provider, lines)
+    logging.info(f"Submitting {len(lines)} prompts to the {provider} batch endpoint as {job_key}: {path}")
+    job_id = backend.submit(path)
+    registry.record_submitted(job_key, provider, job_id, retention_seconds)
+    return job_id
+
+
+def collect_durable_batches(registry, key_prefix: str, backend_for) -> list:
+    """
+    Polls each pending batch under `key_prefix` once and returns the finished, undelivered ones.
+
+    A batch that is still running stays pending for the next run. The caller marks
+    a batch it has reported with `registry.record_finished(job_key, DELIVERED)`.
+
+    Args:
+        registry (JobRegistry): Where `submit_durable_batch` stored the batches.
+        key_prefix (str): Job key prefix of the batches to collect.
+        backend_for: Callable mapping a provider to (backend, parse_output), as for `submit_prompt_batch`.
+
+    Returns:
+        list: (job_key, {request id: text}) for every completed batch, oldest first.
+    """
+    for job in registry.find(key_prefix, statuses=(PENDING,)):
+        try:
+            backend, parse_output = backend_for(job["provider"])
+            finished, output = backend.poll(job["job_id"])
+        except Exception as e:
+            logging.warning(f"Could not poll batch {job['prompt_hash']}, trying again next run: {e}")
+            continue
+        if not finished:
+            continue
+        if isinstance(output, str):
+            logging.error(f"Batch {job['prompt_hash']} failed: {output}")
+            registry.record_finished(job["prompt_hash"], FAILED, output)
+            continue
+        texts = dict(parse_output(line) for line in output)
+        registry.record_finished(job["prompt_hash"], COMPLETED, json.dumps(texts))
+
+    return [
+        (job["prompt_hash"], json.loads(job["result"]))
+        for job in registry.find(key_prefix, statuses=(COMPLETED,))
+    ]
+
+
+_batch_manager = None
+_batch_manager_lock = threading.Lock()
+
+
+def get_batch_manager() -> DeepResearchJobManager:
+    """Returns the process-wide batch poller; batches run for minutes to hours, so it polls slowly."""
+    global _batch_manager
+    with _batch_manager_lock:
+        if _batch_manager is None:
+            _batch_manager = DeepResearchJobManager(
+                min_poll_seconds=BATCH_MIN_POLL_SECONDS, max_poll_seconds=BATCH_MAX_POLL_SECONDS,
+            )
+        return _batch_manager
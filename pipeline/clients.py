@@ -0,0 +1,225 @@
+# Process-wide registry of API clients, so warm Cloud Run instances reuse pooled connections.
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+
+
+# Bounds of the attribute walk that finds an SDK client's HTTP session.
+_MAX_SESSION_SEARCH_DEPTH = 6
+_MAX_SESSION_SEARCH_OBJECTS = 500
+
+
+class ClientRegistry:
+    """Builds each API client once per credential set and hands out the same instance afterwards.
+
+    The SDK clients keep their own HTTP session (httpx, requests or httplib2), so
+    reusing the client object keeps its keep-alive connections and skips the TLS
+    handshake and auth setup on later calls. Clients that are not thread-safe
+    (praw, httplib2) are lent to one thread at a time with `borrow` instead.
+    """
+
+    def __init__(self):
+        self._clients = {}
+        self._idle = {}
+        self._instances = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(kind: str, credentials: tuple) -> tuple:
+        return kind, hashlib.sha256(repr(credentials).encode("utf-8")).hexdigest()
+
+    def _created(self, kind: str, client) -> None:
+        self._stats.setdefault(kind, {"created": 0, "reused": 0})["created"] += 1
+        self._instances.setdefault(kind, []).append(client)
+
+    def get(self, kind: str, factory, *credentials):
+        """
+        Returns the cached client for (`kind`, `credentials`), building it with `factory()` on first use.
+
+        Only for thread-safe clients; the same instance is shared by every thread.
+
+        Args:
+            kind (str): Client family, e.g. "gemini" or "reddit". Used for the stats.
+            factory: Zero-argument callable creating a new client.
+            *credentials: Values that make a client distinct (API keys, user agent...).
+        """
+        key = self._key(kind, credentials)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._stats[kind]["reused"] += 1
+                return client
+            logging.info(f"Creating shared {kind} client.")
+            client = factory()
+            self._clients[key] = client
+            self._created(kind, client)
+            return client
+
+    @contextmanager
+    def borrow(self, kind: str, factory, *credentials):
+        """
+        Lends a client to the calling thread until the block exits, for clients that are not thread-safe.
+
+        An idle client is reused when there is one; otherwise a new one is built,
+        so there are never more clients than threads using them at once.
+        """
+        key = self._key(kind, credentials)
+        with self._lock:
+            idle = self._idle.get(key)
+            client = idle.pop() if idle else None
+            if client is not None:
+                self._stats[kind]["reused"] += 1
+        if client is None:
+            logging.info(f"Creating pooled {kind} client.")
+            client = factory()
+            with self._lock:
+                self._created(kind, client)
+        try:
+            yield client
+        finally:
+            with self._lock:
+                if client in self._instances.get(kind, ()):
+                    self._idle.setdefault(key, []).append(client)
+
+    def reset(self, kind: str = None) -> None:
+        """Drops cached clients (all, or one kind), e.g. after a credential rotation."""
+        with self._lock:
+            for registry in (self._clients, self._idle):
+                for key in [k for k in registry if kind is None or k[0] == kind]:
+                    del registry[key]
+            for key in [k for k in self._instances if kind is None or k == kind]:
+                del self._instances[key]
+
+    def stats(self) -> dict:
+        """
+        Returns {kind: {"created", "reused", "open_connections", ...}} per client family.
+
+        "open_connections" counts the keep-alive connections the clients' HTTP pools
+        currently hold; requests-based clients also report "connections_opened" and
+        "requests" since they were built. Few connections opened for many requests
+        means connections are being reused.
+        """
+        with self._lock:
+            stats = {kind: dict(counts) for kind, counts in self._stats.items()}
+            instances = {kind: list(clients) for kind, clients in self._instances.items()}
+        for kind, clients in instances.items():
+            for client in clients:
+                for name, value in connection_stats(client).items():
+                    stats[kind][name] = stats[kind].get(name, 0) + value
+        return stats
+
+
+def _pool_stats(session):
+    """Connection counts of one HTTP session (httpx, requests or httplib2), or None for other objects."""
+    pool = getattr(getattr(session, "_transport", None), "_pool", None)
+    if pool is not None and hasattr(pool, "connections"):
+        # httpx over httpcore: the pool lists its live connections.
+        return {"open_connections": sum(1 for connection in list(pool.connections) if not connection.is_closed())}
+
+    adapters = getattr(session, "adapters", None)
+    if isinstance(adapters, dict):
+        # requests over urllib3: one connection pool per host.
+        stats = {"open_connections": 0, "connections_opened": 0, "requests": 0}
+        for adapter in adapters.values():
+            pools = getattr(getattr(adapter, "poolmanager", None), "pools", None)
+            for pool_key in list(pools.keys()) if pools is not None else []:
+                host_pool = pools.get(pool_key)
+                if host_pool is None:
+                    continue
+                queue = getattr(getattr(host_pool, "pool", None), "queue", ())
+                stats["open_connections"] += sum(1 for connection in list(queue) if connection is not None)
+                stats["connections_opened"] += host_pool.num_connections
+                stats["requests"] += host_pool.num_requests
+        return stats
+
+    connections = getattr(session, "connections", None)
+    if type(session).__name__ == "Http" and isinstance(connections, dict):
+        # httplib2: one connection per scheme and host.
+        return {"open_connections": len(connections)}
+    return None
+
+
+def connection_stats(client) -> dict:
+    """
+    Sums the connection counts of the HTTP sessions found inside an SDK client.
+
+    SDKs keep their session in private attributes that move between versions, so
+    the client's attributes are searched a few levels deep instead of naming them.
+    """
+    totals, seen = {}, set()
+    frontier = [client]
+    for _ in range(_MAX_SESSION_SEARCH_DEPTH):
+        next_frontier = []
+        for obj in frontier:
+            if id(obj) in seen or len(seen) >= _MAX_SESSION_SEARCH_OBJECTS:
+                continue
+            seen.add(id(obj))
+            stats = _pool_stats(obj)
+            if stats is not None:
+                for name, value in stats.items():
+                    totals[name] = totals.get(name, 0) + value
+                continue
+            try:
+                attributes = vars(obj)
+            except TypeError:
+                continue
+            next_frontier.extend(
+                value for value in attributes.values()
+                if hasattr(value, "__dict__") and not isinstance(value, type) and not callable(value)
+            )
+        frontier = next_frontier
+    return totals
+
+
+client_registry = ClientRegistry()
+
+
+def get_openai_client(api_key: str):
+    from openai import OpenAI
+
+    # ResilientCaller owns retries; SDK retries underneath it would multiply the attempts.
+    return client_registry.get("openai", lambda: OpenAI(api_key=api_key, max_retries=0), api_key)
+
+
+def get_gemini_client(api_key: str):
+    from google import genai
+    from google.genai import types
+
+    # One attempt per call, for the same reason as the OpenAI client.
+    http_options = types.HttpOptions(retry_options=types.HttpRetryOptions(attempts=1))
+    return client_registry.get("gemini", lambda: genai.Client(api_key=api_key, http_options=http_options), api_key)
+
+
+def borrow_reddit_client(client_id: str, client_secret: str, user_agent: str):
+    """Context manager lending a praw client; praw is not thread-safe, so each thread borrows its own."""
+    import praw
+
+    return client_registry.borrow(
+        "reddit",
+        lambda: praw.Reddit(client_id=client_id, client_secret=client_secret, user_agent=user_agent),
+        client_id, client_secret, user_agent,
+    )
+
+
+def get_x_client(bearer_token: str):
+    import tweepy
+
+    return client_registry.get("x", lambda: tweepy.Client(bearer_token=bearer_token), bearer_token)
+
+
+def borrow_youtube_client(api_key: str):
+    """Context manager lending a YouTube client; its httplib2 connection is not thread-safe."""
+    import googleapiclient.discovery
+
+    # cache_discovery=False: the discovery document is bundled, no file cache needed.
+    return client_registry.borrow(
+        "youtube",
+        lambda: googleapiclient.discovery.build("youtube", "v3", developerKey=api_key, cache_discovery=False),
+        api_key,
+    )
+
+
+def client_stats() -> dict:
+    return client_registry.stats()
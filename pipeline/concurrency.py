@@ -0,0 +1,75 @@
+# Bounded-concurrency helpers for fanning out slow, I/O-bound LLM calls.
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from pipeline.tracing import submit_in_context
+
+
+# Max in-flight requests per LLM provider, shared by every caller in the process.
+DEFAULT_PROVIDER_CONCURRENCY = {
+    "chatgpt": 4,
+    "gemini": 2,
+}
+
+
+class ProviderLimiter:
+    """Caps the number of concurrent requests sent to each provider."""
+
+    def __init__(self, limits: dict = None, default_limit: int = 2):
+        self.limits = dict(DEFAULT_PROVIDER_CONCURRENCY if limits is None else limits)
+        self.default_limit = default_limit
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, provider: str) -> threading.BoundedSemaphore:
+        provider = provider.lower()
+        with self._lock:
+            if provider not in self._semaphores:
+                limit = self.limits.get(provider, self.default_limit)
+                self._semaphores[provider] = threading.BoundedSemaphore(limit)
+            return self._semaphores[provider]
+
+    @contextmanager
+    def slot(self, provider: str):
+        """Blocks until a request slot for `provider` is free."""
+        semaphore = self._semaphore(provider)
+        semaphore.acquire()
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+def map_bounded(func, items: list, max_workers: int = 8, on_error=None) -> list:
+    """
+    Runs `func(item)` for every item on a thread pool and keeps input order.
+
+    A failing item never cancels the others; its slot in the result list is
+    filled with `on_error(item, exception)` (or None when no handler is given).
+
+    Args:
+        func: Callable applied to each item.
+        items (list): Inputs, one call each.
+        max_workers (int): Upper bound on threads for this batch.
+        on_error: Optional callable building a fallback result for a failed item.
+
+    Returns:
+        list: Results in the same order as `items`.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    results = [None] * len(items)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+        futures = [submit_in_context(executor, func, item) for item in items]
+        for index, future in enumerate(futures):
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                logging.error(f"Concurrent task {index} failed: {e}")
+                if on_error is not None:
+                    results[index] = on_error(items[index], e)
+    return results
@@ -0,0 +1,182 @@
+# Minimal DAG runner: stages declare dependencies and independent stages run in parallel.
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from pipeline.tracing import span, submit_in_context
+
+
+class Stage:
+    """One unit of work in a Pipeline."""
+
+    def __init__(self, name: str, func, depends_on: list = None, priority: int = 0, checkpoint=True,
+                 run_once: bool = False):
+        """
+        Args:
+            name (str): Unique stage name, also the key of its result.
+            func: Callable receiving a dict of {dependency name: result}.
+            depends_on (list): Names of stages that must finish first.
+            priority (int): Higher priority stages are started first when several
+                are ready at once. Give long-running jobs a high priority.
+            checkpoint: Whether the output is saved when the run has a checkpoint. Either
+                a bool, or a callable receiving the output and returning a bool, e.g. to
+                not save output that contains failed LLM responses.
+            run_once (bool): For side effects such as sending an email. Once the stage has
+                completed in a run, a retry of that run skips it, even when its inputs had
+                to be recomputed. Its completion is always checkpointed.
+        """
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on or [])
+        self.priority = priority
+        self.checkpoint = checkpoint
+        self.run_once = run_once
+
+    def should_checkpoint(self, output) -> bool:
+        if self.run_once:
+            return True
+        return self.checkpoint(output) if callable(self.checkpoint) else bool(self.checkpoint)
+
+
+class PipelineResult:
+    """Outputs, errors and timings of one Pipeline run."""
+
+    def __init__(self):
+        self.results = {}
+        self.errors = {}
+        self.skipped = []
+        self.restored = []
+        self.durations = {}
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors and not self.skipped
+
+
+class Pipeline:
+    """Runs stages as soon as their dependencies are done, on a shared thread pool."""
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+        self.stages = {}
+
+    def add_stage(self, name: str, func, depends_on: list = None, priority: int = 0,
+                  checkpoint=True, run_once: bool = False) -> "Pipeline":
+        if name in self.stages:
+            raise ValueError(f"Duplicate pipeline stage: {name}")
+        self.stages[name] = Stage(name, func, depends_on, priority, checkpoint, run_once)
+        return self
+
+    def _validate(self) -> None:
+        for stage in self.stages.values():
+            for dependency in stage.depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(f"Stage {stage.name} depends on unknown stage {dependency}")
+
+        # Kahn's algorithm, only to reject cycles up front.
+        remaining = {name: set(stage.depends_on) for name, stage in self.stages.items()}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Pipeline has a dependency cycle among: {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    def _restore(self, checkpoint, outcome: PipelineResult, pending: dict) -> None:
+        """Loads checkpointed outputs, in dependency order, for stages whose dependencies were restored too."""
+        restored = True
+        while restored:
+            restored = False
+            for name, stage in list(pending.items()):
+                if not all(dependency in outcome.results for dependency in stage.depends_on):
+                    continue
+                found, output = checkpoint.load(name)
+                if found:
+                    logging.info(f"Restored pipeline stage {name} from checkpoint.")
+                    outcome.results[name] = output
+                    outcome.restored.append(name)
+                    del pending[name]
+                    restored = True
+
+    def run(self, checkpoint=None) -> PipelineResult:
+        """
+        Executes every stage once.
+
+        A stage that raises is recorded in `errors`; stages depending on it are
+        skipped, while unrelated branches keep running.
+
+        Args:
+            checkpoint: Optional store with `load(name) -> (found, output)` and
+                `save(name, output)`, e.g. a pipeline.checkpoint.RunCheckpoint. Stages
+                completed by an earlier attempt of the same run are restored instead
+                of executed, and each newly completed stage is saved.
+
+        Returns:
+            PipelineResult: Per-stage results, errors, skipped and restored stages, and durations.
+        """
+        self._validate()
+        outcome = PipelineResult()
+        pending = dict(self.stages)
+        running = {}
+        order = {name: index for index, name in enumerate(self.stages)}
+        if checkpoint is not None:
+            self._restore(checkpoint, outcome, pending)
+
+        def execute(stage: Stage, inputs: dict):
+            if stage.run_once and checkpoint is not None:
+                found, output = checkpoint.load(stage.name)
+                if found:
+                    logging.info(f"Pipeline stage {stage.name} already ran in this run; not repeating it.")
+                    outcome.restored.append(stage.name)
+                    return output
+            started_at = time.time()
+            try:
+                with span("pipeline_stage", stage=stage.name):
+                    output = stage.func(inputs)
+            finally:
+                outcome.durations[stage.name] = time.time() - started_at
+            if checkpoint is not None and stage.should_checkpoint(output):
+                try:
+                    checkpoint.save(stage.name, output)
+                except Exception as e:
+                    logging.warning(f"Could not checkpoint pipeline stage {stage.name}: {e}")
+            return output
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                # Skip stages whose dependencies failed or were skipped.
+                blocked = set(outcome.errors) | set(outcome.skipped)
+                for name in [n for n, s in pending.items() if blocked.intersection(s.depends_on)]:
+                    logging.warning(f"Skipping pipeline stage {name}: a dependency did not complete.")
+                    outcome.skipped.append(name)
+                    del pending[name]
+
+                ready = [
+                    stage for stage in pending.values()
+                    if all(dependency in outcome.results for dependency in stage.depends_on)
+                ]
+                ready.sort(key=lambda stage: (-stage.priority, order[stage.name]))
+                for stage in ready:
+                    inputs = {dependency: outcome.results[dependency] for dependency in stage.depends_on}
+                    logging.info(f"Starting pipeline stage: {stage.name}")
+                    running[submit_in_context(executor, execute, stage, inputs)] = stage.name
+                    del pending[stage.name]
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        outcome.results[name] = future.result()
+                        logging.info(
+                            f"Pipeline stage {name} finished in {outcome.durations.get(name, 0):.1f}s."
+                        )
+                    except Exception as e:
+                        logging.error(f"Pipeline stage {name} failed: {e}")
+                        outcome.errors[name] = e
+
+        return outcome
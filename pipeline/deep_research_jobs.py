@@ -0,0 +1,210 @@
+# Tracks many background deep-research jobs (OpenAI and Gemini) from a single polling thread.
+import contextvars
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from pipeline.hedging import is_good_response
+from pipeline.job_registry import COMPLETED, DELIVERED, FAILED, PENDING
+
+
+DEFAULT_MIN_POLL_SECONDS = 5
+DEFAULT_MAX_POLL_SECONDS = 30
+DEFAULT_BACKOFF = 1.5
+# Consecutive poll errors tolerated before a job is failed.
+MAX_POLL_ERRORS = 5
+
+
+class DeepResearchJob:
+    """Polling state of one submitted background job."""
+
+    def __init__(self, provider: str, job_id: str, poll, future: Future, timeout_seconds: float,
+                 min_poll_seconds: float, max_poll_seconds: float, submitted_at: float):
+        self.provider = provider
+        self.job_id = job_id
+        self.poll = poll
+        self.future = future
+        self.submitted_at = submitted_at
+        self.deadline = self.submitted_at + timeout_seconds
+        self.timeout_seconds = timeout_seconds
+        self.interval = min_poll_seconds
+        self.max_poll_seconds = max_poll_seconds
+        self.poll_errors = 0
+        # The submitter's context, so spans of the polls go to its run's tracer.
+        self.context = contextvars.copy_context()
+
+
+class DeepResearchJobManager:
+    """
+    Submits background deep-research jobs and resolves their futures from one poller thread.
+
+    Each job is polled on its own adaptive schedule: the interval starts at
+    `min_poll_seconds` and grows by `backoff` after every unfinished poll, up to
+    `max_poll_seconds`. A finished report is therefore picked up within
+    `max_poll_seconds`, and N concurrent jobs still cost a single thread.
+
+    With a `registry` (see pipeline.job_registry), jobs submitted with a `job_key`
+    are recorded durably: a later process re-attaches to the same job, or reuses
+    its finished report, instead of paying for a new one.
+    """
+
+    def __init__(self, min_poll_seconds: float = DEFAULT_MIN_POLL_SECONDS,
+                 max_poll_seconds: float = DEFAULT_MAX_POLL_SECONDS, backoff: float = DEFAULT_BACKOFF,
+                 registry=None, clock=time.time):
+        self.min_poll_seconds = min_poll_seconds
+        self.max_poll_seconds = max_poll_seconds
+        self.backoff = backoff
+        self.registry = registry
+        self.clock = clock
+        self._schedule = []  # Heap of (next_poll_at, sequence, job).
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._poller = None
+
+    def submit(self, provider: str, submit, poll, timeout_seconds: float = 900,
+               max_poll_seconds: float = None, job_key: str = None) -> Future:
+        """
+        Starts a job and returns a Future resolving to its final text.
+
+        Args:
+            provider (str): Label used in logs, e.g. "chatgpt" or "gemini".
+            submit: Zero-argument callable that creates the background job and returns its id.
+                Called in the caller's thread, so submission errors raise immediately.
+            poll: Callable taking the job id and returning (finished, text). `text` is the
+                report, or an error message when the job ended unsuccessfully.
+            timeout_seconds (float): The future fails with TimeoutError after this long.
+            max_poll_seconds (float): Optional per-job cap on the poll interval.
+            job_key (str): Optional hash of everything that defines the request (model,
+                tools, prompt...). Keys the job in the registry.
+
+        Returns:
+            Future: Resolves to the job's text.
+        """
+        registry = self.registry if job_key else None
+        record = registry.lookup(job_key, (PENDING, COMPLETED, DELIVERED)) if registry is not None else None
+        if record is not None and record["status"] in (COMPLETED, DELIVERED):
+            logging.info(f"Reusing finished {provider} deep research job {record['job_id']} from the registry.")
+            future = Future()
+            future.set_result(record["result"])
+            return future
+
+        if record is not None:
+            logging.info(f"Re-attaching to in-flight {provider} deep research job {record['job_id']}.")
+            job_id = record["job_id"]
+        else:
+            job_id = submit()
+            logging.info(f"Deep research job submitted to {provider}: {job_id}")
+            if registry is not None:
+                registry.record_submitted(job_key, provider, job_id, timeout_seconds)
+
+        future = self.track(provider, job_id, poll, timeout_seconds, max_poll_seconds)
+        if registry is not None:
+            future.add_done_callback(lambda done: self._record_outcome(registry, job_key, done))
+        return future
+
+    @staticmethod
+    def _record_outcome(registry, job_key: str, future: Future) -> None:
+        # A timed-out job is still running on the provider's side; leave it pending to re-attach later.
+        text = None
+        try:
+            text = future.result()
+            status = COMPLETED if is_good_response(text) else FAILED
+        except TimeoutError:
+            return
+        except Exception:
+            status = FAILED
+        try:
+            registry.record_finished(job_key, status, text)
+        except Exception as e:
+            logging.warning(f"Could not record deep research job outcome: {e}")
+
+    def track(self, provider: str, job_id: str, poll, timeout_seconds: float = 900,
+              max_poll_seconds: float = None) -> Future:
+        """Tracks an already-submitted job, see submit()."""
+        future = Future()
+        future.set_running_or_notify_cancel()
+        job = DeepResearchJob(
+            provider, job_id, poll, future, timeout_seconds,
+            min_poll_seconds=self.min_poll_seconds,
+            max_poll_seconds=min(max_poll_seconds or self.max_poll_seconds, self.max_poll_seconds),
+            submitted_at=self.clock(),
+        )
+        with self._condition:
+            self._push(job, job.submitted_at + job.interval)
+            if self._poller is None or not self._poller.is_alive():
+                self._poller = threading.Thread(target=self._run, name="deep-research-poller", daemon=True)
+                self._poller.start()
+            self._condition.notify()
+        return future
+
+    def pending_jobs(self) -> int:
+        with self._condition:
+            return len(self._schedule)
+
+    def _push(self, job: DeepResearchJob, when: float) -> None:
+        heapq.heappush(self._schedule, (when, next(self._sequence), job))
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if not self._schedule:
+                        self._poller = None
+                        return
+                    when = self._schedule[0][0]
+                    delay = when - self.clock()
+                    if delay <= 0:
+                        _, _, job = heapq.heappop(self._schedule)
+                        break
+                    self._condition.wait(timeout=delay)
+            self._poll_once(job)
+
+    def _poll_once(self, job: DeepResearchJob) -> None:
+        if job.future.done():
+            return
+
+        try:
+            finished, text = job.context.run(job.poll, job.job_id)
+            job.poll_errors = 0
+        except Exception as e:
+            job.poll_errors += 1
+            logging.warning(f"Polling {job.provider} deep research job {job.job_id} failed: {e}")
+            if job.poll_errors >= MAX_POLL_ERRORS:
+                job.future.set_exception(e)
+                return
+            finished, text = False, None
+
+        now = self.clock()
+        if finished:
+            logging.info(
+                f"Deep research job {job.job_id} from {job.provider} finished after {now - job.submitted_at:.0f}s."
+            )
+            job.future.set_result(text)
+            return
+
+        if now >= job.deadline:
+            logging.error(f"Deep research job {job.job_id} timed out after {job.timeout_seconds} seconds.")
+            job.future.set_exception(TimeoutError(f"timed out after {job.timeout_seconds} seconds."))
+            return
+
+        job.interval = min(job.interval * self.backoff, job.max_poll_seconds)
+        with self._condition:
+            self._push(job, min(now + job.interval, job.deadline))
+
+
+_default_manager = None
+_default_manager_lock = threading.Lock()
+
+
+def get_deep_research_manager() -> DeepResearchJobManager:
+    """Returns the process-wide job manager, backed by the durable job registry."""
+    global _default_manager
+    with _default_manager_lock:
+        if _default_manager is None:
+            from pipeline.job_registry import get_job_registry
+
+            _default_manager = DeepResearchJobManager(registry=get_job_registry())
+        return _default_manager
@@ -0,0 +1,22 @@
+# One-time process setup shared by every module: .env loading and logging format.
+import logging
+import threading
+
+from dotenv import load_dotenv
+
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(filename)s:%(lineno)d - %(message)s'
+
+_configured = False
+_lock = threading.Lock()
+
+
+def configure_environment() -> None:
+    """Loads the .env file and configures logging, once per process."""
+    global _configured
+    with _lock:
+        if _configured:
+            return
+        load_dotenv()
+        logging.basicConfig(level=logging.DEBUG, format=LOG_FORMAT)
+        _configured = True
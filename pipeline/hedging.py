@@ -0,0 +1,217 @@
+# Hedged requests across LLM providers, timed from each provider's rolling latency percentiles.
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from pipeline.tracing import submit_in_context
+
+
+DEFAULT_WINDOW = 50
+# Latency samples needed before a provider's own percentile is trusted.
+DEFAULT_MIN_SAMPLES = 5
+# Hedge delay used until enough samples exist, and the floor/ceiling applied afterwards.
+DEFAULT_HEDGE_DELAY_SECONDS = 60.0
+MIN_HEDGE_DELAY_SECONDS = 2.0
+MAX_HEDGE_DELAY_SECONDS = 180.0
+# Provider fallbacks return an error string instead of raising; those are not good answers.
+ERROR_RESPONSE_PREFIX = "Error generating"
+
+
+def is_good_response(response) -> bool:
+    """True for a non-empty answer that is not one of the providers' error messages."""
+    return isinstance(response, str) and bool(response.strip()) and not response.startswith(ERROR_RESPONSE_PREFIX)
+
+
+class LatencyTracker:
+    """Keeps the last `window` successful call latencies per provider."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(provider, deque(maxlen=self.window)).append(seconds)
+
+    def count(self, provider: str) -> int:
+        with self._lock:
+            return len(self._samples.get(provider, ()))
+
+    def percentile(self, provider: str, q: float):
+        """Nearest-rank percentile (`q` in 0-100) of the recent latencies, or None without samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(provider, ()))
+        if not samples:
+            return None
+        rank = max(1, math.ceil(q / 100 * len(samples)))
+        return samples[rank - 1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            providers = list(self._samples)
+        return {
+            provider: {
+                "samples": self.count(provider),
+                "p50": self.percentile(provider, 50),
+                "p95": self.percentile(provider, 95),
+            }
+            for provider in providers
+        }
+
+
+class HedgedRouter:
+    """
+    Sends a call to the primary provider and, if it has not answered by that
+    provider's p95 latency, hedges with the same call to the secondary.
+
+    The first good answer wins. The loser is cancelled when it has not started yet;
+    a call already in flight cannot be interrupted, so its result is dropped. A
+    primary that fails before its p95 fails over to the secondary immediately.
+    Hedges fire only on the slowest ~5% of calls, so steady-state cost stays close
+    to one request per prompt.
+
+    Each call receives an `on_start` callback and must invoke it right before the
+    actual provider request, i.e. after any concurrency slot has been acquired and
+    only on a cache miss. The hedge timer starts there, so queueing for a slot
+    never triggers a hedge, and only real requests feed the latency percentiles.
+    """
+
+    def __init__(
+        self,
+        tracker: LatencyTracker = None,
+        hedge_percentile: float = 95,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+        default_delay_seconds: float = DEFAULT_HEDGE_DELAY_SECONDS,
+        min_delay_seconds: float = MIN_HEDGE_DELAY_SECONDS,
+        max_delay_seconds: float = MAX_HEDGE_DELAY_SECONDS,
+        max_workers: int = 16,
+        is_good=is_good_response,
+        clock=time.monotonic,
+    ):
+        self.tracker = tracker or LatencyTracker()
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.default_delay_seconds = default_delay_seconds
+        self.min_delay_seconds = min_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.is_good = is_good
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedged-call")
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "hedged": 0, "failovers": 0, "won_by_secondary": 0, "cancelled": 0}
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def hedge_delay(self, provider: str) -> float:
+        """Seconds to wait on `provider` before hedging: its p95, clamped, or the default while warming up."""
+        if self.tracker.count(provider) < self.min_samples:
+            return self.default_delay_seconds
+        delay = self.tracker.percentile(provider, self.hedge_percentile)
+        return min(self.max_delay_seconds, max(self.min_delay_seconds, delay))
+
+    def _submit(self, provider: str, call) -> tuple:
+        """Runs `call(on_start)` on the pool. Returns (future, event set once the request started or ended)."""
+        started = threading.Event()
+        started_at = []
+
+        def on_start():
+            started_at.append(self._clock())
+            started.set()
+
+        def timed():
+            try:
+                result = call(on_start)
+            finally:
+                started.set()
+            # Cache hits never call on_start and are not provider latency.
+            if started_at and self.is_good(result):
+                self.tracker.record(provider, self._clock() - started_at[0])
+            return result
+
+        return submit_in_context(self._executor, timed), started
+
+    def _outcome(self, future):
+        """Returns (good, result_or_error) for a finished future."""
+        try:
+            result = future.result()
+        except Exception as e:
+            return False, e
+        return self.is_good(result), result
+
+    def call(self, primary: str, secondary: str, calls: dict):
+        """
+        Runs `calls[primary]()`, hedging with `calls[secondary]()` when the primary is slow or fails.
+
+        Args:
+            primary (str), secondary (str): Provider names, keys of `calls`. With no
+                secondary (None or missing from `calls`) the primary is called directly.
+            calls (dict): {provider: callable taking the `on_start` callback and returning the answer}.
+
+        Returns:
+            The first good answer, or the primary's own result when neither answer is good.
+
+        Raises:
+            Exception: The primary's error, when it raised and no good answer came back.
+        """
+        self._count("calls")
+        if not secondary or secondary not in calls or secondary == primary:
+            return calls[primary](lambda: None)
+
+        primary_future, primary_started = self._submit(primary, calls[primary])
+        # Time spent queueing for a concurrency slot does not count towards the hedge delay.
+        primary_started.wait()
+        done, _ = wait([primary_future], timeout=self.hedge_delay(primary))
+        if done:
+            good, result = self._outcome(primary_future)
+            if good:
+                return result
+            logging.warning(f"{primary} returned no good answer; failing over to {secondary}.")
+            self._count("failovers")
+        else:
+            logging.info(f"{primary} is slower than its p{self.hedge_percentile:g}; hedging with {secondary}.")
+            self._count("hedged")
+
+        secondary_future, _ = self._submit(secondary, calls[secondary])
+        pending = {primary_future: primary, secondary_future: secondary}
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = pending.pop(future)
+                good, result = self._outcome(future)
+                if not good:
+                    continue
+                for loser in pending:
+                    if loser.cancel():
+                        self._count("cancelled")
+                if provider == secondary:
+                    self._count("won_by_secondary")
+                return result
+
+        _, result = self._outcome(primary_future)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        return {**stats, "latency": self.tracker.stats()}
+
+
+_default_router = None
+_default_router_lock = threading.Lock()
+
+
+def get_hedged_router() -> HedgedRouter:
+    """Returns the process-wide router, so latency history carries over between warm invocations."""
+    global _default_router
+    with _default_router_lock:
+        if _default_router is None:
+            _default_router = HedgedRouter()
+        return _default_router
@@ -0,0 +1,105 @@
+# Import-time benchmark for the Cloud Run entry point, built on `python -X importtime`.
+#
+# Usage:
+#   python -m pipeline.importtime                      # profile `import main`
+#   python -m pipeline.importtime main --top 30 --budget-ms 500
+import argparse
+import json
+import re
+import subprocess
+import sys
+
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def measure_import(module: str = "main", python: str = sys.executable) -> list:
+    """
+    Imports `module` in a fresh interpreter and returns one record per imported module.
+
+    Returns:
+        list: Dicts with "module", "self_ms", "cumulative_ms" and "depth",
+            in the order the interpreter reported them.
+    """
+    completed = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    records = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        records.append({
+            "module": name,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": len(indent) // 2,
+        })
+    return records
+
+
+def summarize(records: list, module: str, top: int = 20) -> dict:
+    """Aggregates per-module and per-top-level-package cost."""
+    total_ms = next((r["cumulative_ms"] for r in reversed(records) if r["module"] == module), 0.0)
+
+    packages = {}
+    for record in records:
+        package = record["module"].split(".")[0]
+        packages[package] = packages.get(package, 0.0) + record["self_ms"]
+
+    return {
+        "module": module,
+        "total_ms": round(total_ms, 1),
+        "modules_imported": len(records),
+        "slowest_modules": sorted(records, key=lambda r: r["cumulative_ms"], reverse=True)[:top],
+        "packages_self_ms": dict(
+            sorted(((k, round(v, 1)) for k, v in packages.items()), key=lambda kv: kv[1], reverse=True)[:top]
+        ),
+    }
+
+
+def format_report(summary: dict) -> str:
+    lines = [
+        f"Import of {summary['module']}: {summary['total_ms']:.1f} ms, "
+        f"{summary['modules_imported']} modules",
+        "",
+        f"{'cumulative ms':>14} {'self ms':>9}  module",
+    ]
+    for record in summary["slowest_modules"]:
+        lines.append(
+            f"{record['cumulative_ms']:>14.1f} {record['self_ms']:>9.1f}  "
+            f"{'  ' * record['depth']}{record['module']}"
+        )
+    lines += ["", f"{'self ms':>14}  top-level package"]
+    for package, self_ms in summary["packages_self_ms"].items():
+        lines.append(f"{self_ms:>14.1f}  {package}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Report per-module import cost of a module.")
+    parser.add_argument("module", nargs="?", default="main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3, help="Keep the fastest of N cold imports.")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Exit 1 when the import is slower.")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON.")
+    args = parser.parse_args()
+
+    summaries = [summarize(measure_import(args.module), args.module, args.top) for _ in range(max(1, args.runs))]
+    best = min(summaries, key=lambda summary: summary["total_ms"])
+    print(json.dumps(best, indent=2) if args.json else format_report(best))
+
+    if args.budget_ms is not None and best["total_ms"] > args.budget_ms:
+        print(f"Import time {best['total_ms']:.1f} ms exceeds budget {args.budget_ms:.1f} ms.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
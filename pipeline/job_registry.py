@@ -0,0 +1,106 @@
+# Durable registry of submitted deep-research and batch jobs, so a restarted instance re-attaches instead of resubmitting.
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from pipeline.llm_cache import next_market_open
+from pipeline.state import state_path
+
+
+JOB_REGISTRY_ENABLED = os.getenv("DEEP_RESEARCH_REGISTRY_ENABLED", "true").lower() not in {"0", "false", "no"}
+PENDING, COMPLETED, FAILED = "pending", "completed", "failed"
+# Completed batch results that have been handed to the report; kept so they are not resubmitted.
+DELIVERED = "delivered"
+_COLUMNS = ("prompt_hash", "provider", "job_id", "status", "result", "submitted_at")
+
+
+class JobRegistry:
+    """
+    SQLite table of background jobs keyed by a hash of the request (provider, model, prompt...).
+
+    A job is recorded as pending right after submission and updated when it
+    finishes. Entries expire at the next market open, or when the job's own
+    timeout runs out if that is later, like the LLM response cache.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or state_path("deep_research_jobs.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " prompt_hash TEXT PRIMARY KEY, provider TEXT, job_id TEXT, status TEXT, result TEXT,"
+            " submitted_at REAL, finished_at REAL, expires_at REAL)"
+        )
+        self._conn.commit()
+
+    def lookup(self, prompt_hash: str, statuses: tuple = (PENDING, COMPLETED)):
+        """Returns the live job for `prompt_hash` as a dict when its status is in `statuses`, or None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE prompt_hash = ? AND expires_at > ?"
+                f" AND status IN ({', '.join('?' * len(statuses))})",
+                (prompt_hash, now, *statuses),
+            ).fetchone()
+        return dict(zip(_COLUMNS, row)) if row is not None else None
+
+    def find(self, key_prefix: str, statuses: tuple = (PENDING, COMPLETED)) -> list:
+        """Live jobs whose key starts with `key_prefix` and whose status is in `statuses`, oldest first."""
+        now = time.time()
+        pattern = key_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE prompt_hash LIKE ? ESCAPE '\\' AND expires_at > ?"
+                f" AND status IN ({', '.join('?' * len(statuses))}) ORDER BY submitted_at",
+                (pattern, now, *statuses),
+            ).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def record_submitted(self, prompt_hash: str, provider: str, job_id: str, timeout_seconds: float) -> None:
+        now = time.time()
+        expires_at = max(next_market_open(now), now + timeout_seconds)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, NULL, ?, NULL, ?)",
+                (prompt_hash, provider, job_id, PENDING, now, expires_at),
+            )
+            self._conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (now,))
+            self._conn.commit()
+
+    def record_finished(self, prompt_hash: str, status: str, result: str = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, finished_at = ? WHERE prompt_hash = ?",
+                (status, result, time.time(), prompt_hash),
+            )
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """Number of live jobs per status."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE expires_at > ? GROUP BY status", (time.time(),)
+            ).fetchall()
+        return dict(rows)
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_job_registry():
+    """Returns the process-wide registry, or None when DEEP_RESEARCH_REGISTRY_ENABLED is off."""
+    global _default_registry
+    if not JOB_REGISTRY_ENABLED:
+        return None
+    with _default_registry_lock:
+        if _default_registry is None:
+            try:
+                _default_registry = JobRegistry()
+            except sqlite3.Error as e:
+                logging.error(f"Deep research job registry is unavailable: {e}")
+                return None
+        return _default_registry
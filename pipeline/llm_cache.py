@@ -0,0 +1,162 @@
+# Persistent, content-addressed cache for LLM responses, backed by SQLite.
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from pipeline.hedging import is_good_response
+from pipeline.state import state_path
+
+
+MARKET_TIMEZONE = ZoneInfo("America/New_York")
+MARKET_OPEN_HOUR, MARKET_OPEN_MINUTE = 9, 30
+DEFAULT_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() not in {"0", "false", "no"}
+# NYSE full-day closures; extend once a year. A missing holiday only makes entries expire early.
+MARKET_HOLIDAYS = frozenset(date.fromisoformat(day) for day in (
+    "2026-01-01", "2026-01-19", "2026-02-16", "2026-04-03", "2026-05-25",
+    "2026-06-19", "2026-07-03", "2026-09-07", "2026-11-26", "2026-12-25",
+    "2027-01-01", "2027-01-18", "2027-02-15", "2027-03-26", "2027-05-31",
+    "2027-06-18", "2027-07-05", "2027-09-06", "2027-11-25", "2027-12-24",
+))
+
+
+def next_market_open(now: float = None, holidays: frozenset = MARKET_HOLIDAYS) -> float:
+    """
+    Returns the epoch time of the next US regular session open (9:30 ET), skipping
+    weekends and `holidays`.
+    """
+    current = datetime.fromtimestamp(now if now is not None else time.time(), MARKET_TIMEZONE)
+    candidate = current.replace(hour=MARKET_OPEN_HOUR, minute=MARKET_OPEN_MINUTE, second=0, microsecond=0)
+    if candidate <= current:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5 or candidate.date() in holidays:
+        candidate += timedelta(days=1)
+    return candidate.timestamp()
+
+
+def make_cache_key(provider: str, model: str, tools, grounding: str, prompt_text: str) -> str:
+    """Hashes everything that changes the answer into one stable key."""
+    payload = json.dumps(
+        {
+            "provider": provider,
+            "model": model,
+            "tools": tools,
+            "grounding": grounding,
+            "prompt_sha256": hashlib.sha256(prompt_text.encode("utf-8")).hexdigest(),
+        },
+        sort_keys=True,
+        default=repr,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite-backed response cache with per-entry expiry and size-bounded LRU eviction."""
+
+    def __init__(self, db_path: str = None, max_bytes: int = DEFAULT_MAX_BYTES, expires_at=next_market_open,
+                 clock=time.time):
+        """
+        Args:
+            db_path (str): SQLite file. Defaults to a file under the pipeline state dir.
+            max_bytes (int): Total response bytes kept before least-recently-used entries are evicted.
+            expires_at: Callable returning the epoch expiry time for a new entry.
+            clock: Zero-argument callable returning the current epoch time.
+        """
+        self.db_path = db_path or state_path("llm_cache.sqlite3")
+        self.max_bytes = max_bytes
+        self.expires_at = expires_at
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, provider TEXT, model TEXT, response TEXT,"
+            " size INTEGER, created_at REAL, expires_at REAL, last_access REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses(last_access)")
+        self._conn.commit()
+
+    def get(self, key: str):
+        """Returns the cached response, or None when missing or expired."""
+        now = self.clock()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str, provider: str = None, model: str = None) -> None:
+        now = self.clock()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, model, response, len(response.encode("utf-8")), now, self.expires_at(now), now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        ).fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def get_or_call(self, key: str, call, provider: str = None, model: str = None) -> str:
+        """Returns the cached response for `key`, or runs `call()` and caches its result.
+
+        Empty answers and "Error generating..." messages are returned but never cached.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            logging.info(f"LLM cache hit for {provider}/{model} ({key[:12]}).")
+            return cached
+        response = call()
+        if is_good_response(response):
+            self.put(key, response, provider=provider, model=model)
+        return response
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": total}
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Returns the process-wide cache, or None when LLM_CACHE_ENABLED is off."""
+    global _default_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMResponseCache()
+        return _default_cache
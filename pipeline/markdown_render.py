@@ -0,0 +1,165 @@
+# Markdown-to-HTML rendering with reused converters and a background worker pool.
+#
+# Benchmark against the per-call `markdown.markdown(...)` path:
+#   python -m pipeline.markdown_render --sections 20 --size-kb 40
+import argparse
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import markdown
+
+from pipeline.tracing import span, submit_in_context
+
+
+MARKDOWN_EXTENSIONS = ["tables"]
+DEFAULT_RENDER_WORKERS = 2
+# Prefetched documents kept for a later `render`; the oldest are dropped beyond this,
+# so responses that are prefetched but never rendered (e.g. a failed stage) don't pile up.
+MAX_PENDING_RENDERS = 32
+
+_local = threading.local()
+
+
+def _converter() -> markdown.Markdown:
+    # Markdown instances are not thread-safe, so each worker thread keeps its own.
+    converter = getattr(_local, "converter", None)
+    if converter is None:
+        converter = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+        _local.converter = converter
+    return converter
+
+
+def render_markdown(text: str) -> str:
+    """Converts Markdown to HTML with this thread's converter, reset between documents."""
+    with span("markdown_render") as render_span:
+        render_span.record_size("in", text)
+        html = _converter().reset().convert(text or "")
+        render_span.record_size("out", html)
+    return html
+
+
+class MarkdownRenderer:
+    """
+    Renders Markdown on a small worker pool.
+
+    Call `prefetch(text)` as soon as an LLM response arrives; the conversion then
+    runs while other LLM calls are still in flight, and the later `render(text)`
+    just collects the finished HTML.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_RENDER_WORKERS, max_pending: int = MAX_PENDING_RENDERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="markdown-render")
+        self._max_pending = max_pending
+        # Insertion-ordered, oldest prefetch first.
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+    def prefetch(self, text: str) -> None:
+        """Starts rendering `text` in the background, dropping the oldest unrendered prefetch when full."""
+        key = self._key(text)
+        with self._lock:
+            if key in self._pending:
+                return
+            while len(self._pending) >= self._max_pending:
+                oldest = next(iter(self._pending))
+                self._pending.pop(oldest).cancel()
+            self._pending[key] = submit_in_context(self._executor, render_markdown, text)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def render(self, text: str) -> str:
+        """Returns the HTML for `text`, reusing a prefetched conversion when there is one."""
+        with self._lock:
+            future = self._pending.pop(self._key(text), None)
+        if future is None:
+            return render_markdown(text)
+        try:
+            return future.result()
+        except Exception as e:
+            logging.warning(f"Background markdown rendering failed, rendering inline: {e}")
+            return render_markdown(text)
+
+    def render_many(self, texts: list) -> list:
+        """Renders several documents on the pool and returns the HTML in input order."""
+        for text in texts:
+            self.prefetch(text)
+        return [self.render(text) for text in texts]
+
+
+_default_renderer = None
+_default_renderer_lock = threading.Lock()
+
+
+def get_markdown_renderer() -> MarkdownRenderer:
+    """Returns the process-wide renderer."""
+    global _default_renderer
+    with _default_renderer_lock:
+        if _default_renderer is None:
+            _default_renderer = MarkdownRenderer()
+        return _default_renderer
+
+
+def _synthetic_report(size_kb: int, seed: int) -> str:
+    """Builds a deep-research-like Markdown report of roughly `size_kb` kilobytes."""
+    blocks = []
+    index = 0
+    while sum(len(block) for block in blocks) < size_kb * 1024:
+        index += 1
+        blocks.append(
+            f"## {index}. Ticker REPORT{seed}-{index}\n\n"
+            f"**Summary:** Momentum remains *constructive* after earnings; see "
+            f"[source](https://example.com/news/{seed}/{index}) (2026-10-{index % 28 + 1:02d}).\n\n"
+            "- Bull case: margin expansion, buyback, guidance raise\n"
+            "- Bear case: valuation stretch, `insider selling`, macro risk\n"
+            "  - Nested: rates path and FX headwinds\n\n"
+            "| Metric | Value | Change |\n|---|---:|---:|\n"
+            + "".join(f"| Metric {row} | {row * 1.5:.2f} | {row - 3:+d}% |\n" for row in range(8))
+            + "\n> Suggestion: **hold**, trail stop under the 20-day moving average.\n\n"
+        )
+    return "".join(blocks)
+
+
+def _benchmark(sections: int, size_kb: int, repeats: int) -> None:
+    texts = [_synthetic_report(size_kb, seed) for seed in range(sections)]
+    total_kb = sum(len(text) for text in texts) / 1024
+    print(f"{sections} sections, {total_kb:.0f} KB of Markdown, best of {repeats}")
+
+    def best(func) -> float:
+        timings = []
+        for _ in range(repeats):
+            started_at = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started_at)
+        return min(timings)
+
+    per_call = best(lambda: [markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS) for text in texts])
+    reused = best(lambda: [render_markdown(text) for text in texts])
+    renderer = MarkdownRenderer()
+    pooled = best(lambda: renderer.render_many(texts))
+
+    assert [render_markdown(text) for text in texts] == [
+        markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS) for text in texts
+    ], "Reused converter output differs from markdown.markdown()"
+
+    print(f"{'per-call markdown.markdown':<30} {per_call * 1000:>9.1f} ms")
+    print(f"{'reset-and-reuse converter':<30} {reused * 1000:>9.1f} ms  ({per_call / reused:.2f}x)")
+    print(f"{'worker pool (render_many)':<30} {pooled * 1000:>9.1f} ms  ({per_call / pooled:.2f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Markdown rendering paths.")
+    parser.add_argument("--sections", type=int, default=20)
+    parser.add_argument("--size-kb", type=int, default=40, help="Approximate size of each section.")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    _benchmark(args.sections, args.size_kb, args.repeats)
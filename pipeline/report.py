@@ -0,0 +1,95 @@
+# Collects report sections as chunks and renders them once, instead of repeated string concatenation.
+import html
+from string import Template
+
+
+# Precompiled fragments. Styling lives in one <style> block (see EMAIL_TEMPLATE)
+# instead of being repeated inline in every section.
+TITLE_TEMPLATE = Template("<h$level>$text</h$level>")
+PROMPT_TEMPLATE = Template("<p><strong>Prompt:</strong> $prompt</p>")
+RESPONSE_TEMPLATE = Template('<div class="llm-response">$body</div>')
+SECTION_END = "<hr>"
+
+EMAIL_HEAD = """
+    <html>
+    <head>
+        <style>
+            body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+            h1 { color: #1a73e8; }
+            h2 { color: #4CAF50; border-bottom: 2px solid #f0f0f0; padding-bottom: 5px;}
+            p { margin-bottom: 15px; }
+            pre { background-color: #f5f5f5; padding: 15px; border-radius: 8px; white-space: pre-wrap; word-wrap: break-word; }
+            .llm-response { background: #f5f5f5; padding: 15px; border-radius: 8px; font-family: monospace; white-space: pre-wrap; word-break: break-word; }
+        </style>
+    </head>
+    <body>
+"""
+EMAIL_TAIL = """
+    </body>
+    </html>
+"""
+
+
+class ReportBuilder:
+    """
+    Ordered list of HTML chunks making up one report (or several merged reports).
+
+    Titles and prompts are plain text and are HTML-escaped; response bodies and
+    `html` fragments are already HTML and are kept as they are.
+    """
+
+    def __init__(self, title: str = None):
+        self._chunks = []
+        if title:
+            self.title(title)
+
+    def title(self, text: str, level: int = 1) -> "ReportBuilder":
+        self._chunks.append(TITLE_TEMPLATE.substitute(level=level, text=html.escape(text)))
+        return self
+
+    def html(self, fragment: str) -> "ReportBuilder":
+        """Appends a raw HTML fragment."""
+        self._chunks.append(fragment)
+        return self
+
+    def prompt(self, prompt_text: str) -> "ReportBuilder":
+        self._chunks.append(PROMPT_TEMPLATE.substitute(prompt=html.escape(prompt_text)))
+        return self
+
+    def response(self, body_html: str) -> "ReportBuilder":
+        self._chunks.append(RESPONSE_TEMPLATE.substitute(body=body_html))
+        return self
+
+    def section(self, heading: str, body_html: str, prompt_text: str = None, level: int = 2) -> "ReportBuilder":
+        """Appends a heading, the optional prompt and the rendered LLM response."""
+        self.title(heading, level=level)
+        if prompt_text is not None:
+            self.prompt(prompt_text)
+        self.response(body_html)
+        self._chunks.append(SECTION_END)
+        return self
+
+    def extend(self, *others: "ReportBuilder") -> "ReportBuilder":
+        """Appends the chunks of other reports without rendering them."""
+        for other in others:
+            self._chunks.extend(other._chunks)
+        return self
+
+    @classmethod
+    def merge(cls, *reports: "ReportBuilder") -> "ReportBuilder":
+        return cls().extend(*reports)
+
+    def chunks(self):
+        return iter(self._chunks)
+
+    def render(self) -> str:
+        """Renders the report body with a single join."""
+        return "".join(self._chunks)
+
+    def render_email(self) -> str:
+        """Renders the full HTML email document with a single join."""
+        return "".join([EMAIL_HEAD, *self._chunks, EMAIL_TAIL])
+
+    def size(self) -> int:
+        """Number of characters the rendered body will have."""
+        return sum(len(chunk) for chunk in self._chunks)
@@ -0,0 +1,297 @@
+# Rate limiting, retries and circuit breaking shared by every outbound API call.
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from pipeline.tracing import get_tracer
+
+
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+# Exception class names (from any SDK) that mean a transient network or quota problem.
+RETRYABLE_ERROR_NAMES = (
+    "RateLimit", "Timeout", "ConnectionError", "APIConnectionError", "ServiceUnavailable",
+    "ServerError", "InternalServerError", "TooManyRequests", "ResourceExhausted",
+)
+# Exception class names that mean the provider rejected the request before acting on it.
+REJECTED_ERROR_NAMES = ("RateLimit", "TooManyRequests", "ResourceExhausted")
+
+# Requests per second and burst size per provider, plus retry and breaker settings.
+# Reddit allows 100 requests/min per OAuth client, Sheets 60 reads/min per user.
+DEFAULT_PROVIDER_POLICIES = {
+    "chatgpt": {"rate_per_second": 2.0, "burst": 4},
+    "gemini": {"rate_per_second": 1.0, "burst": 2},
+    "reddit": {"rate_per_second": 1.5, "burst": 5},
+    "youtube": {"rate_per_second": 5.0, "burst": 5},
+    "x": {"rate_per_second": 0.5, "burst": 1},
+    "sheets": {"rate_per_second": 1.0, "burst": 10},
+}
+DEFAULT_POLICY = {"rate_per_second": 1.0, "burst": 2}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+
+def _status_code(error: Exception):
+    for candidate in (error, getattr(error, "response", None), getattr(error, "resp", None)):
+        if candidate is None:
+            continue
+        for attribute in ("status_code", "status", "code"):
+            value = getattr(candidate, attribute, None)
+            if isinstance(value, int):
+                return value
+            if isinstance(value, str) and value.isdigit():
+                return int(value)
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for 408/429/5xx responses, connection errors and timeouts from any SDK."""
+    if isinstance(error, CircuitOpenError):
+        return False
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return any(name in type(error).__name__ for name in RETRYABLE_ERROR_NAMES)
+
+
+def was_rejected(error: Exception) -> bool:
+    """
+    True only when the provider refused the request outright (429), so nothing was created.
+
+    Use it as `retry_on` for calls that start paid background jobs: after a timeout or
+    a dropped connection the job may exist, and a retry would start a second one.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    status = _status_code(error)
+    if status is not None:
+        return status == 429
+    return any(name in type(error).__name__ for name in REJECTED_ERROR_NAMES)
+
+
+def retry_after_seconds(error: Exception):
+    """The server's Retry-After hint in seconds, when the error carries one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or getattr(error, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate_per_second` sustained, up to `burst` at once."""
+
+    def __init__(self, rate_per_second: float, burst: int = 1, clock=time.monotonic, sleep=time.sleep):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Takes one token, sleeping until one is available. Returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate_per_second)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate_per_second
+            self._sleep(delay)
+            waited += delay
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout_seconds`; then lets one trial call through (half-open), which
+    closes the circuit on success or re-opens it on failure.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_seconds: float = 60, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout_seconds:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = self._clock()
+                self._trial_in_flight = False
+
+
+class ResilientCaller:
+    """Runs calls to one provider through its rate limit, retry policy and circuit breaker."""
+
+    def __init__(
+        self,
+        provider: str,
+        rate_per_second: float = 1.0,
+        burst: int = 2,
+        max_attempts: int = 4,
+        base_delay_seconds: float = 1.0,
+        max_delay_seconds: float = 30.0,
+        failure_threshold: int = 5,
+        reset_timeout_seconds: float = 60,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        rng: random.Random = None,
+    ):
+        """
+        Args:
+            provider (str): Name used in logs and stats.
+            rate_per_second (float), burst (int): Token-bucket rate limit.
+            max_attempts (int): Attempts per call, including the first one.
+            base_delay_seconds (float), max_delay_seconds (float): Exponential backoff bounds;
+                the actual delay is drawn uniformly below the bound ("full jitter"), or the
+                server's Retry-After when given.
+            failure_threshold (int), reset_timeout_seconds (float): Circuit-breaker settings.
+            clock, sleep, rng: Injectable for tests.
+        """
+        self.provider = provider
+        self.bucket = TokenBucket(rate_per_second, burst, clock=clock, sleep=sleep)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout_seconds, clock=clock)
+        self.max_attempts = max_attempts
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "attempts": 0, "retries": 0, "failures": 0, "rejected": 0, "throttled_seconds": 0.0}
+
+    def _count(self, name: str, amount=1) -> None:
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        hint = retry_after_seconds(error)
+        if hint is not None:
+            return min(hint, self.max_delay_seconds)
+        return self._rng.uniform(0, min(self.max_delay_seconds, self.base_delay_seconds * 2 ** (attempt - 1)))
+
+    def call(self, func, *args, retry_on=is_retryable, **kwargs):
+        """
+        Calls `func(*args, **kwargs)`, retrying retryable errors with jittered backoff.
+
+        Args:
+            retry_on: Predicate deciding which errors are retried, `is_retryable` by
+                default. Pass `was_rejected` for calls that must not run twice.
+
+        Raises:
+            CircuitOpenError: The provider's breaker is open.
+            Exception: The last error, once it is not retryable or attempts run out.
+        """
+        self._count("calls")
+        with get_tracer().span("api_call", provider=self.provider):
+            return self._call(func, *args, retry_on=retry_on, **kwargs)
+
+    def _call(self, func, *args, retry_on=is_retryable, **kwargs):
+        for attempt in range(1, self.max_attempts + 1):
+            if not self.breaker.allow():
+                self._count("rejected")
+                raise CircuitOpenError(f"{self.provider} circuit is open after repeated failures")
+            self._count("throttled_seconds", self.bucket.acquire())
+            self._count("attempts")
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                retryable = is_retryable(e)
+                # Only provider-side trouble counts against the breaker. A bad request still
+                # means the provider answered, and it must release a half-open trial slot.
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                if not retryable or not retry_on(e) or attempt == self.max_attempts:
+                    self._count("failures")
+                    raise
+                delay = self._backoff(attempt, e)
+                self._count("retries")
+                get_tracer().count("api_retries_total", provider=self.provider)
+                logging.warning(
+                    f"{self.provider} call failed ({type(e).__name__}: {e}); "
+                    f"retry {attempt}/{self.max_attempts - 1} in {delay:.1f}s."
+                )
+                self._sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    def wrap(self, func):
+        """Decorator form of `call`."""
+        def wrapper(*args, **kwargs):
+            return self.call(func, *args, **kwargs)
+
+        wrapper.__name__ = getattr(func, "__name__", "wrapper")
+        wrapper.__doc__ = getattr(func, "__doc__", None)
+        return wrapper
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {**self._stats, "circuit": self.breaker.state}
+
+
+_callers = {}
+_callers_lock = threading.Lock()
+
+
+def get_resilience(provider: str) -> ResilientCaller:
+    """Returns the process-wide ResilientCaller for `provider`, built from DEFAULT_PROVIDER_POLICIES."""
+    provider = provider.lower()
+    with _callers_lock:
+        if provider not in _callers:
+            _callers[provider] = ResilientCaller(provider, **DEFAULT_PROVIDER_POLICIES.get(provider, DEFAULT_POLICY))
+        return _callers[provider]
+
+
+def resilience_stats() -> dict:
+    """Per-provider call, retry, failure and circuit-breaker counters for this process."""
+    with _callers_lock:
+        callers = dict(_callers)
+    return {provider: caller.stats() for provider, caller in callers.items()}
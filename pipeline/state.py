@@ -0,0 +1,20 @@
+# Where pipeline components persist local state (caches, spools, checkpoints).
+import os
+import tempfile
+
+from pipeline.env import configure_environment
+
+
+configure_environment()
+
+# Point this at a Cloud Storage volume mount to keep state across Cloud Run instances.
+PIPELINE_STATE_DIR = os.getenv(
+    "PIPELINE_STATE_DIR", os.path.join(tempfile.gettempdir(), "my_genai_projects")
+)
+
+
+def state_path(*parts: str) -> str:
+    """Returns a path under the state directory, creating parent directories."""
+    path = os.path.join(PIPELINE_STATE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
@@ -0,0 +1,264 @@
+# Per-stage tracing spans and latency/payload histograms, exported as JSON or Prometheus text after each run.
+import contextvars
+import functools
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Upper bounds in seconds: fast API calls up to multi-minute deep research jobs.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 900, math.inf)
+# Upper bounds in bytes: short prompts up to full rendered reports.
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, math.inf)
+
+SPAN_SECONDS = "span_duration_seconds"
+SPAN_ERRORS = "span_errors_total"
+PAYLOAD_BYTES = "payload_bytes"
+
+
+class Histogram:
+    """Fixed-bucket histogram, Prometheus style: cumulative bucket counts plus sum and count."""
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self.max = None
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.sum += value
+        self.count += 1
+        self.max = value if self.max is None else max(self.max, value)
+
+    def cumulative(self) -> list:
+        total, result = 0, []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "max": self.max,
+            "buckets": {_format_bound(bound): total for bound, total in self.cumulative()},
+        }
+
+
+class Span:
+    """One timed operation; record payload sizes on it while it is open."""
+
+    def __init__(self, tracer: "Tracer", name: str, labels: dict):
+        self.tracer = tracer
+        self.name = name
+        self.labels = labels
+
+    def record_size(self, direction: str, payload) -> None:
+        """Observes the size of a request ("out") or response ("in") payload, in bytes."""
+        size = payload if isinstance(payload, int) else len(str(payload or "").encode("utf-8"))
+        self.tracer.observe(PAYLOAD_BYTES, size, SIZE_BUCKETS, span=self.name, direction=direction, **self.labels)
+
+
+def _format_bound(bound: float) -> str:
+    if math.isinf(bound):
+        return "+Inf"
+    return str(int(bound)) if float(bound).is_integer() else repr(float(bound))
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(label_key: tuple, extra: tuple = ()) -> str:
+    pairs = list(label_key) + list(extra)
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}" if pairs else ""
+
+
+class Tracer:
+    """
+    Collects span latencies, payload sizes and counters for one run.
+
+    Use `span(...)` as a context manager or `traced(...)` as a decorator. Make
+    a new tracer current for each run with `use_tracer(...)`, and `export(...)`
+    it at the end.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def observe(self, metric: str, value: float, buckets: tuple = LATENCY_BUCKETS, **labels) -> None:
+        key = (metric, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def count(self, metric: str, amount: float = 1, **labels) -> None:
+        key = (metric, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    @contextmanager
+    def span(self, name: str, **labels):
+        """Times the block into span_duration_seconds{span=name, ...}; errors also count span_errors_total."""
+        span = Span(self, name, labels)
+        started_at = self._clock()
+        try:
+            yield span
+        except Exception:
+            self.count(SPAN_ERRORS, span=name, **labels)
+            raise
+        finally:
+            self.observe(SPAN_SECONDS, self._clock() - started_at, span=name, **labels)
+
+    def traced(self, name: str = None, **labels):
+        """Decorator form of `span`, named after the function by default."""
+        def decorator(func):
+            span_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name, **labels):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def snapshot(self) -> dict:
+        """{"histograms": {metric: [{labels, count, sum, max, buckets}]}, "counters": {metric: [{labels, value}]}}."""
+        with self._lock:
+            histograms = {key: h.to_dict() for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+        result = {"histograms": {}, "counters": {}}
+        for (metric, label_key), data in sorted(histograms.items()):
+            result["histograms"].setdefault(metric, []).append({"labels": dict(label_key), **data})
+        for (metric, label_key), value in sorted(counters.items()):
+            result["counters"].setdefault(metric, []).append({"labels": dict(label_key), "value": value})
+        return result
+
+    def summary(self) -> dict:
+        """Compact {span: {"count", "total_s", "max_s"}} for the run log."""
+        summary = {}
+        for entry in self.snapshot()["histograms"].get(SPAN_SECONDS, []):
+            labels = dict(entry["labels"])
+            name = labels.pop("span")
+            if labels:
+                name += "[" + ",".join(f"{value}" for _, value in sorted(labels.items())) + "]"
+            summary[name] = {"count": entry["count"], "total_s": round(entry["sum"], 3), "max_s": round(entry["max"], 3)}
+        return summary
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2, sort_keys=True)
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (histograms and counters)."""
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        lines, typed = [], set()
+        for (metric, label_key), histogram in histograms:
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            for bound, total in histogram.cumulative():
+                lines.append(f"{metric}_bucket{_format_labels(label_key, (('le', _format_bound(bound)),))} {total}")
+            lines.append(f"{metric}_sum{_format_labels(label_key)} {histogram.sum:.6f}")
+            lines.append(f"{metric}_count{_format_labels(label_key)} {histogram.count}")
+        for (metric, label_key), value in counters:
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{_format_labels(label_key)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, run_key: str, metrics_dir: str) -> tuple:
+        """
+        Writes `<metrics_dir>/<run_key>.json` and `.prom`, one pair per run, so runs
+        can be compared day to day. `metrics_dir` should be persistent storage, e.g.
+        a bucket mount, not the instance's temp dir. Returns the two paths.
+        """
+        os.makedirs(metrics_dir, exist_ok=True)
+        json_path = os.path.join(metrics_dir, f"{run_key}.json")
+        prom_path = os.path.join(metrics_dir, f"{run_key}.prom")
+        with open(json_path, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+        with open(prom_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        logging.info(f"Run metrics exported to {json_path} and {prom_path}")
+        return json_path, prom_path
+
+
+# Spans recorded outside any run (e.g. local scripts) go to the process-wide tracer.
+_default_tracer = Tracer()
+# The tracer of the run being executed. A context variable rather than a global, so
+# concurrent invocations in one process each keep their own spans.
+_current_tracer = contextvars.ContextVar("current_tracer", default=None)
+
+
+def get_tracer() -> Tracer:
+    """Returns the current run's tracer (see `use_tracer`), or the process-wide one."""
+    return _current_tracer.get() or _default_tracer
+
+
+@contextmanager
+def use_tracer(tracer: Tracer):
+    """Makes `tracer` current for the block, including work it hands to `submit_in_context`."""
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
+
+
+def submit_in_context(executor, func, *args, **kwargs):
+    """
+    `executor.submit(func, ...)` running `func` in a copy of the caller's context.
+
+    Pool threads don't inherit context variables, so without this their spans
+    would go to the process-wide tracer instead of the caller's run.
+    """
+    return executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+def span(name: str, **labels):
+    """`get_tracer().span(...)`."""
+    return get_tracer().span(name, **labels)
+
+
+def traced(name: str = None, **labels):
+    """Decorator form of `span`; the tracer is looked up on every call, not when decorating."""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_tracer().span(span_name, **labels):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,151 @@
+# Vectorized per-ticker position analytics over the typed trade records.
+import numpy as np
+import pandas as pd
+
+from sheet_reader.trade_ledger import BROKER_COLUMN, OUT_DATE_COLUMN, TICKER_COLUMN
+
+
+# "Trade Records" headers of each lot's share count, per-share buy/sell prices and
+# buy date. A column is only read under its own header, never a look-alike
+# (a total "Cost" is not a per-share price); pass `columns` if the sheet differs.
+TRADE_COLUMNS = {
+    "quantity": "Quantity",
+    "in_price": "In price",
+    "out_price": "Out price",
+    "in_date": "In date",
+}
+# Without these nothing can be computed; a missing "out_price"/"in_date" only
+# leaves realized P&L/holding days unknown.
+REQUIRED_FIELDS = ("quantity", "in_price")
+
+SUMMARY_COLUMNS = (
+    # (analytics column, header, width, format)
+    ("open_qty", "Qty", 9, "{:,.0f}"),
+    ("avg_cost", "AvgCost", 10, "{:,.2f}"),
+    ("holding_days", "Days", 5, "{:.0f}"),
+    ("weight_pct", "Wt%", 6, "{:.1f}"),
+    ("realized_pnl", "RealPnL", 11, "{:+,.0f}"),
+)
+
+SUMMARY_LEGEND = (
+    "Qty: open shares; AvgCost: average cost of open lots; Days: days since the oldest open lot; "
+    "Wt%: share of the open portfolio; RealPnL: realized P&L of closed lots; '-': unknown."
+)
+
+
+def _numeric(frame: pd.DataFrame, column: str) -> pd.Series:
+    if column not in frame:
+        return pd.Series(np.nan, index=frame.index)
+    cleaned = frame[column].astype(str).str.replace(r"[$,\s]", "", regex=True)
+    return pd.to_numeric(cleaned, errors="coerce")
+
+
+def compute_position_analytics(
+    trades: pd.DataFrame,
+    broker: str = "IBKR",
+    current_prices: dict = None,
+    as_of: pd.Timestamp = None,
+    is_open: pd.Series = None,
+    columns: dict = None,
+) -> pd.DataFrame:
+    """
+    Computes per-ticker position analytics in one vectorized groupby.
+
+    Args:
+        trades (pd.DataFrame): Trade records, e.g. `TradeLedger.frame` (one row per lot).
+        broker (str): Only lots at this broker are considered; None keeps all.
+        current_prices (dict): Optional {ticker: last price}, enables unrealized P&L
+            and market-value weights. The daily pipeline has no price feed and
+            leaves it out, so its weights are by cost.
+        as_of (pd.Timestamp): Reference date for holding periods. Defaults to today.
+        is_open (pd.Series): Open-lot mask aligned with `trades`, e.g. `TradeLedger.is_open`.
+            Pass it whenever "Out date" was already parsed: a closed lot with a
+            non-date "Out date" (e.g. "sold") parses to NaT and would look open.
+        columns (dict): Overrides of `TRADE_COLUMNS`, e.g. {"quantity": "Shares"}.
+
+    Returns:
+        pd.DataFrame: Indexed by ticker with open_qty, avg_cost, cost_basis, holding_days,
+            weight_pct, realized_pnl and unrealized_pnl. Values are NaN when a cell
+            is blank or an optional column is missing.
+
+    Raises:
+        ValueError: The ticker, quantity or buy price column is missing.
+    """
+    if trades.empty:
+        return pd.DataFrame(columns=[column for column, *_ in SUMMARY_COLUMNS])
+    columns = {**TRADE_COLUMNS, **(columns or {})}
+    missing = [name for name in [TICKER_COLUMN] + [columns[field] for field in REQUIRED_FIELDS] if name not in trades]
+    if missing:
+        raise ValueError(f"Trade records lack the columns {missing}; found {list(trades.columns)}.")
+
+    if is_open is None:
+        if OUT_DATE_COLUMN in trades:
+            out_date = trades[OUT_DATE_COLUMN]
+            is_open = out_date.isna() if pd.api.types.is_datetime64_any_dtype(out_date) else out_date.astype(str).str.strip() == ""
+        else:
+            is_open = pd.Series(True, index=trades.index)
+    is_open = pd.Series(np.asarray(is_open, dtype=bool), index=trades.index)
+
+    if broker is not None and BROKER_COLUMN in trades:
+        keep = (trades[BROKER_COLUMN] == broker).to_numpy()
+        trades, is_open = trades[keep], is_open[keep]
+
+    as_of = pd.Timestamp.now().normalize() if as_of is None else pd.Timestamp(as_of)
+    quantity = _numeric(trades, columns["quantity"])
+    in_price = _numeric(trades, columns["in_price"])
+    out_price = _numeric(trades, columns["out_price"])
+    in_date = (
+        pd.to_datetime(trades[columns["in_date"]], errors="coerce")
+        if columns["in_date"] in trades else pd.Series(pd.NaT, index=trades.index)
+    )
+    tickers = trades[TICKER_COLUMN].astype(str)
+    prices = tickers.map(current_prices or {}).astype(float)
+    open_mask = is_open.to_numpy()
+
+    lots = pd.DataFrame({
+        "ticker": tickers.to_numpy(),
+        "open_qty": np.where(open_mask, quantity, 0.0),
+        "open_cost": np.where(open_mask, quantity * in_price, 0.0),
+        "open_value": np.where(open_mask, quantity * prices, np.nan),
+        "open_since": in_date.where(is_open).to_numpy(),
+        "realized_pnl": np.where(open_mask, np.nan, (out_price - in_price) * quantity),
+        "is_open": open_mask,
+    })
+    by_ticker = lots.groupby("ticker", sort=False, observed=True)
+    # min_count=1 keeps "unknown" (all NaN) distinct from a real zero.
+    grouped = by_ticker[["open_qty", "open_cost", "open_value", "realized_pnl", "is_open"]].sum(min_count=1)
+    grouped = grouped.rename(columns={"open_cost": "cost_basis", "open_value": "market_value", "is_open": "open_lots"})
+    grouped["open_since"] = by_ticker["open_since"].min()
+
+    grouped["avg_cost"] = grouped["cost_basis"] / grouped["open_qty"].replace(0, np.nan)
+    grouped["holding_days"] = (as_of - grouped["open_since"]).dt.days
+    grouped["unrealized_pnl"] = grouped["market_value"] - grouped["cost_basis"]
+
+    # Weights use market value when every open position has a price, cost otherwise.
+    open_positions = grouped["open_lots"] > 0
+    weight_base = grouped["market_value"] if grouped.loc[open_positions, "market_value"].notna().all() else grouped["cost_basis"]
+    total = weight_base[open_positions].sum()
+    grouped["weight_pct"] = np.where(open_positions & (total > 0), weight_base / total * 100, np.nan)
+    return grouped
+
+
+def format_summary_table(analytics: pd.DataFrame, tickers: list = None) -> str:
+    """
+    Renders a compact fixed-width table for LLM prompts; missing values print as "-".
+
+    Args:
+        analytics (pd.DataFrame): Output of `compute_position_analytics`.
+        tickers (list): Optional subset and order of tickers to include.
+    """
+    if tickers is not None:
+        analytics = analytics.reindex([ticker for ticker in tickers])
+    ticker_width = max([6] + [len(str(ticker)) for ticker in analytics.index])
+
+    lines = [f"{'Ticker':<{ticker_width}}" + "".join(f"{header:>{width}}" for _, header, width, _ in SUMMARY_COLUMNS)]
+    for ticker, row in analytics.iterrows():
+        cells = []
+        for column, _, width, fmt in SUMMARY_COLUMNS:
+            value = row.get(column, np.nan)
+            cells.append(f"{'-' if pd.isna(value) else fmt.format(value):>{width}}")
+        lines.append(f"{str(ticker):<{ticker_width}}" + "".join(cells))
+    return "\n".join(lines)
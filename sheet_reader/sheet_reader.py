@@ -1,16 +1,41 @@
 # Reads data in google sheet.
+import logging
 import os
+import time
 import gspread
 from google.oauth2.service_account import Credentials
 import pandas as pd
 
+from pipeline.resilience import get_resilience
+from pipeline.tracing import traced
+from sheet_reader.snapshot_cache import WorksheetSnapshotCache
+from sheet_reader.trade_ledger import BROKER_COLUMN, OUT_DATE_COLUMN, TICKER_COLUMN, TradeLedger
+
+# Append-only worksheets are fully re-downloaded at least this often.
+FULL_RESYNC_SECONDS = 7 * 24 * 3600
+# Name of the typed trade ledger stored next to the "Trade Records" snapshot.
+TRADE_LEDGER_CACHE_NAME = "trade_ledger"
+
 class GoogleSheetReader:
-    def __init__(self, creds_json_path: str, sheet_name: str):
+    def __init__(self, creds_json_path: str, sheet_name: str, spreadsheet=None,
+                 snapshot_cache: WorksheetSnapshotCache = None, use_snapshot_cache: bool = True):
+        """
+        spreadsheet: optional already-opened (or fake) gspread Spreadsheet; skips authorization.
+        snapshot_cache: local worksheet snapshots, reused while the sheet is unchanged.
+        """
         self.creds_json_path = creds_json_path
         self.sheet_name = sheet_name
+        # Worksheet handles by name; each `sheet.worksheet()` lookup is an API call.
+        self._worksheets = {}
+        self.snapshot_cache = (snapshot_cache or WorksheetSnapshotCache()) if use_snapshot_cache else None
+        self._revision = None
+        if spreadsheet is not None:
+            self.client = None
+            self.sheet = spreadsheet
+            return
         self.client = self._authorize()
         # self.sheet = self.client.open(sheet_name)
-        self.sheet = self.client.open_by_key('1-0oWrYrm4HcSl8ReYzth6vIqfqRhQFM0ORaBWgiWPkg') # Points to the "be_richer" sheet.
+        self.sheet = self._api(self.client.open_by_key, '1-0oWrYrm4HcSl8ReYzth6vIqfqRhQFM0ORaBWgiWPkg') # Points to the "be_richer" sheet.
 
     def _authorize(self):
         scopes = [
@@ -20,64 +45,208 @@ class GoogleSheetReader:
         creds = Credentials.from_service_account_file(self.creds_json_path, scopes=scopes)
         return gspread.authorize(creds)
 
+    @staticmethod
+    def _api(func, *args, **kwargs):
+        """Calls the Sheets API through the shared rate limit, retries and circuit breaker."""
+        return get_resilience("sheets").call(func, *args, **kwargs)
+
+    def _worksheet(self, worksheet_name: str):
+        """Returns the worksheet handle, fetching the spreadsheet metadata only once per name."""
+        worksheet = self._worksheets.get(worksheet_name)
+        if worksheet is None:
+            worksheet = self._api(self.sheet.worksheet, worksheet_name)
+            self._worksheets[worksheet_name] = worksheet
+        return worksheet
+
+    def batch_read(self, worksheet_name: str, ranges: list, major_dimension: str = None):
+        """
+        Reads any number of A1 ranges from one worksheet in a single API round trip.
+
+        ranges: list of A1 ranges (e.g., ['A1', 'B2:C4', 'D:D', '3:3'])
+        major_dimension: 'ROWS' (default) or 'COLUMNS'
+        """
+        if not ranges:
+            return []
+        worksheet = self._worksheet(worksheet_name)
+        return self._api(worksheet.batch_get, list(ranges), major_dimension=major_dimension)
+
+    def revision(self):
+        """
+        Returns the spreadsheet's Drive modifiedTime, fetched once per reader.
+
+        This is one cheap metadata call; None when it cannot be read.
+        """
+        if self._revision is None:
+            try:
+                self._revision = self._api(self.sheet.get_lastUpdateTime)
+            except Exception as e:
+                logging.warning(f"Could not read the spreadsheet revision, skipping snapshot cache: {e}")
+        return self._revision
+
     def read_worksheet(self, worksheet_name: str = "Sheet1"):
-        worksheet = self.sheet.worksheet(worksheet_name)
-        return worksheet.get_all_values()
+        revision = self.revision() if self.snapshot_cache else None
+        if revision:
+            rows = self.snapshot_cache.load(self.sheet.id, worksheet_name, revision)
+            if rows is not None:
+                logging.info(f"Worksheet {worksheet_name} unchanged since {revision}, using local snapshot.")
+                return rows
+
+        worksheet = self._worksheet(worksheet_name)
+        rows = self._api(worksheet.get_all_values)
+        if revision:
+            self.snapshot_cache.save(self.sheet.id, worksheet_name, revision, rows)
+        return rows
 
     def read_columns(self, worksheet_name: str, columns: list):
         """
         columns: list of column letters or indices (e.g., ['A', 'C'] or [1, 3])
         """
-        worksheet = self.sheet.worksheet(worksheet_name)
-        data = []
+        ranges = []
         for col in columns:
             if isinstance(col, int):
-                col_letter = gspread.utils.rowcol_to_a1(1, col)[0]
+                col_letter = gspread.utils.rowcol_to_a1(1, col).rstrip("0123456789")
             else:
                 col_letter = col
-            col_values = worksheet.col_values(gspread.utils.a1_to_rowcol(f"{col_letter}1")[1])
-            data.append(col_values)
-        return data
+            ranges.append(f"{col_letter}:{col_letter}")
+        value_ranges = self.batch_read(worksheet_name, ranges, major_dimension=gspread.utils.Dimension.cols)
+        return [value_range[0] if value_range else [] for value_range in value_ranges]
 
     def read_rows(self, worksheet_name: str, rows: list):
         """
         rows: list of row indices (1-based)
         """
-        worksheet = self.sheet.worksheet(worksheet_name)
-        data = []
-        for row in rows:
-            data.append(worksheet.row_values(row))
-        return data
+        value_ranges = self.batch_read(worksheet_name, [f"{row}:{row}" for row in rows])
+        return [value_range[0] if value_range else [] for value_range in value_ranges]
 
     def read_cells(self, worksheet_name: str, cells: list):
         """
         cells: list of cell addresses (e.g., ['A1', 'B2'])
         """
-        worksheet = self.sheet.worksheet(worksheet_name)
-        data = []
-        for cell in cells:
-            data.append(worksheet.acell(cell).value)
-        return data
+        value_ranges = self.batch_read(worksheet_name, cells)
+        return [value_range.first() for value_range in value_ranges]
     
+    def sync_append_only_worksheet(self, worksheet_name: str, mutable_columns: tuple = (OUT_DATE_COLUMN,)):
+        """
+        Returns all rows of an append-only worksheet, downloading only what changed.
+
+        When the spreadsheet changed since the local snapshot, a single batch read
+        fetches the header, the rows appended after the last known row count, and
+        the `mutable_columns` of the known rows (e.g. "Out date", filled in when a
+        position is closed). A full download happens when there is no snapshot,
+        the header changed, or the last full sync is older than FULL_RESYNC_SECONDS,
+        which also picks up edits elsewhere and deleted rows.
+        """
+        rows, _, _ = self._sync_append_only(worksheet_name, mutable_columns)
+        return rows
+
+    def _sync_append_only(self, worksheet_name: str, mutable_columns: tuple = (OUT_DATE_COLUMN,)) -> tuple:
+        """
+        `sync_append_only_worksheet`, also describing what changed.
+
+        Returns:
+            tuple: (rows, revision, delta). `revision` is None when the snapshot cache
+                is not used. `delta` is (snapshot revision, appended rows, {column: current
+                values of the known data rows}) when the rows were brought up to date
+                from the snapshot, or None after a full download.
+        """
+        revision = self.revision() if self.snapshot_cache else None
+        if not revision:
+            return self.read_worksheet(worksheet_name), None, None
+
+        snapshot = self.snapshot_cache.load_snapshot(self.sheet.id, worksheet_name)
+        if snapshot is not None and snapshot.get("revision") == revision:
+            logging.info(f"Worksheet {worksheet_name} unchanged since {revision}, using local snapshot.")
+            return snapshot["rows"], revision, (revision, [], {})
+
+        now = time.time()
+        if (snapshot is None or len(snapshot["rows"]) < 1
+                or now - snapshot.get("full_sync_at", 0) > FULL_RESYNC_SECONDS):
+            rows = self._api(self._worksheet(worksheet_name).get_all_values)
+            self.snapshot_cache.save(self.sheet.id, worksheet_name, revision, rows, full_sync_at=now)
+            return rows, revision, None
+
+        rows = snapshot["rows"]
+        header = rows[0]
+        known_count = len(rows)
+        last_col = gspread.utils.rowcol_to_a1(1, len(header)).rstrip("0123456789")
+        mutable = [(header.index(column), column) for column in mutable_columns if column in header]
+
+        ranges = ["1:1", f"A{known_count + 1}:{last_col}"]
+        for index, _ in mutable:
+            col_letter = gspread.utils.rowcol_to_a1(1, index + 1).rstrip("0123456789")
+            ranges.append(f"{col_letter}2:{col_letter}{known_count}")
+        value_ranges = self.batch_read(worksheet_name, ranges)
+
+        current_header = value_ranges[0][0] if value_ranges[0] else []
+        if [cell for cell in header if cell] != [cell for cell in current_header if cell]:
+            logging.info(f"Worksheet {worksheet_name} header changed, doing a full sync.")
+            rows = self._api(self._worksheet(worksheet_name).get_all_values)
+            self.snapshot_cache.save(self.sheet.id, worksheet_name, revision, rows, full_sync_at=now)
+            return rows, revision, None
+
+        rows = [list(row) for row in rows]
+        for (index, _), value_range in zip(mutable, value_ranges[2:]):
+            for offset, row in enumerate(rows[1:]):
+                cells = value_range[offset] if offset < len(value_range) else []
+                row[index] = cells[0] if cells else ""
+
+        width = len(header)
+        appended = [(list(row) + [""] * width)[:width] for row in value_ranges[1]]
+        rows.extend(appended)
+        logging.info(f"Synced {worksheet_name}: {len(appended)} appended row(s), {known_count} known row(s).")
+        self.snapshot_cache.save(
+            self.sheet.id, worksheet_name, revision, rows, full_sync_at=snapshot.get("full_sync_at", now)
+        )
+        mutable_values = {column: [row[index] for row in rows[1:known_count]] for index, column in mutable}
+        return rows, revision, (snapshot.get("revision"), appended, mutable_values)
+
+    @traced()
+    def read_trade_ledger(self, worksheet_name: str = "Trade Records") -> TradeLedger:
+        """
+        Typed, indexed trade records, synced incrementally.
+
+        The typed ledger is stored next to the worksheet snapshot. When the rows were
+        brought up to date from that snapshot, only the appended rows and changed
+        "Out date" cells are parsed into it; a full download rebuilds it.
+        """
+        rows, revision, delta = self._sync_append_only(worksheet_name)
+        if not rows:
+            return TradeLedger([BROKER_COLUMN, TICKER_COLUMN, OUT_DATE_COLUMN], [])
+        if not revision:
+            return TradeLedger(rows[0], rows[1:])
+
+        cached_revision, ledger = self.snapshot_cache.load_derived(
+            self.sheet.id, worksheet_name, TRADE_LEDGER_CACHE_NAME)
+        if (delta is not None and ledger is not None and cached_revision == delta[0]
+                and ledger.header == rows[0] and ledger.row_count + len(delta[1]) == len(rows) - 1):
+            if cached_revision == revision:
+                return ledger
+            ledger.apply_sync(delta[1], delta[2])
+        else:
+            ledger = TradeLedger(rows[0], rows[1:])
+        try:
+            self.snapshot_cache.save_derived(self.sheet.id, worksheet_name, TRADE_LEDGER_CACHE_NAME, revision, ledger)
+        except Exception as e:
+            logging.warning(f"Could not store the typed trade ledger: {e}")
+        return ledger
+
     def read_my_portfolio(self, worksheet_name: str = "Trade Records"):
         """Read my holdings to decide when to close positions.
         """
         # worksheet_data in array format.
-        worksheet_data = self.read_worksheet(worksheet_name)
+        worksheet_data = self.sync_append_only_worksheet(worksheet_name)
 
         if not worksheet_data or len(worksheet_data) < 2:
             return pd.DataFrame()  # Return empty DataFrame if no data.
         df = pd.DataFrame(worksheet_data[1:], columns=worksheet_data[0])
         return df
     
+    @traced()
     def read_my_current_holdings(self) -> pd.Series:
         """From my portfolio, filter current holdings.
         """
-        my_portfolio = self.read_my_portfolio()
         # Filter condition: US stock, no out date, no duplicate tickers.
-        return my_portfolio[
-            (my_portfolio["Broker"] == "IBKR") & (my_portfolio["Out date"] == "")
-        ]["Ticker"].drop_duplicates().reset_index(drop=True)
+        return self.read_trade_ledger().current_holdings(broker="IBKR")
     
     def read_my_watchlist(self, worksheet_name: str = "Stock Eval"):
         """Read my watchlist to decide when to open positions.
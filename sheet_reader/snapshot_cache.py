@@ -0,0 +1,84 @@
+# Local, revision-checked snapshots of Google Sheets worksheets.
+import gzip
+import hashlib
+import json
+import logging
+import os
+import pickle
+
+from pipeline.state import PIPELINE_STATE_DIR
+
+
+class WorksheetSnapshotCache:
+    """
+    Stores `get_all_values()` results as gzip-compressed, column-oriented JSON files.
+
+    Each snapshot records the spreadsheet revision (Drive `modifiedTime`) it was
+    taken at; a snapshot is only served while that revision is still current.
+    Objects derived from a snapshot (e.g. a typed trade ledger) are pickled next
+    to it with the revision they match.
+    """
+
+    def __init__(self, cache_dir: str = None):
+        self.cache_dir = cache_dir or os.path.join(PIPELINE_STATE_DIR, "sheet_snapshots")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, spreadsheet_id: str, worksheet_name: str, suffix: str = ".json.gz") -> str:
+        digest = hashlib.sha256(f"{spreadsheet_id}/{worksheet_name}".encode("utf-8")).hexdigest()[:24]
+        return os.path.join(self.cache_dir, f"{digest}{suffix}")
+
+    def load_snapshot(self, spreadsheet_id: str, worksheet_name: str):
+        """Returns the stored snapshot dict ("revision", "rows" and any extra fields), or None."""
+        path = self._path(spreadsheet_id, worksheet_name)
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable sheet snapshot {path}: {e}")
+            return None
+        snapshot["rows"] = self._to_rows(snapshot)
+        return snapshot
+
+    def load(self, spreadsheet_id: str, worksheet_name: str, revision: str):
+        """Returns the snapshot rows, or None when missing or taken at another revision."""
+        snapshot = self.load_snapshot(spreadsheet_id, worksheet_name)
+        if snapshot is None or snapshot.get("revision") != revision:
+            return None
+        return snapshot["rows"]
+
+    def save(self, spreadsheet_id: str, worksheet_name: str, revision: str, rows: list, **extra) -> None:
+        width = max((len(row) for row in rows), default=0)
+        columns = [[row[i] if i < len(row) else "" for row in rows] for i in range(width)]
+        snapshot = {**extra, "revision": revision, "row_count": len(rows), "columns": columns}
+
+        path = self._path(spreadsheet_id, worksheet_name)
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def load_derived(self, spreadsheet_id: str, worksheet_name: str, name: str) -> tuple:
+        """Returns (revision, object) stored by `save_derived`, or (None, None) when missing or unreadable."""
+        path = self._path(spreadsheet_id, worksheet_name, f".{name}.pkl")
+        if not os.path.exists(path):
+            return None, None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable {name} cache {path}: {e}")
+            return None, None
+
+    def save_derived(self, spreadsheet_id: str, worksheet_name: str, name: str, revision: str, value) -> None:
+        path = self._path(spreadsheet_id, worksheet_name, f".{name}.pkl")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((revision, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _to_rows(snapshot: dict) -> list:
+        columns = snapshot.get("columns", [])
+        return [list(row) for row in zip(*columns)] if columns else [[] for _ in range(snapshot.get("row_count", 0))]
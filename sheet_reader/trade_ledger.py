@@ -0,0 +1,121 @@
+# Typed, indexed copy of the "Trade Records" tab.
+import pandas as pd
+
+
+BROKER_COLUMN = "Broker"
+TICKER_COLUMN = "Ticker"
+OUT_DATE_COLUMN = "Out date"
+CATEGORICAL_COLUMNS = (BROKER_COLUMN, TICKER_COLUMN)
+
+
+class TradeLedger:
+    """
+    Trade records with categorical Broker/Ticker columns, parsed date columns and
+    a prebuilt index of open positions (rows with an empty "Out date").
+
+    Looking up current holdings only touches the open-position index, so it
+    stays proportional to the number of open positions, not the trade history.
+    The ledger pickles as is, so it can be stored next to the worksheet snapshot
+    and brought up to date with `apply_sync` instead of being rebuilt every run.
+    """
+
+    def __init__(self, header: list, rows: list):
+        """
+        Args:
+            header (list): Column names from the first sheet row.
+            rows (list): Data rows as lists of strings (ragged rows are padded).
+        """
+        self.header = list(header)
+        frame, raw_out_dates = self._typed_frame(self._pad(rows))
+        self._set(frame, raw_out_dates)
+
+    def _pad(self, rows: list) -> list:
+        width = len(self.header)
+        return [(list(row) + [""] * width)[:width] for row in rows]
+
+    def _typed_frame(self, padded: list, categories: dict = None) -> tuple:
+        """(typed frame, raw "Out date" cells) for raw rows; `categories` fixes categorical columns."""
+        frame = pd.DataFrame(padded, columns=self.header)
+        raw_out_dates = frame[OUT_DATE_COLUMN].astype(object) if OUT_DATE_COLUMN in frame else None
+        for column in CATEGORICAL_COLUMNS:
+            if column in frame:
+                if categories and column in categories:
+                    frame[column] = pd.Categorical(frame[column], categories=categories[column])
+                else:
+                    frame[column] = frame[column].astype("category")
+        for column in self.date_columns():
+            frame[column] = pd.to_datetime(frame[column], errors="coerce")
+        return frame, raw_out_dates
+
+    def _set(self, frame: pd.DataFrame, raw_out_dates: pd.Series) -> None:
+        self.frame = frame
+        self.row_count = len(frame)
+        # The open/closed decision uses the raw cell, so an unparseable date is never "open".
+        self.raw_out_dates = raw_out_dates
+        if raw_out_dates is not None:
+            is_open = raw_out_dates.str.strip() == ""
+        else:
+            is_open = pd.Series(True, index=frame.index)
+        # Aligned with `frame`; reuse it instead of re-deriving "open" from the parsed dates.
+        self.is_open = is_open
+        self.open_positions = frame[is_open.to_numpy()]
+
+    def date_columns(self) -> list:
+        return [column for column in self.header if "date" in column.lower()]
+
+    def apply_sync(self, appended: list, mutable: dict = None) -> None:
+        """
+        Brings the ledger up to date from an incremental worksheet sync.
+
+        Only the appended rows and the changed "Out date" cells are parsed; the
+        typed columns of the other rows are kept as they are.
+
+        Args:
+            appended (list): Raw rows added after the rows the ledger already has.
+            mutable (dict): {column: raw values of every known data row}, e.g. the
+                current "Out date" cells, as read back by the sync.
+        """
+        frame, raw_out_dates = self.frame, self.raw_out_dates
+        for column, values in (mutable or {}).items():
+            if column not in self.header:
+                continue
+            raw = pd.Series((list(values) + [""] * self.row_count)[:self.row_count], index=frame.index, dtype=object,
+                            name=column)
+            changed = raw != raw_out_dates if column == OUT_DATE_COLUMN else pd.Series(True, index=frame.index)
+            if column == OUT_DATE_COLUMN:
+                raw_out_dates = raw
+            if changed.any():
+                frame = frame.copy()
+                if column in self.date_columns():
+                    frame.loc[changed, column] = pd.to_datetime(raw[changed], errors="coerce")
+                    continue
+                if isinstance(frame[column].dtype, pd.CategoricalDtype):
+                    added = pd.Index(raw[changed].unique()).difference(frame[column].cat.categories)
+                    frame[column] = frame[column].cat.add_categories(added)
+                frame.loc[changed, column] = raw[changed]
+
+        if appended:
+            new_rows = self._pad(appended)
+            categories = {}
+            for column in CATEGORICAL_COLUMNS:
+                if column in frame:
+                    index = self.header.index(column)
+                    added = pd.Index(sorted({row[index] for row in new_rows})).difference(frame[column].cat.categories)
+                    if len(added):
+                        frame = frame.copy()
+                        frame[column] = frame[column].cat.add_categories(added)
+                    categories[column] = frame[column].cat.categories
+            new_frame, new_out_dates = self._typed_frame(new_rows, categories)
+            frame = pd.concat([frame, new_frame], ignore_index=True)
+            if raw_out_dates is not None:
+                raw_out_dates = pd.concat([raw_out_dates, new_out_dates], ignore_index=True)
+        self._set(frame, raw_out_dates)
+
+    def current_holdings(self, broker: str = "IBKR") -> pd.Series:
+        """Unique tickers of open positions at `broker`, in sheet order."""
+        open_positions = self.open_positions
+        if broker is not None and BROKER_COLUMN in open_positions:
+            open_positions = open_positions[open_positions[BROKER_COLUMN] == broker]
+        return (
+            open_positions[TICKER_COLUMN].astype(str).drop_duplicates().reset_index(drop=True)
+        )
@@ -0,0 +1,120 @@
+import pipeline.state
+from morning_stock_research.chatgpt import AskChatGPT, local_batch_backend, parse_batch_output
+from morning_stock_research.gemini import build_gemini_batch_lines, local_gemini_batch_backend, parse_gemini_batch_output
+from pipeline.batch import collect_durable_batches, submit_durable_batch, submit_prompt_batch
+from pipeline.deep_research_jobs import DeepResearchJobManager
+from pipeline.job_registry import DELIVERED, FAILED, JobRegistry
+
+
+class FakeBatchBackend:
+    """Batch endpoint whose jobs finish only when the test says so."""
+
+    def __init__(self):
+        self.submitted = []
+        self.outputs = {}
+
+    def submit(self, path):
+        job_id = f"batch-{len(self.submitted) + 1}"
+        self.submitted.append(path)
+        return job_id
+
+    def poll(self, job_id):
+        output = self.outputs.get(job_id)
+        return output is not None, output
+
+
+def parse_output(line):
+    return line["id"], line["text"]
+
+
+def test_batch_is_submitted_once_and_collected_on_a_later_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline.state, "PIPELINE_STATE_DIR", str(tmp_path))
+    registry = JobRegistry(str(tmp_path / "jobs.sqlite3"))
+    backend = FakeBatchBackend()
+    backend_for = lambda provider: (backend, parse_output)
+    lines = [{"id": "AAPL,MSFT", "prompt": "p1"}, {"id": "NVDA", "prompt": "p2"}]
+
+    job_id = submit_durable_batch(registry, "holdings-batch-2026-10-16", "chatgpt", lines, backend)
+    # A retried run does not submit the same batch again.
+    assert submit_durable_batch(registry, "holdings-batch-2026-10-16", "chatgpt", lines, backend) == job_id
+    assert len(backend.submitted) == 1
+
+    # Still running: nothing to collect, and the job stays pending.
+    assert collect_durable_batches(registry, "holdings-batch-", backend_for) == []
+
+    backend.outputs[job_id] = [{"id": "AAPL,MSFT", "text": "a"}, {"id": "NVDA", "text": "b"}]
+    collected = collect_durable_batches(registry, "holdings-batch-", backend_for)
+    assert collected == [("holdings-batch-2026-10-16", {"AAPL,MSFT": "a", "NVDA": "b"})]
+
+    registry.record_finished("holdings-batch-2026-10-16", DELIVERED)
+    assert collect_durable_batches(registry, "holdings-batch-", backend_for) == []
+    # A delivered batch is not resubmitted either.
+    submit_durable_batch(registry, "holdings-batch-2026-10-16", "chatgpt", lines, backend)
+    assert len(backend.submitted) == 1
+
+
+def test_failed_batch_is_recorded_and_not_collected(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline.state, "PIPELINE_STATE_DIR", str(tmp_path))
+    registry = JobRegistry(str(tmp_path / "jobs.sqlite3"))
+    backend = FakeBatchBackend()
+    job_id = submit_durable_batch(registry, "holdings-batch-2026-10-16", "gemini", [{"id": "x"}], backend)
+    backend.outputs[job_id] = "Error generating Gemini batch response: batch JOB_STATE_FAILED"
+
+    assert collect_durable_batches(registry, "holdings-batch-", lambda provider: (backend, parse_output)) == []
+    assert registry.lookup("holdings-batch-2026-10-16", statuses=(FAILED,))["result"].startswith("Error generating")
+
+
+def test_find_matches_the_key_prefix_literally(tmp_path):
+    registry = JobRegistry(str(tmp_path / "jobs.sqlite3"))
+    registry.record_submitted("holdings-batch-1", "chatgpt", "b1", 3600)
+    registry.record_submitted("holdingsXbatch-2", "chatgpt", "b2", 3600)
+
+    assert [job["job_id"] for job in registry.find("holdings-batch-")] == ["b1"]
+
+
+class ReorderedOutput:
+    """Backend wrapper whose output lines come back reversed and without the first request's line."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def submit(self, path):
+        return self.backend.submit(path)
+
+    def poll(self, job_id):
+        finished, output = self.backend.poll(job_id)
+        return finished, output[:0:-1] if finished else output
+
+
+def fast_manager():
+    return DeepResearchJobManager(min_poll_seconds=0.01, max_poll_seconds=0.01)
+
+
+def test_local_openai_batch_matches_answers_back_to_their_ids(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline.state, "PIPELINE_STATE_DIR", str(tmp_path))
+    backend = local_batch_backend(lambda prompt: f"answer to {prompt}")
+    prompts = ["AAPL?", "MSFT?", "NVDA?"]
+    ids = ["aapl", "msft", "nvda"]
+
+    futures = submit_prompt_batch(
+        "chatgpt", AskChatGPT.batch_lines(prompts, ids), ReorderedOutput(backend), parse_batch_output, ids,
+        manager=fast_manager())
+
+    assert [future.result(timeout=5) for future in futures] == [
+        "Error generating batch response: no result for request aapl.", "answer to MSFT?", "answer to NVDA?"]
+    [(_, submitted_lines)] = backend.submitted
+    assert [line["custom_id"] for line in submitted_lines] == ids
+
+
+def test_local_gemini_batch_parses_each_keyed_line(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline.state, "PIPELINE_STATE_DIR", str(tmp_path))
+    backend = local_gemini_batch_backend(lambda metaprompt: f"{len(metaprompt)} chars")
+    prompts = ["short", "a longer prompt"]
+
+    futures = submit_prompt_batch(
+        "gemini", build_gemini_batch_lines(prompts, ["k1", "k2"]), backend, parse_gemini_batch_output, ["k1", "k2"],
+        manager=fast_manager())
+
+    first, second = [future.result(timeout=5) for future in futures]
+    assert first.endswith(" chars") and second.endswith(" chars")
+    assert int(second.split()[0]) - int(first.split()[0]) == len("a longer prompt") - len("short")
@@ -0,0 +1,36 @@
+import os
+import time
+
+from pipeline.checkpoint import RunCheckpoint, event_time, make_run_key
+
+
+def test_run_key_comes_from_the_event_not_the_clock():
+    scheduled_at = event_time("2026-10-16T23:59:30Z")
+
+    assert scheduled_at.weekday() == 4
+    assert make_run_key(scheduled_at.strftime("%Y-%m-%d"), "evt/1") == "2026-10-16-evt_1"
+    assert make_run_key("2026-10-16") == "2026-10-16-local"
+
+
+def test_saved_stages_load_back_and_unreadable_ones_count_as_missing(tmp_path):
+    checkpoint = RunCheckpoint("2026-10-16-evt", root_dir=str(tmp_path))
+    checkpoint.save("fetch_trends", {"posts": [1, 2]})
+    with open(os.path.join(checkpoint.run_dir, "render.pkl"), "wb") as f:
+        f.write(b"truncated")
+
+    assert checkpoint.load("fetch_trends") == (True, {"posts": [1, 2]})
+    assert checkpoint.load("render") == (False, None)
+    assert checkpoint.load("missing") == (False, None)
+    assert checkpoint.completed_stages() == ["fetch_trends", "render"]
+    assert not any(name.endswith(".tmp") for name in os.listdir(checkpoint.run_dir))
+
+
+def test_prune_keeps_the_current_run(tmp_path):
+    old = RunCheckpoint("2026-10-01-evt", root_dir=str(tmp_path))
+    current = RunCheckpoint("2026-10-16-evt", root_dir=str(tmp_path))
+    week_ago = time.time() - 7 * 24 * 60 * 60
+    os.utime(old.run_dir, (week_ago, week_ago))
+    os.utime(current.run_dir, (week_ago, week_ago))
+
+    assert current.prune(max_age_days=3) == 1
+    assert os.listdir(tmp_path) == ["2026-10-16-evt"]
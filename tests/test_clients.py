@@ -0,0 +1,75 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from pipeline.clients import ClientRegistry, connection_stats, get_gemini_client, get_openai_client
+
+
+class Client:
+    pass
+
+
+def test_borrowed_clients_are_never_shared_between_threads():
+    registry = ClientRegistry()
+    both_borrowed = threading.Barrier(2)
+    borrowed = []
+
+    def use():
+        with registry.borrow("reddit", Client, "id") as client:
+            borrowed.append(client)
+            both_borrowed.wait(timeout=5)
+
+    threads = [threading.Thread(target=use) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert borrowed[0] is not borrowed[1]
+
+    # Once returned, idle clients are reused instead of building new ones.
+    with registry.borrow("reddit", Client, "id") as client:
+        assert client in borrowed
+    assert registry.stats()["reddit"] == {"created": 2, "reused": 1}
+
+
+def test_shared_client_is_built_once():
+    registry = ClientRegistry()
+    first = registry.get("openai", Client, "key")
+    assert registry.get("openai", Client, "key") is first
+    assert registry.get("openai", Client, "other key") is not first
+    assert registry.stats()["openai"] == {"created": 2, "reused": 1}
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_connection_stats_count_pooled_connections_of_a_nested_session():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    sdk_client = Client()
+    sdk_client._core = Client()
+    sdk_client._core._http = requests.Session()
+    try:
+        for _ in range(3):
+            sdk_client._core._http.get(f"http://127.0.0.1:{server.server_port}/").raise_for_status()
+        assert connection_stats(sdk_client) == {"open_connections": 1, "connections_opened": 1, "requests": 3}
+    finally:
+        sdk_client._core._http.close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_sdk_clients_leave_retries_to_the_resilient_caller():
+    assert get_openai_client("sk-test").max_retries == 0
+    assert get_gemini_client("test-key")._api_client._http_options.retry_options.attempts == 1
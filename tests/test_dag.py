@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+from pipeline.checkpoint import RunCheckpoint
+from pipeline.dag import Pipeline
+from pipeline.tracing import SPAN_SECONDS, get_tracer
+
+
+def test_independent_stages_run_in_parallel():
+    both_started = threading.Barrier(2)
+    pipeline = Pipeline(max_workers=2)
+    pipeline.add_stage("a", lambda _: both_started.wait(timeout=5) is not None)
+    pipeline.add_stage("b", lambda _: both_started.wait(timeout=5) is not None)
+    pipeline.add_stage("merge", lambda r: r["a"] and r["b"], depends_on=["a", "b"])
+
+    result = pipeline.run()
+
+    assert result.ok
+    assert result.results["merge"] is True
+
+
+def test_failed_stage_skips_only_its_dependents():
+    def fail(_):
+        raise RuntimeError("boom")
+
+    pipeline = Pipeline()
+    pipeline.add_stage("broken", fail)
+    pipeline.add_stage("after_broken", lambda r: "never", depends_on=["broken"])
+    pipeline.add_stage("unrelated", lambda _: "done")
+
+    result = pipeline.run()
+
+    assert isinstance(result.errors["broken"], RuntimeError)
+    assert result.skipped == ["after_broken"]
+    assert result.results["unrelated"] == "done"
+
+
+def test_invalid_graphs_are_rejected():
+    pipeline = Pipeline()
+    pipeline.add_stage("a", lambda r: r, depends_on=["b"])
+    pipeline.add_stage("b", lambda r: r, depends_on=["a"])
+    with pytest.raises(ValueError, match="cycle"):
+        pipeline.run()
+    with pytest.raises(ValueError, match="Duplicate"):
+        pipeline.add_stage("a", lambda r: r)
+    with pytest.raises(ValueError, match="unknown"):
+        Pipeline().add_stage("a", lambda r: r, depends_on=["missing"]).run()
+
+
+def test_retry_restores_checkpointed_stages_and_reruns_the_rest(tmp_path):
+    calls = []
+
+    def build():
+        pipeline = Pipeline()
+        pipeline.add_stage("fetch", lambda _: calls.append("fetch") or [1, 2])
+        pipeline.add_stage(
+            "ask", lambda r: calls.append("ask") or "Error generating response", depends_on=["fetch"],
+            checkpoint=lambda response: not response.startswith("Error"))
+        pipeline.add_stage("email", lambda r: calls.append("email") or r["ask"], depends_on=["ask"], run_once=True)
+        return pipeline
+
+    build().run(checkpoint=RunCheckpoint("run", root_dir=str(tmp_path)))
+    result = build().run(checkpoint=RunCheckpoint("run", root_dir=str(tmp_path)))
+
+    assert result.restored == ["fetch", "email"]
+    # "ask" is asked again, but the email already went out in the first attempt.
+    assert calls == ["fetch", "ask", "email", "ask"]
+
+
+def test_run_once_stage_runs_again_in_another_run(tmp_path):
+    calls = []
+    for run_key in ("run-1", "run-1", "run-2"):
+        pipeline = Pipeline().add_stage("email", lambda _: calls.append("email"), run_once=True)
+        pipeline.run(checkpoint=RunCheckpoint(run_key, root_dir=str(tmp_path)))
+
+    assert calls == ["email", "email"]
+
+
+def test_each_stage_is_traced():
+    get_tracer().reset()
+    Pipeline().add_stage("only_stage", lambda _: None).run()
+
+    spans = get_tracer().snapshot()["histograms"][SPAN_SECONDS]
+    assert {"span": "pipeline_stage", "stage": "only_stage"} in [entry["labels"] for entry in spans]
@@ -0,0 +1,38 @@
+from trend_watcher.dedup import cluster_near_duplicates, near_duplicate_groups
+from trend_watcher.trend_sources import TrendItem
+
+
+TITLES = [
+    "NVDA earnings beat estimates data center revenue doubles",
+    "Fed holds interest rates steady signals two cuts later this year",
+    "NVDA earnings beat estimates, data center revenue doubles!!",
+    "Tesla recalls cybertruck over accelerator pedal issue",
+    "$NVDA earnings beat estimates data center revenue doubles again",
+    "Apple unveils new iPhone lineup with satellite messaging",
+]
+
+
+def test_reworded_titles_are_grouped_and_distinct_ones_stay_apart():
+    assert near_duplicate_groups(TITLES) == [[0, 2, 4], [1], [3], [5]]
+
+
+def test_short_titles_are_never_merged():
+    assert near_duplicate_groups(["NVDA moon", "NVDA moon", "NVDA moon"]) == [[0], [1], [2]]
+
+
+def test_representative_is_the_most_engaged_member_whatever_the_input_order():
+    items = [
+        TrendItem("reddit", TITLES[0], score=10, comments=1, item_id="a"),
+        TrendItem("reddit", TITLES[1], score=50, item_id="fed"),
+        TrendItem("reddit", TITLES[2], score=40, comments=2, item_id="b"),
+        TrendItem("youtube", TITLES[4], score=46, item_id="c"),
+    ]
+
+    clustered = cluster_near_duplicates(items)
+
+    assert [item.item_id for item in clustered] == ["b", "fed"]
+    merged = clustered[0]
+    # Only same-source members are summed; the YouTube view count is not comparable.
+    assert (merged.score, merged.comments, merged.cluster_size) == (50, 3, 3)
+    # "b" and "c" tie on engagement; the lower id is kept in any order.
+    assert cluster_near_duplicates(items[::-1])[0].item_id == "b"
@@ -0,0 +1,115 @@
+import threading
+
+import pytest
+
+from pipeline.deep_research_jobs import DeepResearchJobManager
+from pipeline.job_registry import DELIVERED, PENDING, JobRegistry
+
+
+class FakeProvider:
+    """Counts submissions and polls; a job finishes on poll number `finish_after`."""
+
+    def __init__(self, finish_after: int = 1):
+        self.finish_after = finish_after
+        self.submitted = []
+        self.polls = {}
+
+    def submit(self):
+        job_id = f"job-{len(self.submitted)}"
+        self.submitted.append(job_id)
+        return job_id
+
+    def poll(self, job_id):
+        self.polls[job_id] = self.polls.get(job_id, 0) + 1
+        if self.finish_after and self.polls[job_id] >= self.finish_after:
+            return True, f"report of {job_id}"
+        return False, None
+
+
+def make_manager(registry):
+    return DeepResearchJobManager(min_poll_seconds=0.01, max_poll_seconds=0.01, registry=registry)
+
+
+def test_pending_job_is_polled_again_not_resubmitted(tmp_path):
+    registry = JobRegistry(str(tmp_path / "jobs.sqlite3"))
+    registry.record_submitted("key", "fake", "job-from-last-run", timeout_seconds=60)
+    provider = FakeProvider()
+
+    future = make_manager(registry).submit("fake", provider.submit, provider.poll, timeout_seconds=5, job_key="key")
+
+    assert future.result(timeout=5) == "report of job-from-last-run"
+    assert provider.submitted == []
+
+
+def test_delivered_job_is_not_submitted_again(tmp_path):
+    registry = JobRegistry(str(tmp_path / "jobs.sqlite3"))
+    registry.record_submitted("key", "fake", "job-0", timeout_seconds=60)
+    registry.record_finished("key", DELIVERED, "emailed report")
+    provider = FakeProvider()
+
+    future = make_manager(registry).submit("fake", provider.submit, provider.poll, job_key="key")
+
+    assert future.result(timeout=5) == "emailed report"
+    assert provider.submitted == [] and provider.polls == {}
+    assert registry.stats() == {DELIVERED: 1}
+
+
+def test_timed_out_job_stays_pending_and_is_reattached(tmp_path):
+    registry = JobRegistry(str(tmp_path / "jobs.sqlite3"))
+    provider = FakeProvider(finish_after=0)
+    manager = make_manager(registry)
+
+    with pytest.raises(TimeoutError):
+        manager.submit("fake", provider.submit, provider.poll, timeout_seconds=0.05, job_key="key").result(timeout=5)
+    assert registry.lookup("key")["status"] == PENDING
+
+    provider.finish_after = 1
+    future = manager.submit("fake", provider.submit, provider.poll, timeout_seconds=5, job_key="key")
+    assert future.result(timeout=5) == "report of job-0"
+    assert provider.submitted == ["job-0"]
+
+
+class VirtualTime(threading.Condition):
+    """Fake clock; a timed wait on it advances the clock instead of sleeping."""
+
+    def __init__(self, now: float = 1000.0):
+        super().__init__()
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def wait(self, timeout=None):
+        if timeout is None:
+            return super().wait()
+        self.now += timeout
+        return False
+
+
+def test_one_poller_thread_backs_off_each_job_until_it_finishes():
+    clock = VirtualTime()
+    manager = DeepResearchJobManager(min_poll_seconds=5, max_poll_seconds=30, backoff=2, clock=clock)
+    manager._condition = clock
+    finish_after = {"fast": 1, "medium": 3, "slow": 6}
+    poll_times = {job_id: [] for job_id in finish_after}
+    poller_threads = set()
+
+    def poll(job_id):
+        poll_times[job_id].append(clock() - 1000.0)
+        poller_threads.add(threading.current_thread().name)
+        return len(poll_times[job_id]) >= finish_after[job_id], f"report of {job_id}"
+
+    # Holding the clock's lock keeps the poller from running ahead until every job is tracked.
+    with clock:
+        futures = {job_id: manager.track("fake", job_id, poll, timeout_seconds=600) for job_id in finish_after}
+
+    assert {job_id: future.result(timeout=5) for job_id, future in futures.items()} == {
+        job_id: f"report of {job_id}" for job_id in finish_after}
+    # 5s, then x2 per unfinished poll, capped at 30s.
+    assert poll_times == {
+        "fast": [5],
+        "medium": [5, 15, 35],
+        "slow": [5, 15, 35, 65, 95, 125],
+    }
+    assert poller_threads == {"deep-research-poller"}
+    assert manager.pending_jobs() == 0
@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from pipeline.hedging import HedgedRouter, LatencyTracker, is_good_response
+
+
+def answer(text, delay=0.0):
+    def call(on_start):
+        on_start()
+        time.sleep(delay)
+        return text
+    return call
+
+
+def test_is_good_response():
+    assert is_good_response("report")
+    assert not is_good_response("")
+    assert not is_good_response("Error generating response for prompt: x")
+    assert not is_good_response(None)
+
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker(window=10)
+    for seconds in range(1, 11):
+        tracker.record("chatgpt", seconds)
+    assert tracker.percentile("chatgpt", 95) == 10
+    assert tracker.percentile("chatgpt", 50) == 5
+    assert tracker.percentile("gemini", 95) is None
+
+
+def test_fast_primary_is_not_hedged():
+    router = HedgedRouter(default_delay_seconds=1)
+    assert router.call("a", "b", {"a": answer("A"), "b": answer("B")}) == "A"
+    assert router.stats()["hedged"] == 0
+
+
+def test_slow_primary_is_hedged_and_secondary_wins():
+    router = HedgedRouter(default_delay_seconds=0.05)
+    assert router.call("a", "b", {"a": answer("A", delay=1), "b": answer("B")}) == "B"
+    assert router.stats()["hedged"] == 1
+    assert router.stats()["won_by_secondary"] == 1
+
+
+def test_error_response_fails_over():
+    router = HedgedRouter(default_delay_seconds=5)
+    calls = {"a": answer("Error generating response for prompt: x"), "b": answer("B")}
+    assert router.call("a", "b", calls) == "B"
+    assert router.stats()["failovers"] == 1
+
+
+def test_primary_error_is_raised_when_nothing_good_comes_back():
+    def broken(on_start):
+        raise RuntimeError("down")
+
+    router = HedgedRouter(default_delay_seconds=5)
+    with pytest.raises(RuntimeError):
+        router.call("a", "b", {"a": broken, "b": answer("Error generating x")})
+
+
+def test_waiting_for_a_slot_does_not_trigger_a_hedge():
+    slot = threading.Semaphore(0)
+
+    def queued(on_start):
+        slot.acquire()
+        on_start()
+        return "A"
+
+    router = HedgedRouter(default_delay_seconds=0.05)
+    threading.Timer(0.3, slot.release).start()
+    assert router.call("a", "b", {"a": queued, "b": answer("B")}) == "A"
+    assert router.stats()["hedged"] == 0
+
+
+def test_cache_hits_are_not_recorded_as_latency():
+    router = HedgedRouter()
+    router.call("a", "b", {"a": lambda on_start: "cached", "b": answer("B")})
+    router.call("a", "b", {"a": answer("A", delay=0.01), "b": answer("B")})
+    assert router.tracker.count("a") == 1
+    assert router.tracker.percentile("a", 95) >= 0.01
@@ -0,0 +1,35 @@
+import threading
+
+import main
+from pipeline.deep_research_jobs import DeepResearchJobManager
+
+
+def test_holdings_batches_are_all_submitted_then_awaited_together(monkeypatch):
+    manager = DeepResearchJobManager(min_poll_seconds=0.01, max_poll_seconds=0.01)
+    submitted = []
+    all_submitted = threading.Event()
+
+    def poll(job_id):
+        # No job finishes before every batch was submitted.
+        if not all_submitted.is_set():
+            return False, None
+        if job_id == "job-1":
+            return True, "Error generating deep research response: failed"
+        return True, f"report {job_id}"
+
+    def submit(prompt_text):
+        job_id = f"job-{len(submitted)}"
+        submitted.append(job_id)
+        if len(submitted) == 3:
+            all_submitted.set()
+        return manager.submit("fake", lambda: job_id, poll, timeout_seconds=5)
+
+    monkeypatch.setattr(main, "submit_deep_research_prompt", submit)
+    holdings = {"tickers": ["AAPL", "MSFT", "NVDA", "TSLA", "META"], "summary_header": None, "summary": {}}
+
+    results = main.research_holdings(holdings, batch_size=2, max_concurrency=1)
+
+    assert [result["tickers"] for result in results] == [["AAPL", "MSFT"], ["NVDA", "TSLA"], ["META"]]
+    assert [result["response"] for result in results] == [
+        "report job-0", "Error generating deep research response: failed", "report job-2"]
+    assert manager.pending_jobs() == 0
@@ -0,0 +1,76 @@
+from datetime import datetime
+
+from pipeline.llm_cache import MARKET_TIMEZONE, LLMResponseCache, next_market_open
+
+
+def et(text: str) -> float:
+    return datetime.fromisoformat(text).replace(tzinfo=MARKET_TIMEZONE).timestamp()
+
+
+class Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_cache(tmp_path, clock, **kwargs):
+    return LLMResponseCache(str(tmp_path / "cache.sqlite3"), clock=clock, **kwargs)
+
+
+def test_next_open_rolls_over_weekends_and_holidays():
+    assert next_market_open(et("2026-10-15T08:00")) == et("2026-10-15T09:30")
+    assert next_market_open(et("2026-10-15T09:30")) == et("2026-10-16T09:30")
+    # Friday evening -> Monday.
+    assert next_market_open(et("2026-10-16T18:00")) == et("2026-10-19T09:30")
+    # Wednesday before Thanksgiving -> Friday.
+    assert next_market_open(et("2026-11-25T12:00")) == et("2026-11-27T09:30")
+    # Thursday before Good Friday -> Monday.
+    assert next_market_open(et("2026-04-02T16:00")) == et("2026-04-06T09:30")
+
+
+def test_entry_is_served_until_the_next_market_open(tmp_path):
+    clock = Clock(et("2026-10-16T18:00"))
+    cache = make_cache(tmp_path, clock)
+    calls = []
+
+    def call():
+        calls.append(clock.now)
+        return "answer"
+
+    assert cache.get_or_call("key", call) == "answer"
+    clock.now = et("2026-10-19T09:29")
+    assert cache.get_or_call("key", call) == "answer"
+    assert len(calls) == 1
+
+    clock.now = et("2026-10-19T09:30")
+    assert cache.get_or_call("key", call) == "answer"
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 1
+
+
+def test_least_recently_used_entries_are_evicted_at_max_bytes(tmp_path):
+    clock = Clock(et("2026-10-15T10:00"))
+    cache = make_cache(tmp_path, clock, max_bytes=10)
+    cache.put("a", "aaaa")
+    clock.now += 1
+    cache.put("b", "bbbb")
+    clock.now += 1
+    assert cache.get("a") == "aaaa"
+    clock.now += 1
+    cache.put("c", "cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaa" and cache.get("c") == "cccc"
+    assert cache.stats()["bytes"] == 8
+
+
+def test_error_and_empty_responses_are_not_cached(tmp_path):
+    cache = make_cache(tmp_path, Clock(et("2026-10-15T10:00")))
+    answers = iter(["Error generating ChatGPT response: 500", "", "good"])
+
+    assert cache.get_or_call("key", lambda: next(answers)).startswith("Error generating")
+    assert cache.get_or_call("key", lambda: next(answers)) == ""
+    assert cache.get_or_call("key", lambda: next(answers)) == "good"
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,23 @@
+from pipeline.markdown_render import MarkdownRenderer, render_markdown
+
+
+def test_prefetched_document_is_collected_by_render():
+    renderer = MarkdownRenderer()
+    renderer.prefetch("# Title\n\n| a | b |\n|---|---|\n| 1 | 2 |")
+
+    assert renderer.pending_count() == 1
+    assert renderer.render("# Title\n\n| a | b |\n|---|---|\n| 1 | 2 |") == render_markdown(
+        "# Title\n\n| a | b |\n|---|---|\n| 1 | 2 |")
+    assert renderer.pending_count() == 0
+
+
+def test_prefetches_that_are_never_rendered_are_bounded():
+    renderer = MarkdownRenderer(max_pending=3)
+    for index in range(10):
+        renderer.prefetch(f"report {index}")
+
+    assert renderer.pending_count() == 3
+    # Dropped prefetches still render, just inline.
+    assert renderer.render("report 0") == "<p>report 0</p>"
+    assert renderer.render("report 9") == "<p>report 9</p>"
+    assert renderer.pending_count() == 2
@@ -0,0 +1,82 @@
+import smtplib
+from email.message import EmailMessage
+
+from morning_stock_research.outbox import EmailOutbox, _is_transient
+
+
+class FakeSMTP:
+    sessions = []
+
+    def __init__(self, host, port, timeout=None):
+        self.timeout = timeout
+        self.sent = []
+        FakeSMTP.sessions.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        pass
+
+    def sendmail(self, sender, recipients, data):
+        self.sent.append(recipients)
+
+    def quit(self):
+        pass
+
+
+def message(subject):
+    msg = EmailMessage()
+    msg["From"], msg["To"], msg["Subject"] = "me@example.com", "you@example.com", subject
+    msg.set_content("body")
+    return msg
+
+
+def test_spooled_messages_share_one_session(tmp_path):
+    FakeSMTP.sessions = []
+    outbox = EmailOutbox(username="me", password="pw", spool_dir=str(tmp_path), smtp_factory=FakeSMTP,
+                         timeout_seconds=5)
+    outbox.enqueue(message("daily"))
+    outbox.enqueue(message("holdings"))
+
+    assert outbox.flush() == 2
+    assert len(FakeSMTP.sessions) == 1
+    assert len(FakeSMTP.sessions[0].sent) == 2
+    assert FakeSMTP.sessions[0].timeout == 5
+    assert outbox.pending() == []
+
+
+def test_transient_errors():
+    assert _is_transient(smtplib.SMTPServerDisconnected())
+    assert _is_transient(smtplib.SMTPResponseException(421, b"try later"))
+    assert _is_transient(TimeoutError())
+    assert _is_transient(ConnectionResetError())
+    assert not _is_transient(smtplib.SMTPResponseException(550, b"no such user"))
+    assert not _is_transient(smtplib.SMTPNotSupportedError())
+    assert not _is_transient(PermissionError())
+
+
+def test_send_email_delivers_at_once_and_leaves_failures_for_the_final_flush(tmp_path, monkeypatch):
+    from morning_stock_research import email_sender
+
+    class DownSMTP(FakeSMTP):
+        def __init__(self, host, port, timeout=None):
+            raise ConnectionRefusedError("smtp down")
+
+    monkeypatch.setattr(email_sender, "SENDER_EMAIL", "me@example.com")
+    monkeypatch.setattr(email_sender, "SENDER_APP_PASSWORD", "pw")
+    monkeypatch.setattr(email_sender, "RECIPIENT_EMAIL", "you@example.com")
+    outbox = EmailOutbox(username="me", password="pw", spool_dir=str(tmp_path), smtp_factory=DownSMTP,
+                         max_attempts=1)
+    monkeypatch.setattr(email_sender, "_outbox", outbox)
+
+    email_sender.send_email("daily", "<p>briefing</p>")
+    assert len(outbox.pending()) == 1
+
+    FakeSMTP.sessions = []
+    outbox.smtp_factory = FakeSMTP
+    email_sender.send_email("holdings", "<p>analysis</p>")
+    # The second stage's delivery also picks up the message the first one could not send.
+    assert outbox.pending() == []
+    assert len(FakeSMTP.sessions[0].sent) == 2
+    assert email_sender.flush_outbox() == 0
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from sheet_reader.portfolio_analytics import SUMMARY_COLUMNS, compute_position_analytics, format_summary_table
+from sheet_reader.trade_ledger import TradeLedger
+
+
+HEADER = ["Broker", "Ticker", "In date", "Quantity", "In price", "Out date", "Out price"]
+
+
+def make_ledger(rows):
+    return TradeLedger(HEADER, rows)
+
+
+def test_closed_lot_with_non_date_out_date_stays_closed():
+    ledger = make_ledger([
+        ["IBKR", "AAPL", "2024-01-02", "10", "100", "", ""],
+        ["IBKR", "MSFT", "2024-02-01", "4", "100", "", ""],
+        ["IBKR", "NVDA", "2024-03-01", "10", "200", "sold", "250"],
+    ])
+    analytics = compute_position_analytics(ledger.frame, is_open=ledger.is_open, as_of="2024-06-01")
+
+    assert analytics.loc["NVDA", "open_lots"] == 0
+    assert analytics.loc["AAPL", "weight_pct"] == pytest.approx(1000 / 1400 * 100)
+    assert analytics.loc["NVDA", "realized_pnl"] == pytest.approx(500)
+
+
+def test_open_positions_aggregate_per_ticker():
+    ledger = make_ledger([
+        ["IBKR", "AAPL", "2024-01-01", "10", "100", "", ""],
+        ["IBKR", "AAPL", "2024-03-01", "10", "200", "", ""],
+        ["IBKR", "AAPL", "2023-01-01", "5", "50", "2023-06-01", "80"],
+        ["Other", "AAPL", "2024-01-01", "100", "1", "", ""],
+    ])
+    analytics = compute_position_analytics(ledger.frame, is_open=ledger.is_open, as_of="2024-01-31")
+
+    row = analytics.loc["AAPL"]
+    assert row["open_qty"] == 20
+    assert row["avg_cost"] == pytest.approx(150)
+    assert row["holding_days"] == 30
+    assert row["realized_pnl"] == pytest.approx(150)
+
+
+def test_summary_table_has_no_unrealized_column_and_marks_unknowns():
+    ledger = make_ledger([["IBKR", "AAPL", "", "", "", "", ""]])
+    table = format_summary_table(compute_position_analytics(ledger.frame, is_open=ledger.is_open), ["AAPL"])
+    header, row = table.split("\n")
+
+    assert "UnrlPnL" not in header
+    assert [column for column, *_ in SUMMARY_COLUMNS][-1] == "realized_pnl"
+    assert row.startswith("AAPL") and "-" in row
+
+
+def test_empty_trades():
+    assert compute_position_analytics(pd.DataFrame()).empty
+
+
+def test_look_alike_columns_are_never_substituted():
+    # "Cost" is a lot total and "Amount" is not a share count.
+    ledger = TradeLedger(["Broker", "Ticker", "Amount", "Cost", "Out date"], [["IBKR", "AAPL", "1000", "1000", ""]])
+
+    with pytest.raises(ValueError, match="Quantity"):
+        compute_position_analytics(ledger.frame, is_open=ledger.is_open)
+
+
+def test_renamed_columns_can_be_mapped():
+    ledger = TradeLedger(["Broker", "Ticker", "Shares", "Unit cost", "Out date"], [["IBKR", "AAPL", "10", "100", ""]])
+    analytics = compute_position_analytics(
+        ledger.frame, is_open=ledger.is_open, columns={"quantity": "Shares", "in_price": "Unit cost"})
+
+    assert analytics.loc["AAPL", "avg_cost"] == pytest.approx(100)
+    assert pd.isna(analytics.loc["AAPL", "holding_days"])
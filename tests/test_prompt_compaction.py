@@ -0,0 +1,79 @@
+import sys
+import types
+
+import pytest
+
+from trend_watcher import prompt_compaction
+
+
+def test_tiktoken_encoding_is_loaded_once_on_first_use(monkeypatch):
+    loads = []
+
+    def get_encoding(name):
+        loads.append(name)
+        return types.SimpleNamespace(encode=lambda text: text.split())
+
+    monkeypatch.setitem(sys.modules, "tiktoken", types.SimpleNamespace(get_encoding=get_encoding))
+    prompt_compaction._get_encoding.cache_clear()
+    try:
+        assert loads == []
+        assert prompt_compaction.count_tokens("three short words") == 3
+        assert prompt_compaction.count_tokens("two words") == 2
+        assert loads == ["o200k_base"]
+    finally:
+        prompt_compaction._get_encoding.cache_clear()
+
+
+@pytest.fixture
+def approximate_tokens(monkeypatch):
+    # A None entry makes `import tiktoken` raise ImportError.
+    monkeypatch.setitem(sys.modules, "tiktoken", None)
+    prompt_compaction._get_encoding.cache_clear()
+    yield
+    prompt_compaction._get_encoding.cache_clear()
+
+
+def make_posts():
+    return [
+        {"source": "reddit", "title": "Low reddit post", "score": 5, "comments": 0, "url": "https://reddit.com/r/x/1"},
+        {"source": "reddit", "title": "Top reddit post", "score": 100, "comments": 10, "url": "https://www.sec.gov/a"},
+        {"source": "youtube", "title": "Top video", "score": 90000, "url": "https://youtube.com/watch?v=1"},
+        {"source": "reddit", "title": "Mid reddit post", "score": 1, "comments": 20, "url": ""},
+        {"source": "youtube", "title": "Other video", "score": 500, "url": "https://youtube.com/watch?v=2"},
+    ]
+
+
+def test_without_tiktoken_tokens_are_approximated(approximate_tokens):
+    assert prompt_compaction._get_encoding() is None
+    # Words and punctuation count one each; long words count one per 6 characters.
+    assert prompt_compaction.count_tokens("Hello, world!") == 4
+    assert prompt_compaction.count_tokens("supercalifragilistic") == 4
+    assert prompt_compaction.count_tokens("") == 0
+
+
+def test_lowest_ranked_posts_are_dropped_to_fit_the_budget(approximate_tokens):
+    full = prompt_compaction.compact_posts_prompt("Summarize.", make_posts(), token_budget=10_000)
+    # Each source ranked on its own (comments weigh 3x), then interleaved.
+    assert [post["title"] for post in full.posts] == [
+        "Top reddit post", "Top video", "Mid reddit post", "Other video", "Low reddit post"]
+
+    budget = prompt_compaction.count_tokens(full.text) - 1
+    trimmed = prompt_compaction.compact_posts_prompt("Summarize.", make_posts(), token_budget=budget)
+
+    assert [post["title"] for post in trimmed.posts] == [post["title"] for post in full.posts[:4]]
+    assert trimmed.dropped == 1
+    assert prompt_compaction.count_tokens(trimmed.text) <= budget
+    assert "[1] Top reddit post (s100 c10, sec.gov)" in trimmed.text
+    assert "[2] Top video (youtube s90000)" in trimmed.text
+
+
+def test_reported_savings_compare_against_the_verbose_prompt(approximate_tokens):
+    posts = make_posts()
+    compact = prompt_compaction.compact_posts_prompt("Summarize.", posts)
+    verbose = "Summarize." + prompt_compaction.format_posts_verbose(posts)
+
+    assert compact.stats["bytes_before"] == len(verbose.encode("utf-8"))
+    assert compact.stats["bytes_after"] == len(compact.text.encode("utf-8"))
+    assert compact.stats["bytes_saved"] == compact.stats["bytes_before"] - compact.stats["bytes_after"] > 0
+    assert compact.stats["tokens_before"] == prompt_compaction.count_tokens(verbose)
+    assert compact.stats["tokens_saved"] == compact.stats["tokens_before"] - compact.stats["tokens_after"] > 0
@@ -0,0 +1,44 @@
+from trend_watcher.reddit_index import IncrementalRedditPoller, RedditPostIndex
+
+
+DAY_ONE = 1_760_000_000.0
+HOUR = 3600
+
+
+def test_velocity_is_measured_between_two_snapshots(tmp_path):
+    index = RedditPostIndex(str(tmp_path / "reddit.sqlite3"))
+
+    [first] = index.record("stocks", [{"id": "p1", "score": 100, "comments": 10, "created_utc": DAY_ONE - 2 * HOUR}],
+                           now=DAY_ONE)
+    [second] = index.record("stocks", [{"id": "p1", "score": 400, "comments": 16}], now=DAY_ONE + 4 * HOUR)
+
+    assert first["is_new"] and first["score_velocity"] == 50.0 and first["comment_velocity"] == 5.0
+    assert not second["is_new"]
+    assert second["score_velocity"] == 75.0 and second["comment_velocity"] == 1.5
+    assert index.history("p1") == [(DAY_ONE, 100, 10), (DAY_ONE + 4 * HOUR, 400, 16)]
+
+
+class FakeWatcher:
+    def __init__(self):
+        self.posts = []
+
+    def get_trendy_reddit_posts(self, subreddit, search_word=None, count=50):
+        return [dict(post) for post in self.posts]
+
+
+def test_poller_reports_new_and_fast_rising_posts_only(tmp_path):
+    now = [DAY_ONE]
+    watcher = FakeWatcher()
+    poller = IncrementalRedditPoller(
+        watcher, index=RedditPostIndex(str(tmp_path / "reddit.sqlite3")), min_score_velocity=50, clock=lambda: now[0])
+    watcher.posts = [{"id": "slow", "score": 10}, {"id": "fast", "score": 10}]
+    assert [post["id"] for post in poller.poll("stocks")] == ["slow", "fast"]
+
+    now[0] += 24 * HOUR
+    watcher.posts = [{"id": "slow", "score": 100}, {"id": "fast", "score": 2410}, {"id": "fresh", "score": 1}]
+    selected = poller.poll("stocks")
+
+    # slow: +90 in 24h (3.8/h) is filtered out; fast: +2400 in 24h = 100/h.
+    assert [post["id"] for post in selected] == ["fast", "fresh"]
+    assert selected[0]["score_velocity"] == 100.0 and not selected[0]["is_new"]
+    assert selected[1]["is_new"]
@@ -0,0 +1,36 @@
+from pipeline.report import EMAIL_HEAD, EMAIL_TAIL, SECTION_END, ReportBuilder
+
+
+def test_sections_render_in_the_order_they_were_added():
+    report = ReportBuilder("Daily").section("First", "<p>one</p>", prompt_text="ask one").section("Second", "<p>two</p>")
+
+    assert report.render() == (
+        "<h1>Daily</h1>"
+        "<h2>First</h2><p><strong>Prompt:</strong> ask one</p>"
+        '<div class="llm-response"><p>one</p></div>' + SECTION_END
+        + '<h2>Second</h2><div class="llm-response"><p>two</p></div>' + SECTION_END
+    )
+    assert report.size() == len(report.render())
+
+
+def test_merge_concatenates_reports_without_changing_them():
+    research = ReportBuilder("Research").section("Macro", "<p>rates</p>")
+    trends = ReportBuilder("Trends").html("<ol><li>post</li></ol>")
+
+    merged = ReportBuilder.merge(research, trends)
+
+    assert merged.render() == research.render() + trends.render()
+    assert list(research.chunks())[0] == "<h1>Research</h1>"
+    merged.title("Extra")
+    assert "Extra" not in research.render() + trends.render()
+
+
+def test_text_is_escaped_and_html_is_kept_in_body_and_email():
+    report = ReportBuilder("S&P 500 <Daily>").section(
+        "AAPL, MSFT", "<p><strong>buy</strong></p>", prompt_text='Compare "A" & <B>')
+    body = report.render()
+
+    assert "<h1>S&amp;P 500 &lt;Daily&gt;</h1>" in body
+    assert "<p><strong>Prompt:</strong> Compare &quot;A&quot; &amp; &lt;B&gt;</p>" in body
+    assert '<div class="llm-response"><p><strong>buy</strong></p></div>' in body
+    assert report.render_email() == EMAIL_HEAD + body + EMAIL_TAIL
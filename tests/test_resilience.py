@@ -0,0 +1,139 @@
+import random
+
+import pytest
+
+from pipeline.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientCaller,
+    TokenBucket,
+    is_retryable,
+    was_rejected,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def make_caller(clock, **kwargs):
+    options = dict(rate_per_second=100, burst=100, max_attempts=3, failure_threshold=1,
+                   reset_timeout_seconds=10, clock=clock, sleep=clock.sleep, rng=random.Random(0))
+    options.update(kwargs)
+    return ResilientCaller("test", **options)
+
+
+def fail_with(status_code):
+    def call():
+        raise StatusError(status_code)
+    return call
+
+
+def test_is_retryable_by_status_and_name():
+    assert is_retryable(StatusError(503))
+    assert is_retryable(StatusError(429))
+    assert not is_retryable(StatusError(400))
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(ValueError())
+
+
+def test_retries_then_succeeds():
+    clock = FakeClock()
+    caller = make_caller(clock)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise StatusError(503)
+        return "ok"
+
+    caller.breaker.failure_threshold = 5
+    assert caller.call(flaky) == "ok"
+    assert caller.stats()["retries"] == 2
+
+
+def test_non_retryable_error_is_raised_at_once():
+    caller = make_caller(FakeClock())
+    with pytest.raises(StatusError):
+        caller.call(fail_with(400))
+    assert caller.stats()["attempts"] == 1
+    assert caller.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_trial_failing_with_bad_request_releases_the_circuit():
+    clock = FakeClock()
+    caller = make_caller(clock, max_attempts=1)
+    with pytest.raises(StatusError):
+        caller.call(fail_with(503))
+    assert caller.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        caller.call(lambda: "ok")
+
+    clock.now += 10
+    with pytest.raises(StatusError):
+        caller.call(fail_with(400))
+    # The trial got an answer from the provider, so later calls go through again.
+    assert caller.call(lambda: "ok") == "ok"
+    assert caller.call(lambda: "ok") == "ok"
+
+
+def test_half_open_trial_with_provider_error_reopens():
+    clock = FakeClock()
+    caller = make_caller(clock, max_attempts=1)
+    with pytest.raises(StatusError):
+        caller.call(fail_with(503))
+    clock.now += 10
+    with pytest.raises(StatusError):
+        caller.call(fail_with(503))
+    with pytest.raises(CircuitOpenError):
+        caller.call(lambda: "ok")
+
+
+def test_job_submission_is_not_retried_after_a_timeout():
+    caller = make_caller(FakeClock(), failure_threshold=5)
+    submissions = []
+
+    def submit():
+        submissions.append(1)
+        raise TimeoutError("read timed out")
+
+    with pytest.raises(TimeoutError):
+        caller.call(submit, retry_on=was_rejected)
+    # The job may have been created; a second submission could start a duplicate.
+    assert len(submissions) == 1
+
+
+def test_job_submission_is_retried_when_rejected():
+    caller = make_caller(FakeClock(), failure_threshold=5)
+    submissions = []
+
+    def submit():
+        submissions.append(1)
+        if len(submissions) == 1:
+            raise StatusError(429)
+        return "job-1"
+
+    assert caller.call(submit, retry_on=was_rejected) == "job-1"
+    assert not was_rejected(StatusError(503))
+    assert not was_rejected(ConnectionError())
+
+
+def test_token_bucket_waits_for_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_second=2, burst=1, clock=clock, sleep=clock.sleep)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(0.5)
@@ -0,0 +1,118 @@
+import gzip
+import json
+import os
+
+import pytest
+from gspread.utils import a1_to_rowcol, rowcol_to_a1
+from gspread.worksheet import ValueRange
+
+import pipeline.resilience
+from sheet_reader.sheet_reader import GoogleSheetReader
+from sheet_reader.snapshot_cache import WorksheetSnapshotCache
+
+
+class CountingWorksheet:
+    """Fake gspread worksheet over a grid of strings; counts the API calls it serves."""
+
+    def __init__(self, grid):
+        self.grid = grid
+        self.calls = {"get_all_values": 0, "batch_get": 0}
+
+    def get_all_values(self):
+        self.calls["get_all_values"] += 1
+        return [list(row) for row in self.grid]
+
+    def _value(self, row, col):
+        return self.grid[row - 1][col - 1]
+
+    def batch_get(self, ranges, major_dimension=None):
+        self.calls["batch_get"] += 1
+        result = []
+        for a1 in ranges:
+            if ":" not in a1:
+                values = [[self._value(*a1_to_rowcol(a1))]]
+            elif a1.split(":")[0].isdigit():
+                values = [list(self.grid[int(a1.split(":")[0]) - 1])]
+            else:
+                col = a1_to_rowcol(a1.split(":")[0] + "1")[1]
+                values = [[row[col - 1] for row in self.grid]]
+            result.append(ValueRange.from_json({"range": a1, "majorDimension": major_dimension or "ROWS", "values": values}))
+        return result
+
+
+class CountingSpreadsheet:
+    id = "sheet-1"
+
+    def __init__(self, worksheet):
+        self._worksheet = worksheet
+        self.revision = "2026-10-16T10:00:00Z"
+        self.revision_reads = 0
+
+    def worksheet(self, name):
+        return self._worksheet
+
+    def get_lastUpdateTime(self):
+        self.revision_reads += 1
+        return self.revision
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limits(monkeypatch):
+    # Each test starts with a full "sheets" token bucket.
+    monkeypatch.setattr(pipeline.resilience, "_callers", {})
+
+
+GRID = [[f"{rowcol_to_a1(row, col)}-value" for col in range(1, 51)] for row in range(1, 51)]
+
+
+def make_reader(spreadsheet, cache):
+    return GoogleSheetReader(None, None, spreadsheet=spreadsheet, snapshot_cache=cache)
+
+
+def test_unchanged_revision_is_served_from_the_snapshot(tmp_path):
+    worksheet = CountingWorksheet(GRID)
+    spreadsheet = CountingSpreadsheet(worksheet)
+    cache = WorksheetSnapshotCache(str(tmp_path))
+
+    first = make_reader(spreadsheet, cache).read_worksheet("Stock Eval")
+    second = make_reader(spreadsheet, cache).read_worksheet("Stock Eval")
+
+    assert first == second == GRID
+    assert worksheet.calls["get_all_values"] == 1
+    assert spreadsheet.revision_reads == 2
+
+
+def test_changed_revision_refetches_and_rewrites_the_snapshot(tmp_path):
+    worksheet = CountingWorksheet([row[:] for row in GRID])
+    spreadsheet = CountingSpreadsheet(worksheet)
+    cache = WorksheetSnapshotCache(str(tmp_path))
+    make_reader(spreadsheet, cache).read_worksheet("Stock Eval")
+
+    worksheet.grid[0][0] = "edited"
+    spreadsheet.revision = "2026-10-16T11:00:00Z"
+    rows = make_reader(spreadsheet, cache).read_worksheet("Stock Eval")
+
+    assert rows[0][0] == "edited"
+    assert worksheet.calls["get_all_values"] == 2
+    [snapshot_file] = [name for name in os.listdir(tmp_path) if name.endswith(".json.gz")]
+    with gzip.open(os.path.join(tmp_path, snapshot_file), "rt", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    assert snapshot["revision"] == "2026-10-16T11:00:00Z"
+    assert snapshot["columns"][0][0] == "edited"
+
+
+def test_fifty_cell_reads_take_one_api_call_each(tmp_path):
+    worksheet = CountingWorksheet(GRID)
+    reader = make_reader(CountingSpreadsheet(worksheet), WorksheetSnapshotCache(str(tmp_path)))
+    cells = [rowcol_to_a1(index + 1, index + 1) for index in range(50)]
+
+    assert reader.read_cells("Stock Eval", cells) == [f"{cell}-value" for cell in cells]
+    assert worksheet.calls["batch_get"] == 1
+
+    rows = reader.read_rows("Stock Eval", list(range(1, 51)))
+    assert len(rows) == 50 and rows[49][0] == "A50-value"
+    assert worksheet.calls["batch_get"] == 2
+
+    columns = reader.read_columns("Stock Eval", list(range(1, 51)))
+    assert len(columns) == 50 and columns[49][0] == "AX1-value"
+    assert worksheet.calls["batch_get"] == 3
@@ -0,0 +1,49 @@
+from trend_watcher.ticker_mentions import DEFAULT_UNIVERSE, MentionIndex, TickerUniverse
+
+
+UNIVERSE = TickerUniverse(DEFAULT_UNIVERSE)
+
+
+def test_cashtags_match_in_any_case_including_ambiguous_symbols():
+    assert UNIVERSE.extract("Loaded up on $tsla and $NVDA calls") == {"TSLA", "NVDA"}
+    assert UNIVERSE.extract("$BRK.B is my bond replacement") == {"BRK.B"}
+    assert UNIVERSE.extract("$FAKE is not in the universe") == set()
+
+
+def test_bare_symbols_match_only_in_upper_case():
+    assert UNIVERSE.extract("AMD and SMCI ripping premarket") == {"AMD", "SMCI"}
+    assert UNIVERSE.extract("amd and smci ripping premarket") == set()
+
+
+def test_company_names_and_aliases_match_in_title_case():
+    assert UNIVERSE.extract("Bank of America raises its target on Goldman Sachs") == {"BAC", "GS"}
+    assert UNIVERSE.extract("Meta beats on ad revenue") == {"META"}
+    assert UNIVERSE.extract("Meta Platforms guides higher, Facebook usage flat") == {"META"}
+    assert UNIVERSE.extract("Taiwan Semiconductor and Super Micro Computer earnings") == {"TSM", "SMCI"}
+    assert UNIVERSE.extract("the apple pie recipe nobody asked for") == set()
+
+
+def test_common_words_that_are_symbols_are_not_mentions():
+    assert UNIVERSE.extract("A DD on IT stocks: ALL IN ON CEO pay") == set()
+    ambiguous = TickerUniverse({"A": ("Agilent",), "IT": ("Gartner",), "ALL": ("Allstate",), "ON": ()})
+    assert ambiguous.extract("IT IS ALL ON A ROLL") == set()
+    assert ambiguous.extract("$ALL and $it and Agilent") == {"ALL", "IT", "A"}
+
+
+def test_memoized_phrases_give_the_same_answer():
+    universe = TickerUniverse(DEFAULT_UNIVERSE)
+    first = [universe.extract(title) for title in ("Nvidia $AMD", "Nvidia $AMD again", "Nvidia")]
+    assert first == [{"NVDA", "AMD"}, {"NVDA", "AMD"}, {"NVDA"}]
+
+
+def test_mention_index_counts_posts_and_buckets_by_hour():
+    index = MentionIndex(UNIVERSE).add_posts([
+        {"title": "$NVDA NVDA Nvidia", "created_utc": 3600 * 10 + 5},
+        {"title": "NVDA and TSLA", "created_utc": 3600 * 11},
+        {"title": "Tesla deliveries", "created_utc": 3600 * 11 + 60, "cluster_size": 3},
+    ])
+
+    assert index.posts == 5
+    assert index.top(2) == [("TSLA", 4), ("NVDA", 2)]
+    assert index.series("NVDA") == [(36000, 1), (39600, 1)]
+    assert index.format_table() == "Ticker mentions (of 5 posts): TSLA 4, NVDA 2"
@@ -0,0 +1,37 @@
+import threading
+
+from pipeline.concurrency import map_bounded
+from pipeline.dag import Pipeline
+from pipeline.tracing import SPAN_SECONDS, Tracer, span, traced, use_tracer
+
+
+@traced()
+def fetch(item):
+    with span("inner", item=item):
+        return item
+
+
+def span_names(tracer):
+    return sorted(entry["labels"]["span"] for entry in tracer.snapshot()["histograms"].get(SPAN_SECONDS, []))
+
+
+def test_concurrent_runs_keep_their_own_spans_including_pool_threads():
+    both_running = threading.Barrier(2)
+    tracers = {}
+
+    def run(name):
+        with use_tracer(Tracer()) as tracer:
+            tracers[name] = tracer
+            pipeline = Pipeline(max_workers=2)
+            pipeline.add_stage(name, lambda _: both_running.wait(timeout=5) is not None and map_bounded(fetch, [1, 2]))
+            assert pipeline.run().ok
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in ("run_a", "run_b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert span_names(tracers["run_a"]) == ["fetch", "inner", "inner", "pipeline_stage"]
+    stages = [entry["labels"].get("stage") for entry in tracers["run_b"].snapshot()["histograms"][SPAN_SECONDS]]
+    assert "run_b" in stages and "run_a" not in stages
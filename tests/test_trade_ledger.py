@@ -0,0 +1,117 @@
+import re
+
+import pandas as pd
+from pandas.testing import assert_frame_equal, assert_series_equal
+
+from sheet_reader.sheet_reader import GoogleSheetReader
+from sheet_reader.snapshot_cache import WorksheetSnapshotCache
+from sheet_reader.trade_ledger import TradeLedger
+
+
+HEADER = ["Broker", "Ticker", "In date", "Quantity", "Out date"]
+ROWS = [
+    ["IBKR", "AAPL", "2024-01-02", "10", ""],
+    ["IBKR", "MSFT", "2024-02-01", "4", ""],
+    ["Schwab", "NVDA", "2024-03-01", "10", "sold"],
+]
+
+
+def assert_same_ledger(actual, expected):
+    assert_frame_equal(actual.frame, expected.frame)
+    assert_series_equal(actual.is_open, expected.is_open)
+    assert_frame_equal(actual.open_positions, expected.open_positions)
+
+
+def test_unparseable_out_date_is_closed():
+    ledger = TradeLedger(HEADER, ROWS)
+
+    assert list(ledger.is_open) == [True, True, False]
+    assert list(ledger.current_holdings(broker="IBKR")) == ["AAPL", "MSFT"]
+    assert isinstance(ledger.frame["Ticker"].dtype, pd.CategoricalDtype)
+
+
+def test_apply_sync_matches_a_full_rebuild():
+    ledger = TradeLedger(HEADER, ROWS)
+    appended = [["IBKR", "TSLA", "2024-04-01", "3", ""], ["Fidelity", "AAPL", "2024-05-01", "1"]]
+    # MSFT gets closed, NVDA's bad date gets fixed.
+    ledger.apply_sync(appended, {"Out date": ["", "2024-06-01", "2024-05-15"]})
+
+    rebuilt = TradeLedger(HEADER, [
+        ["IBKR", "AAPL", "2024-01-02", "10", ""],
+        ["IBKR", "MSFT", "2024-02-01", "4", "2024-06-01"],
+        ["Schwab", "NVDA", "2024-03-01", "10", "2024-05-15"],
+    ] + appended)
+    assert list(ledger.current_holdings(broker="IBKR")) == ["AAPL", "TSLA"]
+    assert list(ledger.frame["Out date"].dropna()) == [pd.Timestamp("2024-06-01"), pd.Timestamp("2024-05-15")]
+    assert_series_equal(ledger.is_open, rebuilt.is_open)
+    assert list(ledger.frame["Ticker"].astype(str)) == list(rebuilt.frame["Ticker"].astype(str))
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet):
+        self.spreadsheet = spreadsheet
+
+    def get_all_values(self):
+        self.spreadsheet.full_reads += 1
+        return [list(row) for row in self.spreadsheet.rows]
+
+    def batch_get(self, ranges, major_dimension=None):
+        rows = self.spreadsheet.rows
+        result = []
+        for a1 in ranges:
+            if a1 == "1:1":
+                result.append([rows[0]])
+                continue
+            start_col, start, end_col, end = re.fullmatch(r"([A-Z]+)(\d+):([A-Z]+)(\d*)", a1).groups()
+            first, last = int(start) - 1, int(end) if end else len(rows)
+            if start_col == end_col:
+                column = ord(start_col) - ord("A")
+                result.append([[row[column]] if row[column] else [] for row in rows[first:last]])
+            else:
+                result.append([list(row) for row in rows[first:last]])
+        return result
+
+
+class FakeSpreadsheet:
+    id = "sheet-1"
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.revision = "r1"
+        self.full_reads = 0
+
+    def worksheet(self, name):
+        return FakeWorksheet(self)
+
+    def get_lastUpdateTime(self):
+        return self.revision
+
+
+def read_ledger(spreadsheet, cache):
+    return GoogleSheetReader(None, None, spreadsheet=spreadsheet, snapshot_cache=cache).read_trade_ledger()
+
+
+def test_reader_updates_the_stored_ledger_from_appended_rows(tmp_path, monkeypatch):
+    cache = WorksheetSnapshotCache(str(tmp_path))
+    spreadsheet = FakeSpreadsheet([HEADER] + [list(row) for row in ROWS])
+    first = read_ledger(spreadsheet, cache)
+    assert spreadsheet.full_reads == 1
+
+    spreadsheet.rows[2][4] = "2024-06-01"
+    spreadsheet.rows.append(["IBKR", "TSLA", "2024-04-01", "3", ""])
+    spreadsheet.revision = "r2"
+    # The stored ledger is updated in place of being rebuilt from every row.
+    built = []
+    original_init = TradeLedger.__init__
+    monkeypatch.setattr(TradeLedger, "__init__", lambda self, *args: built.append(args) or original_init(self, *args))
+    second = read_ledger(spreadsheet, cache)
+
+    assert spreadsheet.full_reads == 1
+    assert built == []
+    assert list(second.current_holdings(broker="IBKR")) == ["AAPL", "TSLA"]
+    assert second.row_count == first.row_count + 1
+    assert_series_equal(second.is_open, TradeLedger(spreadsheet.rows[0], spreadsheet.rows[1:]).is_open)
+
+    # Unchanged sheet: the stored ledger is served as is.
+    third = read_ledger(spreadsheet, cache)
+    assert_same_ledger(third, second)
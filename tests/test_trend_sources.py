@@ -0,0 +1,31 @@
+from contextlib import nullcontext
+
+import trend_watcher.trend_watcher
+from trend_watcher.reddit_index import IncrementalRedditPoller, RedditPostIndex
+from trend_watcher.trend_sources import TrendFallbackStore, TrendItem, default_trend_sources, gather_trends
+from trend_watcher.trend_watcher import TrendWatcher
+
+
+class UnauthorizedReddit:
+    def subreddit(self, name):
+        raise PermissionError("401 Unauthorized")
+
+
+def test_reddit_error_falls_back_to_last_good_posts(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        trend_watcher.trend_watcher, "borrow_reddit_client", lambda *args: nullcontext(UnauthorizedReddit()))
+    store = TrendFallbackStore(str(tmp_path / "fallback"))
+    store.save("reddit", [TrendItem("reddit", "yesterday's post", url="https://reddit.com/1", score=10)])
+    watcher = TrendWatcher(reddit_client_id="id", reddit_client_secret="secret", reddit_user_agent="test")
+    poller = IncrementalRedditPoller(watcher, index=RedditPostIndex(str(tmp_path / "reddit.sqlite3")))
+
+    trends = gather_trends(default_trend_sources(watcher, enabled=("reddit",), reddit_poller=poller), store)
+
+    assert [item.title for item in trends["reddit"]] == ["yesterday's post"]
+
+
+def test_only_reddit_is_fetched_unless_other_sources_are_enabled():
+    watcher = TrendWatcher(reddit_client_id="id", reddit_client_secret="secret", reddit_user_agent="test")
+
+    assert [source.name for source in default_trend_sources(watcher)] == ["reddit"]
+    assert [source.name for source in default_trend_sources(watcher, enabled=("youtube", "reddit"))] == ["youtube", "reddit"]
@@ -0,0 +1,221 @@
+# Near-duplicate clustering of trend items with MinHash and LSH banding.
+import argparse
+import hashlib
+import logging
+import random
+import re
+import time
+
+from trend_watcher.prompt_compaction import COMMENT_WEIGHT
+from trend_watcher.trend_sources import TrendItem
+
+
+NUM_PERMUTATIONS = 32
+# 16 bands of 2 rows: pairs above ~0.4 Jaccard similarity share a band with high probability;
+# candidates are then checked against the threshold on the full signature.
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+DEFAULT_SIMILARITY_THRESHOLD = 0.5
+MIN_TOKENS = 3
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240101)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+_WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have i in is it its my of on or so that the this to was we what "
+    "will with you your just now new why how who all".split()
+)
+
+
+def tokenize(text: str) -> frozenset:
+    """Lowercased words without stopwords or single characters; "$TSLA" becomes "tsla"."""
+    return frozenset(
+        word for word in _WORD.findall((text or "").lower()) if len(word) > 1 and word not in STOPWORDS
+    )
+
+
+class MinHasher:
+    """Computes MinHash signatures; each token's permuted hashes are computed once and cached."""
+
+    def __init__(self):
+        self._token_hashes = {}
+
+    def _hashes(self, token: str) -> tuple:
+        hashes = self._token_hashes.get(token)
+        if hashes is None:
+            base = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+            hashes = tuple((a * base + b) % _MERSENNE_PRIME for a, b in _PERMUTATIONS)
+            self._token_hashes[token] = hashes
+        return hashes
+
+    def signature(self, tokens: frozenset) -> tuple:
+        return tuple(map(min, zip(*(self._hashes(token) for token in tokens))))
+
+
+def _similarity(left: tuple, right: tuple) -> float:
+    return sum(a == b for a, b in zip(left, right)) / NUM_PERMUTATIONS
+
+
+def _find(parents: list, i: int) -> int:
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+def near_duplicate_groups(texts: list, threshold: float = DEFAULT_SIMILARITY_THRESHOLD, hasher: MinHasher = None) -> list:
+    """
+    Groups texts whose estimated Jaccard similarity of word sets is at least `threshold`.
+
+    Runs in linear time: each text is hashed once, bucketed by LSH band, and only
+    compared with the first text of each bucket it lands in. Texts with fewer than
+    MIN_TOKENS words are never merged.
+
+    Returns:
+        list: Lists of indices into `texts`, one per group, in first-seen order.
+    """
+    hasher = hasher or MinHasher()
+    parents = list(range(len(texts)))
+    signatures = [None] * len(texts)
+    buckets = {}
+    for i, text in enumerate(texts):
+        tokens = tokenize(text)
+        if len(tokens) < MIN_TOKENS:
+            continue
+        signature = signatures[i] = hasher.signature(tokens)
+        for band in range(LSH_BANDS):
+            key = (band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])
+            anchor = buckets.setdefault(key, i)
+            if anchor != i and _similarity(signature, signatures[anchor]) >= threshold:
+                parents[_find(parents, i)] = _find(parents, anchor)
+
+    groups = {}
+    for i in range(len(texts)):
+        groups.setdefault(_find(parents, i), []).append(i)
+    return list(groups.values())
+
+
+def _engagement(item: TrendItem) -> int:
+    return (item.score or 0) + COMMENT_WEIGHT * (item.comments or 0)
+
+
+def cluster_near_duplicates(items: list, threshold: float = DEFAULT_SIMILARITY_THRESHOLD) -> list:
+    """
+    Collapses near-duplicate trend items into one representative each.
+
+    The representative is the most engaged member; ties go to the lowest item id,
+    then title, so the choice does not depend on the order sources returned. Its score and comments become
+    the sums over members of the same source (scores of different sources are not
+    comparable), and `cluster_size` counts every member.
+
+    Returns:
+        list: Representatives (new TrendItem objects for merged clusters), in input order.
+    """
+    representatives = []
+    for group in near_duplicate_groups([item.title for item in items], threshold):
+        if len(group) == 1:
+            representatives.append(items[group[0]])
+            continue
+        members = [items[i] for i in group]
+        best = min(members, key=lambda member: (-_engagement(member), member.item_id or "", member.title or ""))
+        same_source = [member for member in members if member.source == best.source]
+        merged = TrendItem.from_dict(best.to_dict())
+        merged.score = sum(member.score or 0 for member in same_source)
+        if best.comments is not None:
+            merged.comments = sum(member.comments or 0 for member in same_source)
+        merged.cluster_size = sum(member.cluster_size for member in members)
+        representatives.append(merged)
+
+    if len(representatives) < len(items):
+        logging.info(f"Collapsed {len(items)} trend items into {len(representatives)} after near-duplicate clustering.")
+    return representatives
+
+
+def _synthetic_posts(count: int, seed: int = 7) -> tuple:
+    """
+    Posts drawn from a pool of stories; about a third are reworded copies of an earlier story.
+
+    Returns:
+        tuple: (posts, story index of each post).
+    """
+    rng = random.Random(seed)
+    tickers = ["TSLA", "NVDA", "AAPL", "GME", "AMC", "PLTR", "AMD", "SPY", "MSFT", "META"]
+    # Pseudo-words stand in for the open vocabulary of real titles.
+    vocabulary = ["".join(rng.choice("bcdfghklmnprstvz") + rng.choice("aeiou") for _ in range(3)) for _ in range(3000)]
+    fillers = ["bro", "lol", "huge", "yolo", "insane", "today", "again", "premarket", "apes", "moon"]
+    posts, story_ids, stories = [], [], []
+    for i in range(count):
+        if stories and rng.random() < 0.35:
+            story_id = rng.randrange(len(stories))
+            words = stories[story_id].split()
+            words[rng.randrange(len(words))] = rng.choice(fillers)
+            title = " ".join(words + [rng.choice(fillers)])
+        else:
+            story_id = len(stories)
+            title = f"${rng.choice(tickers)} " + " ".join(rng.sample(vocabulary, 6)) + f" {rng.randrange(10, 999)}%"
+            stories.append(title)
+        posts.append(TrendItem("reddit", title, score=rng.randrange(1, 5000), comments=rng.randrange(0, 800), item_id=str(i)))
+        story_ids.append(story_id)
+    return posts, story_ids
+
+
+def _exact_groups(texts: list, threshold: float) -> list:
+    """Quadratic exact-Jaccard baseline over all pairs."""
+    token_sets = [tokenize(text) for text in texts]
+    parents = list(range(len(texts)))
+    for i in range(len(texts)):
+        for j in range(i):
+            left, right = token_sets[i], token_sets[j]
+            if len(left) >= MIN_TOKENS and len(right) >= MIN_TOKENS and len(left & right) / len(left | right) >= threshold:
+                parents[_find(parents, i)] = _find(parents, j)
+    groups = {}
+    for i in range(len(texts)):
+        groups.setdefault(_find(parents, i), []).append(i)
+    return list(groups.values())
+
+
+def _score_groups(groups: list, story_ids: list) -> str:
+    """Share of reworded copies grouped with their story, and of posts grouped with another story."""
+    group_of = {i: g for g, group in enumerate(groups) for i in group}
+    first_post = {}
+    for i, story_id in enumerate(story_ids):
+        first_post.setdefault(story_id, i)
+    copies = [i for i, story_id in enumerate(story_ids) if first_post[story_id] != i]
+    recall = sum(group_of[i] == group_of[first_post[story_ids[i]]] for i in copies) / max(len(copies), 1)
+    wrong = sum(
+        len(group) - max(sum(story_ids[i] == story_id for i in group) for story_id in {story_ids[i] for i in group})
+        for group in groups
+    )
+    return f"recall {recall:.1%}, wrongly merged {wrong / len(story_ids):.1%}"
+
+
+def _benchmark(sizes: list, threshold: float, exact_limit: int) -> None:
+    print(f"MinHash {NUM_PERMUTATIONS} permutations, {LSH_BANDS} bands x {LSH_ROWS} rows, threshold {threshold}")
+    for size in sizes:
+        posts, story_ids = _synthetic_posts(size)
+        titles = [post.title for post in posts]
+        started_at = time.perf_counter()
+        groups = near_duplicate_groups(titles, threshold)
+        cluster_near_duplicates(posts, threshold)
+        elapsed = (time.perf_counter() - started_at) / 2
+        print(f"{size:>7} posts, {len(set(story_ids)):>6} stories")
+        print(f"  {'MinHash LSH':<16} {len(groups):>6} clusters {elapsed * 1000:>9.1f} ms "
+              f"({size / elapsed:>9,.0f} posts/s)  {_score_groups(groups, story_ids)}")
+        if size <= exact_limit:
+            started_at = time.perf_counter()
+            exact = _exact_groups(titles, threshold)
+            elapsed = time.perf_counter() - started_at
+            print(f"  {'exact pairwise':<16} {len(exact):>6} clusters {elapsed * 1000:>9.1f} ms "
+                  f"({size / elapsed:>9,.0f} posts/s)  {_score_groups(exact, story_ids)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark near-duplicate clustering on synthetic posts.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2000, 5000, 20000])
+    parser.add_argument("--threshold", type=float, default=DEFAULT_SIMILARITY_THRESHOLD)
+    parser.add_argument("--exact-limit", type=int, default=5000, help="Largest size to also run the quadratic baseline on.")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    _benchmark(args.sizes, args.threshold, args.exact_limit)
@@ -0,0 +1,160 @@
+# Token-budgeted compaction of trend posts before they are sent to an LLM.
+import functools
+import logging
+import math
+import re
+from itertools import zip_longest
+from urllib.parse import urlparse
+
+
+DEFAULT_TOKEN_BUDGET = 1500
+MAX_TITLE_CHARS = 160
+# A comment is a stronger engagement signal than an upvote.
+COMMENT_WEIGHT = 3
+# Link domains that add no information for the model (self posts, Reddit media and
+# the trend sources' own sites, which are already shown as the source tag).
+UNINFORMATIVE_DOMAINS = ("reddit.com", "redd.it", "imgur.com", "youtube.com", "youtu.be", "tiktok.com")
+
+_WHITESPACE = re.compile(r"\s+")
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+@functools.lru_cache(maxsize=1)
+def _get_encoding():
+    """
+    The tiktoken encoding, loaded on first use and cached; None without tiktoken.
+
+    Loading may download the BPE file, so it is not done at import time.
+    """
+    try:
+        import tiktoken
+    except ImportError:  # tiktoken is optional; fall back to an approximation.
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logging.warning(f"Could not load the tiktoken encoding, approximating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Counts tokens with tiktoken when installed, otherwise approximates them."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # Words and punctuation, inflated for sub-word splits of long words.
+    return sum(max(1, math.ceil(len(token) / 6)) for token in _TOKEN_PATTERN.findall(text))
+
+
+def format_posts_verbose(posts: list) -> str:
+    """The original prompt formatting, kept as the baseline for savings reports."""
+    return "\n".join(
+        [f"{i+1}. {post['title']} (Scores: {post['score']}) (URL: {post['url']}) \n\n" for i, post in enumerate(posts)]
+    )
+
+
+def _link_domain(url: str) -> str:
+    domain = urlparse(url or "").netloc.lower().removeprefix("www.")
+    if not domain or any(domain == d or domain.endswith("." + d) for d in UNINFORMATIVE_DOMAINS):
+        return ""
+    return domain
+
+
+def _compact_line(ref: int, post: dict) -> str:
+    title = _WHITESPACE.sub(" ", post.get("title") or "").strip()
+    if len(title) > MAX_TITLE_CHARS:
+        title = title[:MAX_TITLE_CHARS - 1].rstrip() + "…"
+    stats = f"s{post.get('score', 0)}"
+    if post.get("comments") is not None:
+        stats += f" c{post['comments']}"
+    if post.get("score_velocity") is not None:
+        stats += f" v{post['score_velocity']:+.0f}/h"
+    if (post.get("cluster_size") or 1) > 1:
+        stats += f" n{post['cluster_size']}"
+    domain = _link_domain(post.get("url"))
+    source = post.get("source")
+    if source and source != "reddit":
+        stats = f"{source} {stats}"
+    return f"[{ref}] {title} ({stats}{', ' + domain if domain else ''})"
+
+
+def _engagement(post: dict) -> int:
+    return (post.get("score") or 0) + COMMENT_WEIGHT * (post.get("comments") or 0)
+
+
+def rank_posts(posts: list) -> list:
+    """
+    Orders posts by engagement. Scores are not comparable across sources (YouTube
+    views vs Reddit upvotes), so each source is ranked on its own and the sources
+    are interleaved round-robin.
+    """
+    by_source = {}
+    for post in posts:
+        by_source.setdefault(post.get("source"), []).append(post)
+    ranked_sources = [sorted(group, key=_engagement, reverse=True) for group in by_source.values()]
+    return [post for round_ in zip_longest(*ranked_sources) for post in round_ if post is not None]
+
+
+class CompactPrompt:
+    """Result of a compaction run: prompt text, the posts kept, and what was saved."""
+
+    def __init__(self, text: str, posts: list, dropped: int, stats: dict):
+        self.text = text
+        # Kept posts in prompt order; post i is referenced as [i+1].
+        self.posts = posts
+        self.dropped = dropped
+        self.stats = stats
+
+
+def compact_posts_prompt(instructions: str, posts: list, token_budget: int = DEFAULT_TOKEN_BUDGET) -> CompactPrompt:
+    """
+    Builds the smallest useful prompt for a list of posts within `token_budget` tokens.
+
+    Posts are ranked by engagement (score plus weighted comments, per source); URLs and authors
+    are dropped in favour of short [n] references and the linked domain, titles are
+    whitespace-collapsed and truncated, and the lowest-ranked posts are trimmed
+    until the prompt fits the budget.
+
+    Args:
+        instructions (str): Prompt text placed before the posts.
+        posts (list): Post dicts with 'title', 'score', 'url' and optionally 'comments',
+            'score_velocity' and 'source'.
+        token_budget (int): Max tokens for the whole prompt.
+
+    Returns:
+        CompactPrompt: The prompt, kept posts and byte/token savings versus the verbose format.
+    """
+    ranked = rank_posts(posts)
+    legend = "Posts ranked by engagement; s=score, c=comments, v=score change per hour, n=similar posts merged.\n"
+    used_tokens = count_tokens(instructions) + count_tokens(legend) + 1
+
+    kept, lines = [], []
+    for post in ranked:
+        line = _compact_line(len(kept) + 1, post)
+        line_tokens = count_tokens(line) + 1
+        if used_tokens + line_tokens > token_budget:
+            break
+        kept.append(post)
+        lines.append(line)
+        used_tokens += line_tokens
+
+    text = f"{instructions}\n{legend}" + "\n".join(lines)
+    verbose_text = instructions + format_posts_verbose(posts)
+    stats = {
+        "posts_in": len(posts),
+        "posts_kept": len(kept),
+        "bytes_before": len(verbose_text.encode("utf-8")),
+        "bytes_after": len(text.encode("utf-8")),
+        "tokens_before": count_tokens(verbose_text),
+        "tokens_after": count_tokens(text),
+    }
+    stats["bytes_saved"] = stats["bytes_before"] - stats["bytes_after"]
+    stats["tokens_saved"] = stats["tokens_before"] - stats["tokens_after"]
+    logging.info(
+        f"Compacted {len(posts)} posts to {len(kept)}: "
+        f"{stats['bytes_before']} -> {stats['bytes_after']} bytes, "
+        f"{stats['tokens_before']} -> {stats['tokens_after']} tokens."
+    )
+    return CompactPrompt(text, kept, len(posts) - len(kept), stats)
@@ -1,3 +1,4 @@
 trend_watcher_prompts = {
-    "reddit": "Summarize the following Reddit posts from r/wallstreetbets and tell me what investment insights or advice can you provide?"
+    "reddit": "Summarize the following Reddit posts from r/wallstreetbets and tell me what investment insights or advice can you provide?",
+    "trends": "Summarize the following trending posts (Reddit r/wallstreetbets, plus other sources where tagged) and tell me what investment insights or advice can you provide?",
 }
@@ -0,0 +1,129 @@
+# SQLite index of seen Reddit posts with score snapshots, for incremental polling.
+import logging
+import sqlite3
+import threading
+import time
+
+from pipeline.state import state_path
+
+
+# Posts whose score grows at least this fast (points per hour) count as fast-rising.
+DEFAULT_MIN_SCORE_VELOCITY = 50.0
+SNAPSHOT_RETENTION_DAYS = 30
+
+
+class RedditPostIndex:
+    """Remembers every post seen, keyed by Reddit post id, with score/comment snapshots over time."""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or state_path("reddit_index.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS posts ("
+            " id TEXT PRIMARY KEY, subreddit TEXT, title TEXT, url TEXT, created_utc REAL,"
+            " first_seen REAL, last_seen REAL, last_score INTEGER, last_comments INTEGER);"
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            " post_id TEXT, seen_at REAL, score INTEGER, comments INTEGER);"
+            "CREATE INDEX IF NOT EXISTS snapshots_post ON snapshots(post_id, seen_at);"
+        )
+        self._conn.commit()
+
+    def record(self, subreddit: str, posts: list, now: float = None) -> list:
+        """
+        Stores a snapshot of `posts` and annotates each with its history.
+
+        Adds to every post dict:
+            is_new (bool): first time this post id is seen.
+            score_velocity (float): score points per hour since the previous snapshot,
+                or since creation for new posts.
+            comment_velocity (float): same, for the comment count.
+
+        Returns:
+            list: The same post dicts, annotated.
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            for post in posts:
+                post_id = post.get("id")
+                if not post_id:
+                    continue
+                score = post.get("score") or 0
+                comments = post.get("comments") or 0
+                previous = self._conn.execute(
+                    "SELECT last_seen, last_score, last_comments FROM posts WHERE id = ?", (post_id,)
+                ).fetchone()
+
+                if previous is None:
+                    since, base_score, base_comments = post.get("created_utc") or now, 0, 0
+                    self._conn.execute(
+                        "INSERT INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (post_id, subreddit, post.get("title"), post.get("url"), post.get("created_utc"),
+                         now, now, score, comments),
+                    )
+                else:
+                    since, base_score, base_comments = previous
+                    self._conn.execute(
+                        "UPDATE posts SET last_seen = ?, last_score = ?, last_comments = ? WHERE id = ?",
+                        (now, score, comments, post_id),
+                    )
+                self._conn.execute(
+                    "INSERT INTO snapshots VALUES (?, ?, ?, ?)", (post_id, now, score, comments)
+                )
+
+                hours = max((now - since) / 3600, 1 / 60)
+                post["is_new"] = previous is None
+                post["score_velocity"] = round((score - base_score) / hours, 1)
+                post["comment_velocity"] = round((comments - base_comments) / hours, 1)
+
+            self._conn.execute(
+                "DELETE FROM snapshots WHERE seen_at < ?", (now - SNAPSHOT_RETENTION_DAYS * 86400,)
+            )
+            self._conn.commit()
+        return posts
+
+    def history(self, post_id: str) -> list:
+        """(seen_at, score, comments) snapshots of one post, oldest first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT seen_at, score, comments FROM snapshots WHERE post_id = ? ORDER BY seen_at",
+                (post_id,),
+            ).fetchall()
+
+
+class IncrementalRedditPoller:
+    """Fetches hot posts and returns only the ones that are new or rising fast since the last poll."""
+
+    def __init__(self, watcher, index: RedditPostIndex = None,
+                 min_score_velocity: float = DEFAULT_MIN_SCORE_VELOCITY, clock=time.time):
+        """
+        Args:
+            watcher: A TrendWatcher (anything with `get_trendy_reddit_posts`).
+            index (RedditPostIndex): Seen-post store. Defaults to one under the pipeline state dir.
+            min_score_velocity (float): Score points per hour for an old post to be reported again.
+            clock: Zero-argument callable returning the current epoch time.
+        """
+        self.watcher = watcher
+        self.index = index or RedditPostIndex()
+        self.min_score_velocity = min_score_velocity
+        self.clock = clock
+
+    def poll(self, subreddit: str, count: int = 50, search_word: str = None) -> list:
+        """
+        Returns new or fast-rising posts, fastest-rising first.
+
+        Every fetched post is recorded, so tomorrow's velocities are measured
+        against today's snapshot.
+        """
+        posts = self.watcher.get_trendy_reddit_posts(subreddit=subreddit, search_word=search_word, count=count)
+        posts = self.index.record(subreddit, posts, now=self.clock())
+        selected = [
+            post for post in posts
+            if post.get("is_new", True) or post.get("score_velocity", 0) >= self.min_score_velocity
+        ]
+        selected.sort(key=lambda post: post.get("score_velocity", 0), reverse=True)
+        logging.info(
+            f"Reddit r/{subreddit}: {len(posts)} fetched, "
+            f"{sum(1 for post in posts if post.get('is_new'))} new, {len(selected)} new or rising."
+        )
+        return selected
@@ -0,0 +1,248 @@
+# Ticker-mention extraction over trend titles with a token trie of symbols and company names.
+import argparse
+import csv
+import logging
+import random
+import re
+import os
+import threading
+import time
+from collections import Counter
+
+
+# Symbols that are also everyday (or WSB) words; they only count as cashtags ("$ALL").
+AMBIGUOUS_SYMBOLS = frozenset(
+    "A ALL AM AN ANY ARE BE CAN CEO DD EOD FOR GO HAS IT NOW ON ONE OR OUT SO SEE TV UK US USA YOLO".split()
+)
+# Trailing words dropped from company names, so "Meta Platforms, Inc." is also found as "Meta".
+COMPANY_SUFFIXES = frozenset(
+    "inc inc. corp corp. corporation co co. company ltd ltd. plc holdings group class the sa nv ag "
+    "platforms technologies incorporated".split()
+)
+# Distinct candidate phrases whose matches are memoized; titles repeat the same
+# capitalized words and cashtags, so most phrases are looked up instead of parsed.
+PHRASE_CACHE_SIZE = 100_000
+# Small default universe; load the full S&P 500 / Nasdaq-100 list with `TickerUniverse.from_csv`.
+DEFAULT_UNIVERSE = {
+    "AAPL": ("Apple",), "MSFT": ("Microsoft",), "NVDA": ("Nvidia",), "AMZN": ("Amazon",),
+    "GOOGL": ("Alphabet", "Google"), "META": ("Meta Platforms", "Facebook"), "TSLA": ("Tesla",),
+    "AVGO": ("Broadcom",), "AMD": ("Advanced Micro Devices",), "INTC": ("Intel",), "NFLX": ("Netflix",),
+    "PLTR": ("Palantir",), "ARM": (), "SMCI": ("Super Micro Computer", "Supermicro"), "MU": ("Micron",),
+    "TSM": ("TSMC", "Taiwan Semiconductor"), "ORCL": ("Oracle",), "CRM": ("Salesforce",),
+    "ADBE": ("Adobe",), "COIN": ("Coinbase",), "MSTR": ("MicroStrategy",), "HOOD": ("Robinhood",),
+    "GME": ("GameStop",), "AMC": ("AMC Entertainment",), "RDDT": ("Reddit",), "UBER": ("Uber",),
+    "JPM": ("JPMorgan", "JPMorgan Chase"), "BAC": ("Bank of America",), "GS": ("Goldman Sachs",),
+    "BRK.B": ("Berkshire Hathaway", "Berkshire"), "LLY": ("Eli Lilly",), "NVO": ("Novo Nordisk",),
+    "UNH": ("UnitedHealth",), "PFE": ("Pfizer",), "WMT": ("Walmart",), "COST": ("Costco",), "DIS": ("Disney",),
+    "BA": ("Boeing",), "XOM": ("Exxon", "ExxonMobil"), "RIVN": ("Rivian",), "LCID": ("Lucid",),
+    "SPY": ("S&P 500",), "QQQ": ("Nasdaq 100",),
+}
+
+# Candidates only, so lower-case text is skipped inside the regex engine: cashtags and
+# runs of capitalized words (or numbers) joined by "of"/"and"/"&", such as "$tsla",
+# "NVDA", "BRK.B", "Bank of America" or "S&P 500".
+_CANDIDATE = re.compile(r"[$A-Z][A-Za-z0-9&.]*(?:[ \t]+(?:of|and|&|[$A-Z0-9][A-Za-z0-9&.]*))*")
+_NAME_TOKEN = re.compile(r"[A-Za-z0-9&]+")
+
+
+class TickerUniverse:
+    """Symbols plus a word-level trie of company names and aliases."""
+
+    def __init__(self, names_by_symbol: dict):
+        """
+        Args:
+            names_by_symbol (dict): {symbol: iterable of company names/aliases}.
+        """
+        self.symbols = frozenset(symbol.upper() for symbol in names_by_symbol)
+        self._phrase_cache = {}
+        # Nested dicts keyed by lowercase word; the None key holds the symbol a path ends on.
+        self.trie = {}
+        for symbol, names in names_by_symbol.items():
+            for name in names:
+                words = [word.lower() for word in _NAME_TOKEN.findall(name)]
+                while len(words) > 1 and words[-1] in COMPANY_SUFFIXES:
+                    words.pop()
+                if not words:
+                    continue
+                node = self.trie
+                for word in words:
+                    node = node.setdefault(word, {})
+                node[None] = symbol.upper()
+
+    @classmethod
+    def from_csv(cls, path: str) -> "TickerUniverse":
+        """
+        Loads a universe from a CSV with "Symbol" and "Name" columns and an optional
+        "Aliases" column ("|"-separated), e.g. an S&P 500 or Nasdaq-100 constituents export.
+        """
+        names_by_symbol = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                symbol = (row.get("Symbol") or "").strip()
+                if not symbol:
+                    continue
+                aliases = [alias.strip() for alias in (row.get("Aliases") or "").split("|") if alias.strip()]
+                names_by_symbol.setdefault(symbol, []).extend([row.get("Name") or ""] + aliases)
+        logging.info(f"Loaded {len(names_by_symbol)} tickers from {path}.")
+        return cls(names_by_symbol)
+
+    def extract(self, text: str) -> set:
+        """
+        Symbols mentioned in `text`: cashtags, bare upper-case symbols (except ambiguous
+        ones) and company names written in title case.
+        """
+        found = set()
+        cache = self._phrase_cache
+        for phrase in _CANDIDATE.findall(text or ""):
+            matches = cache.get(phrase)
+            if matches is None:
+                matches = self._match_phrase(phrase)
+                if len(cache) >= PHRASE_CACHE_SIZE:
+                    cache.clear()
+                cache[phrase] = matches
+            if matches:
+                found.update(matches)
+        return found
+
+    def _match_phrase(self, phrase: str) -> tuple:
+        """Symbols in one candidate phrase (see `_CANDIDATE`)."""
+        found = []
+        symbols, trie = self.symbols, self.trie
+        words = [word.rstrip(".") for word in phrase.split()]
+        skip_until = 0
+        for i, word in enumerate(words):
+            if i < skip_until or not word:
+                continue
+            if word[0] == "$":
+                if word[1:].upper() in symbols:
+                    found.append(word[1:].upper())
+                continue
+            # Connectors and numbers never start a symbol or company name.
+            if not word[0].isupper():
+                continue
+            if word in symbols and word not in AMBIGUOUS_SYMBOLS:
+                found.append(word)
+            node = trie.get(word.lower())
+            if node is None:
+                continue
+            # Longest company name starting at this word.
+            match, end = node.get(None), i + 1
+            for j in range(i + 1, len(words)):
+                node = node.get(words[j].lower())
+                if node is None:
+                    break
+                if None in node:
+                    match, end = node[None], j + 1
+            if match:
+                found.append(match)
+                skip_until = end
+        return tuple(found)
+
+
+_universe = None
+_universe_lock = threading.Lock()
+
+
+def get_ticker_universe() -> TickerUniverse:
+    """Process-wide universe: the CSV at TICKER_UNIVERSE_CSV if set, else DEFAULT_UNIVERSE."""
+    global _universe
+    with _universe_lock:
+        if _universe is None:
+            path = os.getenv("TICKER_UNIVERSE_CSV")
+            _universe = TickerUniverse.from_csv(path) if path else TickerUniverse(DEFAULT_UNIVERSE)
+        return _universe
+
+
+class MentionIndex:
+    """Per-ticker mention counts (one per post) and time series bucketed by `bucket_seconds`."""
+
+    def __init__(self, universe: TickerUniverse = None, bucket_seconds: int = 3600):
+        self.universe = universe or get_ticker_universe()
+        self.bucket_seconds = bucket_seconds
+        self.counts = Counter()
+        self.buckets = {}
+        self.posts = 0
+
+    def add(self, text: str, timestamp: float = None, weight: int = 1) -> set:
+        """Records the tickers mentioned in one post (standing for `weight` posts); returns them."""
+        tickers = self.universe.extract(text)
+        self.posts += weight
+        if not tickers:
+            return tickers
+        # Plain item updates: Counter.update() and setdefault(..., Counter()) cost more than the extraction.
+        counts, buckets = self.counts, self.buckets
+        bucket = None if timestamp is None else int(timestamp // self.bucket_seconds) * self.bucket_seconds
+        for ticker in tickers:
+            counts[ticker] += weight
+            if bucket is not None:
+                series = buckets.get(ticker)
+                if series is None:
+                    series = buckets[ticker] = Counter()
+                series[bucket] += weight
+        return tickers
+
+    def add_posts(self, posts: list) -> "MentionIndex":
+        """Indexes post dicts by 'title' and 'created_utc'; merged near-duplicates count `cluster_size` times."""
+        for post in posts:
+            self.add(post.get("title"), post.get("created_utc"), post.get("cluster_size") or 1)
+        return self
+
+    def top(self, n: int = 10) -> list:
+        return self.counts.most_common(n)
+
+    def series(self, ticker: str) -> list:
+        """(bucket start epoch seconds, mentions) pairs, oldest first."""
+        return sorted(self.buckets.get(ticker, {}).items())
+
+    def format_table(self, n: int = 10) -> str:
+        """One-line mention table for prompts, e.g. "Ticker mentions (of 50 posts): NVDA 12, TSLA 7"."""
+        if not self.counts:
+            return ""
+        return f"Ticker mentions (of {self.posts} posts): " + ", ".join(f"{ticker} {count}" for ticker, count in self.top(n))
+
+
+def _synthetic_titles(count: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    symbols = list(DEFAULT_UNIVERSE)
+    names = [name for names in DEFAULT_UNIVERSE.values() for name in names]
+    words = ("calls puts yolo earnings guidance squeeze moon dump rally beat miss tendies loss porn "
+             "bought sold my wife boyfriend all in on today the to and price target CEO DD").split()
+    titles = []
+    for _ in range(count):
+        parts = rng.sample(words, 8)
+        roll = rng.random()
+        if roll < 0.3:
+            parts.insert(rng.randrange(len(parts)), "$" + rng.choice(symbols))
+        elif roll < 0.6:
+            parts.insert(rng.randrange(len(parts)), rng.choice(symbols))
+        elif roll < 0.8:
+            parts.insert(rng.randrange(len(parts)), rng.choice(names))
+        title = " ".join(parts)
+        titles.append(title[0].upper() + title[1:])
+    return titles
+
+
+def _benchmark(posts: int, repeats: int, universe_csv: str = None) -> None:
+    titles = _synthetic_titles(posts)
+    universe = TickerUniverse.from_csv(universe_csv) if universe_csv else TickerUniverse(DEFAULT_UNIVERSE)
+    timings = []
+    for _ in range(repeats):
+        index = MentionIndex(universe)
+        started_at = time.perf_counter()
+        for title in titles:
+            index.add(title, 0)
+        timings.append(time.perf_counter() - started_at)
+    elapsed = min(timings)
+    print(f"{posts} posts, {len(universe.symbols)} tickers, best of {repeats}: "
+          f"{elapsed * 1000:.1f} ms ({posts / elapsed:,.0f} posts/s)")
+    print(index.format_table())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ticker-mention extraction on synthetic titles.")
+    parser.add_argument("--posts", type=int, default=200000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--universe-csv", help="Symbol/Name CSV to load instead of the default universe.")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    _benchmark(args.posts, args.repeats, args.universe_csv)
@@ -0,0 +1,240 @@
+# Concurrent, normalized collection of trends from every TrendWatcher source.
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+from pipeline.state import PIPELINE_STATE_DIR
+from pipeline.tracing import submit_in_context
+
+
+DEFAULT_SOURCE_TIMEOUT_SECONDS = 30
+# A last-good snapshot older than this is not used as a fallback.
+FALLBACK_MAX_AGE_SECONDS = 3 * 24 * 3600
+X_DEFAULT_QUERY = "investment lang:en -is:retweet"
+# Sources used when none are named. YouTube's "mostPopular" chart is general entertainment,
+# not finance, so it (like the other sources) has to be enabled explicitly.
+DEFAULT_TREND_SOURCES = ("reddit",)
+
+
+def _to_int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+class TrendItem:
+    """One trending post, video or search term, in the same shape for every source."""
+
+    __slots__ = (
+        "source", "item_id", "title", "url", "score", "comments", "author", "created_utc", "score_velocity",
+        "cluster_size",
+    )
+
+    def __init__(self, source: str, title: str, url: str = "", score: int = 0, comments: int = None,
+                 author: str = "", item_id: str = "", created_utc: float = None, score_velocity: float = None,
+                 cluster_size: int = 1):
+        self.source = source
+        self.item_id = item_id
+        self.title = title
+        self.url = url
+        self.score = score
+        self.comments = comments
+        self.author = author
+        self.created_utc = created_utc
+        self.score_velocity = score_velocity
+        # Number of near-duplicate items this one stands for (see trend_watcher.dedup).
+        self.cluster_size = cluster_size
+
+    def to_dict(self) -> dict:
+        """Post dict as used by prompt compaction and the report ('id' for item_id)."""
+        data = {"id": self.item_id}
+        data.update((name, getattr(self, name)) for name in self.__slots__ if name != "item_id")
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TrendItem":
+        fields = {name: data[name] for name in cls.__slots__ if name != "item_id" and name in data}
+        return cls(item_id=data.get("id", ""), **fields)
+
+    def __repr__(self):
+        return f"TrendItem({self.source!r}, {self.title[:40]!r}, score={self.score})"
+
+
+def normalize_reddit(posts: list) -> list:
+    return [
+        TrendItem("reddit", post["title"], url=post.get("url", ""), score=_to_int(post.get("score")),
+                  comments=post.get("comments"), author=post.get("author", ""), item_id=post.get("id", ""),
+                  created_utc=post.get("created_utc"), score_velocity=post.get("score_velocity"))
+        for post in posts
+    ]
+
+
+def normalize_youtube(videos: list) -> list:
+    return [
+        TrendItem("youtube", video["title"], url=video.get("url", ""), score=_to_int(video.get("view_count")),
+                  author=video.get("channel", ""), item_id=video.get("url", "").rsplit("=", 1)[-1])
+        for video in videos
+    ]
+
+
+def normalize_x(tweets: list) -> list:
+    return [
+        TrendItem("x", tweet["text"], author=str(tweet.get("user") or ""),
+                  created_utc=tweet["created_at"].timestamp() if hasattr(tweet.get("created_at"), "timestamp") else None)
+        for tweet in tweets
+    ]
+
+
+def normalize_google_trends(searches) -> list:
+    # pytrends returns a one-column DataFrame of search terms (or [] on failure).
+    if hasattr(searches, "iloc"):
+        searches = [] if searches.empty else searches.iloc[:, 0].tolist()
+    terms = list(searches)
+    return [TrendItem("google_trends", str(term)) for term in terms]
+
+
+def normalize_tiktok(videos: list) -> list:
+    return [
+        TrendItem("tiktok", video["description"], url=video.get("url", ""), score=_to_int(video.get("view_count")),
+                  comments=video.get("comment_count"), author=video.get("author", ""), item_id=video.get("video_id", ""))
+        for video in videos
+    ]
+
+
+class TrendSource:
+    """A named fetch function, its normalizer and its own timeout."""
+
+    def __init__(self, name: str, fetch, normalize, timeout_seconds: float = DEFAULT_SOURCE_TIMEOUT_SECONDS,
+                 empty_is_failure: bool = True):
+        """
+        Args:
+            name (str): Source name, also the `TrendItem.source` tag.
+            fetch (callable): No-argument function returning the raw source result.
+            normalize (callable): Turns the raw result into a list of TrendItem.
+            timeout_seconds (float): Max seconds to wait, counted from the start of the gather.
+            empty_is_failure (bool): Whether an empty result triggers the fallback. Most TrendWatcher
+                methods return [] on errors, so this is the default; errors that are raised
+                always trigger it.
+        """
+        self.name = name
+        self.fetch = fetch
+        self.normalize = normalize
+        self.timeout_seconds = timeout_seconds
+        self.empty_is_failure = empty_is_failure
+
+    def collect(self) -> list:
+        return self.normalize(self.fetch())
+
+
+def default_trend_sources(watcher, enabled: tuple = None, reddit_poller=None) -> list:
+    """
+    Builds the standard sources over a TrendWatcher.
+
+    Args:
+        watcher: A TrendWatcher.
+        enabled (tuple): Source names to include, in order, out of "reddit", "youtube", "x",
+            "google_trends" and "tiktok". Defaults to DEFAULT_TREND_SOURCES.
+        reddit_poller: Optional IncrementalRedditPoller; when given, Reddit returns only
+            new or fast-rising posts, and an empty result is not a failure. Fetch errors
+            are raised either way, so they still fall back to the last good posts.
+    """
+    if reddit_poller is not None:
+        reddit = TrendSource("reddit", lambda: reddit_poller.poll(subreddit="wallstreetbets", count=50),
+                             normalize_reddit, empty_is_failure=False)
+    else:
+        reddit = TrendSource("reddit", lambda: watcher.get_trendy_reddit_posts(subreddit="wallstreetbets", count=50),
+                             normalize_reddit)
+    sources = [
+        reddit,
+        TrendSource("youtube", lambda: watcher.get_trendy_youtube_videos(count=20), normalize_youtube),
+        TrendSource("x", lambda: watcher.get_trendy_tweets(X_DEFAULT_QUERY, count=20), normalize_x),
+        TrendSource("google_trends", watcher.fetch_trending_searches, normalize_google_trends, timeout_seconds=15),
+        TrendSource("tiktok", lambda: watcher.get_trendy_tiktok_videos(count=20), normalize_tiktok),
+    ]
+    by_name = {source.name: source for source in sources}
+    return [by_name[name] for name in (enabled if enabled is not None else DEFAULT_TREND_SOURCES)]
+
+
+class TrendFallbackStore:
+    """Last successful items per source, served when a source fails or times out."""
+
+    def __init__(self, cache_dir: str = None):
+        self.cache_dir = cache_dir or os.path.join(PIPELINE_STATE_DIR, "trend_sources")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, f"{name}.json")
+
+    def save(self, name: str, items: list) -> None:
+        path = self._path(name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "items": [item.to_dict() for item in items]}, f)
+        os.replace(tmp_path, path)
+
+    def load(self, name: str, max_age_seconds: float = FALLBACK_MAX_AGE_SECONDS) -> list:
+        try:
+            with open(self._path(name), encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return []
+        if time.time() - snapshot.get("saved_at", 0) > max_age_seconds:
+            return []
+        return [TrendItem.from_dict(item) for item in snapshot.get("items", [])]
+
+
+def gather_trends(sources: list, fallback_store: TrendFallbackStore = None) -> dict:
+    """
+    Fetches every source concurrently; the whole gather takes about as long as the slowest source.
+
+    Each source is bounded by its own timeout (measured from the start of the gather).
+    A source that raises, times out or (if `empty_is_failure`) returns nothing is
+    replaced by its last good result from `fallback_store`, or by an empty list.
+
+    Args:
+        sources (list): TrendSource objects, e.g. from `default_trend_sources`.
+        fallback_store (TrendFallbackStore): Last-good snapshots. Defaults to one under the
+            pipeline state dir.
+
+    Returns:
+        dict: {source name: list of TrendItem}, in source order.
+    """
+    if not sources:
+        return {}
+    fallback_store = fallback_store or TrendFallbackStore()
+    start = time.monotonic()
+    # One thread per source; threads of timed-out sources are abandoned, not joined.
+    executor = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="trend-source")
+    futures = [(source, submit_in_context(executor, source.collect)) for source in sources]
+
+    trends = {}
+    try:
+        for source, future in futures:
+            remaining = max(0.0, start + source.timeout_seconds - time.monotonic())
+            try:
+                items = future.result(timeout=remaining)
+            except FuturesTimeoutError:
+                items, failure = None, f"timed out after {source.timeout_seconds}s"
+            except Exception as e:
+                items, failure = None, f"failed: {e}"
+            else:
+                failure = "returned nothing" if not items and source.empty_is_failure else None
+
+            if failure is None:
+                fallback_store.save(source.name, items)
+            else:
+                items = fallback_store.load(source.name)
+                logging.warning(f"Trend source {source.name} {failure}; using {len(items)} fallback items.")
+            trends[source.name] = items
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    logging.info(
+        f"Gathered trends in {time.monotonic() - start:.1f}s: "
+        + ", ".join(f"{name}={len(items)}" for name, items in trends.items())
+    )
+    return trends
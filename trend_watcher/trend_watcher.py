@@ -1,17 +1,15 @@
 # TrendWatcher class to find trending tweets and Reddit posts
-import tweepy
-import praw
+# Provider SDKs (tweepy, praw, pytrends, googleapiclient, TikTokApi) are imported on first use.
 import logging
-from dotenv import load_dotenv
 import os
-from pytrends.request import TrendReq
-import googleapiclient.discovery
-from TikTokApi import TikTokApi
 
+from pipeline.clients import borrow_reddit_client, borrow_youtube_client, get_x_client
+from pipeline.env import configure_environment
+from pipeline.resilience import get_resilience
+from pipeline.tracing import traced
 
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(filename)s:%(lineno)d - %(message)s')
 
-load_dotenv()
+configure_environment()
 
 X_BEARER_TOKEN = os.getenv("X_BEARER_TOKEN")
 REDDIT_CLIENT_ID = os.getenv("REDDIT_CLIENT_ID")
@@ -41,11 +39,11 @@ class TrendWatcher:
 		Returns:
 			list: List of trending tweets (dicts with 'text' and 'user').
 		"""
-		# Authenticate with X (Twitter) API
-		client = tweepy.Client(bearer_token=self.x_bearer_token)
+		# Authenticate with X (Twitter) API, reusing the shared client across calls.
+		client = get_x_client(self.x_bearer_token)
 		try:
 			# API manual: https://docs.x.com/x-api/posts/search-recent-posts
-			tweets = client.search_recent_tweets(query=query, max_results=count,
+			tweets = get_resilience("x").call(client.search_recent_tweets, query=query, max_results=count,
 										tweet_fields=['text','created_at','author_id','public_metrics'])
 			return [{
 				'text': tweet.text,
@@ -56,6 +54,7 @@ class TrendWatcher:
 			print(f"Error fetching tweets: {e}")
 			return []
 
+	@traced()
 	def get_trendy_reddit_posts(self, subreddit, search_word= None, count=10):
 		"""
 		Fetch trending posts from Reddit based on a subreddit.
@@ -63,34 +62,43 @@ class TrendWatcher:
 			subreddit (str): Subreddit to search for trending posts.
 			count (int): Number of posts to fetch.
 		Returns:
-			list: List of trending Reddit posts (dicts with 'title' and 'url').
+			list: List of trending Reddit posts (dicts with 'id', 'title', 'url', 'score',
+				'author', 'comments' and 'created_utc').
+		Raises:
+			Exception: When Reddit could not be reached, so trend sources fall back to the
+				last good posts instead of treating the failure as "no posts".
 		"""
-		reddit = praw.Reddit(
-			client_id=self.reddit_client_id,
-			client_secret=self.reddit_client_secret,
-			user_agent=self.reddit_user_agent
-		)
-		try:
-			if search_word:
-				# Search posts in the subreddit.
-				posts = reddit.subreddit(subreddit).search(search_word, limit=count)
-			else:
-				# Get hot posts in the subreddit.
-				posts = reddit.subreddit(subreddit).hot(limit=count)
-			return [{
-				'title': post.title,
-				'url': post.url,
-				'score': post.score,
-				'author': str(post.author),
-				'comments': post.num_comments,
-			} for post in posts if not post.stickied]
-		except Exception as e:
-			print(f"Error fetching Reddit posts: {e}")
-			return []
+		def fetch_posts():
+			# praw is not thread-safe; the client is ours alone until the block exits.
+			with borrow_reddit_client(
+				self.reddit_client_id,
+				self.reddit_client_secret,
+				self.reddit_user_agent,
+			) as reddit:
+				if search_word:
+					# Search posts in the subreddit.
+					posts = reddit.subreddit(subreddit).search(search_word, limit=count)
+				else:
+					# Get hot posts in the subreddit.
+					posts = reddit.subreddit(subreddit).hot(limit=count)
+				# Listings are lazy; the requests happen while iterating.
+				return [{
+					'id': post.id,
+					'title': post.title,
+					'url': post.url,
+					'score': post.score,
+					'author': str(post.author),
+					'comments': post.num_comments,
+					'created_utc': post.created_utc,
+				} for post in posts if not post.stickied]
+
+		return get_resilience("reddit").call(fetch_posts)
 
 	def fetch_trending_searches(self):
 		"""Fetch trending searches from Google Trends.
 		This doesn't work..."""
+		from pytrends.request import TrendReq
+
 		pytrend = TrendReq()
 		try:
 			df = pytrend.trending_searches(pn='united_states')
@@ -99,6 +107,7 @@ class TrendWatcher:
 			print(f"Error fetching trending searches: {e}")
 			return []
 		
+	@traced()
 	def get_trendy_youtube_videos(self, region_code='US', count=50):
 		"""
 		Fetch trending videos from YouTube based on region.
@@ -109,17 +118,17 @@ class TrendWatcher:
 			list: List of trending YouTube videos (dicts with 'title', 'channel', 'view_count', 'url').
 		"""
 		try:
-			youtube = googleapiclient.discovery.build('youtube', 'v3', developerKey=self.gcp_api_key)
-			
-			# Fetch trending videos
-			request = youtube.videos().list(
-				part='snippet,statistics',
-				chart='mostPopular',
-				regionCode=region_code,
-				maxResults=count,
-				fields='items(id,snippet(title,channelTitle,publishedAt),statistics(viewCount,likeCount))'
-			)
-			response = request.execute()
+			# httplib2 is not thread-safe; the client is ours alone until the block exits.
+			with borrow_youtube_client(self.gcp_api_key) as youtube:
+				# Fetch trending videos
+				request = youtube.videos().list(
+					part='snippet,statistics',
+					chart='mostPopular',
+					regionCode=region_code,
+					maxResults=count,
+					fields='items(id,snippet(title,channelTitle,publishedAt),statistics(viewCount,likeCount))'
+				)
+				response = get_resilience("youtube").call(request.execute)
 			
 			return [{
 				'title': item['snippet']['title'],
@@ -143,6 +152,8 @@ class TrendWatcher:
 			list: List of trending TikTok videos (dicts with 'description', 'author', 'view_count', 'like_count', 'comment_count', 'share_count', 'url').
 		"""
 		try:
+			from TikTokApi import TikTokApi
+
 			api = TikTokApi()
 			videos = []
 			